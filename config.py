@@ -10,3 +10,62 @@ DEBUG = True # Global debug mode switch. Affects some development features and m
 LOG_LEVEL = "DEBUG"
 
 
+
+# Maximum number of rendered pages (Markdown -> HTML) kept in memory per worker.
+# Entries are keyed by page slug and content generation; least recently used pages are evicted first.
+RENDER_CACHE_MAX_ENTRIES = 512
+
+# File watcher: a content reload fires once no change was seen for WATCHER_QUIET_PERIOD seconds,
+# but at the latest WATCHER_MAX_LATENCY seconds after the first change of a batch.
+WATCHER_QUIET_PERIOD = 1.0
+WATCHER_MAX_LATENCY = 10.0
+
+# Page cache build: trees with at least PAGE_CACHE_PARALLEL_THRESHOLD pages are read and parsed
+# by a process pool of PAGE_CACHE_BUILD_WORKERS processes (0 = one per CPU), in chunks of
+# PAGE_CACHE_BUILD_CHUNK_SIZE files. Smaller trees (or PAGE_CACHE_BUILD_WORKERS = 1) are built serially.
+PAGE_CACHE_BUILD_WORKERS = 0
+PAGE_CACHE_PARALLEL_THRESHOLD = 500
+PAGE_CACHE_BUILD_CHUNK_SIZE = 64
+
+# Compiled-site snapshot: the parsed pages, navigation tree and search index are pickled to
+# SITE_SNAPSHOT_PATH after startup. A starting worker loads it and re-parses only the page files
+# whose mtime or size changed since. The file is trusted input (pickle), keep it out of reach of untrusted users.
+SITE_SNAPSHOT_ENABLED = True
+SITE_SNAPSHOT_PATH = "cache/site_snapshot.pickle"
+
+# Full-response cache for anonymous page views (opt-in). Stores the final HTML bytes per path and
+# content generation, evicting least recently used pages above RESPONSE_CACHE_MAX_BYTES per worker.
+# A page opts out with 'response_cache: false' in its frontmatter.
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Rendered pages are sent compressed (gzip/brotli) with or without the response cache. The variants are
+# cached by a digest of the rendered body, up to COMPRESSED_PAGE_CACHE_MAX_BYTES per worker, so a page
+# rendering to the same bytes is compressed only once.
+COMPRESSED_PAGE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Metadata-only page cache for large archives: with PAGE_BODIES_LAZY the page cache keeps the frontmatter,
+# slugs and the position of each page's Markdown body in its file, and bodies are read from disk on first
+# use into an LRU cache of at most PAGE_BODY_CACHE_MAX_BYTES per worker. The search index keeps its own
+# text, so search never needs the bodies in memory.
+PAGE_BODIES_LAZY = False
+PAGE_BODY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Page rendering (Markdown conversion and template rendering) runs in a pool of RENDER_EXECUTOR_WORKERS
+# threads per worker process, so a large page never blocks the event loop serving other requests.
+# 0 renders inline on the event loop (the former behavior).
+RENDER_EXECUTOR_WORKERS = 4
+
+# Markdown parsers are built once per effective extension configuration and reused (reset) across renders.
+# At most MARKDOWN_PARSER_POOL_SIZE idle parsers are kept per configuration (one per render thread is enough)
+# and at most MARKDOWN_PARSER_POOL_MAX_CONFIGS configurations (e.g. per-page TOC depths), least recently used dropped.
+MARKDOWN_PARSER_POOL_SIZE = 4
+MARKDOWN_PARSER_POOL_MAX_CONFIGS = 32
+
+# Render cache warm-up: after every content rebuild a background thread pre-renders pages into the
+# rendered page cache, most-viewed pages (by this worker's own view counts) first, at most
+# WARMUP_MAX_PAGES pages (None = as many as the render cache holds). WARMUP_CPU_BUDGET is the share
+# of one CPU the warm-up may use (it sleeps in between renders accordingly), so live traffic keeps priority.
+WARMUP_ENABLED = True
+WARMUP_MAX_PAGES = None
+WARMUP_CPU_BUDGET = 0.25
+WARMUP_START_DELAY = 1.0 # Seconds to wait after a rebuild, so bursts of reloads trigger a single warm-up
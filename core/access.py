@@ -0,0 +1,83 @@
+# core/access.py - Compiled Access Rules
+"""
+Access rules in their compiled form, evaluated with set operations only.
+
+A page's 'access' block maps dotted permission keys to booleans:
+- 'key: false' denies the page to everyone who holds the permission,
+- 'key: true' requires the permission; with several such rules, holding any one of them suffices,
+- without positive rules the page is public (unless a negative rule matches).
+A user's nested 'access' map grants every key path whose value is exactly True.
+
+Pages are compiled when PAGE_CACHE is built and users when the accounts are loaded, so
+deciding access no longer walks nested dicts on every request.
+This module has no dependencies on the caches, so both core.cache and core.security can use it.
+"""
+
+
+class CompiledAccessRules:
+    """The compiled 'access' block of a page: the permissions that deny and those that grant access."""
+    __slots__ = ('denied', 'required')
+
+    def __init__(self, denied: frozenset = frozenset(), required: frozenset = frozenset()):
+        self.denied = denied
+        self.required = required
+
+    def allows(self, granted_permissions: frozenset) -> bool:
+        """Decides access for a user holding granted_permissions (an empty set for anonymous visitors)."""
+        if not self.denied.isdisjoint(granted_permissions):
+            return False
+        return not self.required or not self.required.isdisjoint(granted_permissions)
+
+    def __bool__(self):
+        return bool(self.denied or self.required)
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledAccessRules) and (self.denied, self.required) == (other.denied, other.required)
+
+    def __hash__(self):
+        return hash((self.denied, self.required))
+
+    def __repr__(self):
+        return f"CompiledAccessRules(denied={sorted(self.denied)}, required={sorted(self.required)})"
+
+    def __reduce__(self):
+        return (_restore_rules, (self.denied, self.required))
+
+
+def _restore_rules(denied, required):
+    if not denied and not required:
+        return ALLOW_ALL
+    return CompiledAccessRules(denied, required)
+
+# Shared by all pages without effective rules.
+ALLOW_ALL = CompiledAccessRules()
+
+
+def compile_access_rules(access_block) -> CompiledAccessRules:
+    """Compiles a page's 'access' block. Entries whose value is not a boolean have never had any effect and are dropped."""
+    if not isinstance(access_block, dict) or not access_block:
+        return ALLOW_ALL
+    denied = frozenset(key for key, value in access_block.items() if value is False)
+    required = frozenset(key for key, value in access_block.items() if value is True)
+    if not denied and not required:
+        return ALLOW_ALL
+    return CompiledAccessRules(denied, required)
+
+def collect_granted_permissions(access_map, prefix: str = "") -> frozenset:
+    """
+    Flattens a user's nested 'access' map into the set of granted dotted permission keys.
+    Only values that are exactly True grant a permission. Keys that contain a dot (or are not
+    strings) can never be matched by a dotted rule path, so they are ignored.
+    """
+    if not isinstance(access_map, dict):
+        return frozenset()
+    granted = set()
+    for key, value in access_map.items():
+        if not isinstance(key, str) or '.' in key:
+            continue
+        permission = f"{prefix}{key}"
+        if value is True:
+            granted.add(permission)
+        elif isinstance(value, dict):
+            granted.update(collect_granted_permissions(value, f"{permission}."))
+    return frozenset(granted)
@@ -1,78 +1,309 @@
 # core/cache.py - Caching and Parsing Logic
 import os
-import yaml
+import sys
 import re
+import time
 import logging
+import threading
+import functools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from config import SITE_IDENTIFIKATOR
-from core.utils import generate_clean_slug # Import new utility function # Import SITE_IDENTIFIKATOR
+from config import PAGE_CACHE_BUILD_WORKERS, PAGE_CACHE_PARALLEL_THRESHOLD, PAGE_CACHE_BUILD_CHUNK_SIZE, PAGE_BODIES_LAZY, PAGE_BODY_CACHE_MAX_BYTES
+from core.utils import generate_clean_slug # Import new utility function
+from core.access import compile_access_rules, collect_granted_permissions
+from core.page_record import PageRecord, PageBodyRef, body_is_empty, register_body_loader
+from core.yaml_loader import safe_load, YAMLError
+from core.state import SnapshotMapping, SNAPSHOT_WRITE_LOCK, get_snapshot, get_current_snapshot, publish_snapshot
 
 logger = logging.getLogger(__name__)
 
 # --- Global Variables ---
-PAGE_CACHE = {}
-USER_ACCOUNTS_CACHE = {}
+# Live views of the pinned (or current) content snapshot (core.state). Builds below assemble new
+# mappings off to the side and publish them in one snapshot swap, never mutating published ones.
+PAGE_CACHE = SnapshotMapping('pages')
+USER_ACCOUNTS_CACHE = SnapshotMapping('accounts')
 YAML_FRONTMATTER_REGEX = re.compile(r'^-{3,}\s*$(.*?)^\s*-{3,}', re.MULTILINE | re.DOTALL)
+# Characters read at a time by the metadata-only parse, which stops reading after the frontmatter.
+FRONTMATTER_READ_CHUNK = 4096
 
-# --- Helper function for flattening dictionaries ---
-def _flatten_dict_with_prefix(data, prefix="", separator="."):
+# Callables invoked after PAGE_CACHE has changed. They receive the set of changed slugs,
+# or None after a full rebuild (when everything must be considered changed).
+PAGE_CACHE_REBUILD_LISTENERS = []
+# Maps the absolute path of every parsed default.md to the facts needed to patch PAGE_CACHE
+# incrementally: {'slug': cache key or None if the page was skipped, 'level_slug': ..., 'relative_dir': Path}
+PAGE_SOURCES = SnapshotMapping('page_sources')
+# The intermediate table of the last build: absolute path of every parsed default.md ->
+# (mtime_ns, size, page_meta, md_content). A persisted copy lets a later build skip unchanged files.
+# In the metadata-only mode (PAGE_BODIES_LAZY) md_content is a PageBodyRef instead of the body.
+PAGE_FILES = SnapshotMapping('page_files')
+
+# --- Content Generation Tracking ---
+# The generation is the version of the content snapshot: a monotonic counter incremented by every
+# publish. Derived caches (rendered HTML etc.) key their entries by it, so anything computed for
+# an older generation is never served again.
+def get_content_generation() -> int:
+    """Returns the content generation of the pinned (or current) snapshot."""
+    return get_snapshot().version
+
+def bump_content_generation() -> int:
+    """Publishes the same content as a new generation, invalidating everything derived from the previous one."""
+    generation = publish_snapshot().version
+    logger.debug(f"Content generation bumped to {generation}.")
+    return generation
+
+def register_rebuild_listener(listener):
     """
-    Recursively flattens a nested dictionary, prepending keys with a given prefix.
-    Example: _flatten_dict_with_prefix({'a': {'b': 1}}, prefix='_page') -> {'_page.a.b': 1}
+    Registers a callable to be notified after every page cache change.
+    The listener is called with the set of changed slugs, or None after a full rebuild.
     """
-    flattened = {}
-    for key, value in data.items():
-        new_key = f"{prefix}{separator}{key}" if prefix else key
-        if isinstance(value, dict):
-            flattened.update(_flatten_dict_with_prefix(value, new_key, separator))
+    if listener not in PAGE_CACHE_REBUILD_LISTENERS:
+        PAGE_CACHE_REBUILD_LISTENERS.append(listener)
+
+def _notify_rebuild_listeners(changed_slugs=None):
+    for listener in PAGE_CACHE_REBUILD_LISTENERS:
+        try:
+            listener(changed_slugs)
+        except Exception as e:
+            logger.error(f"Error in page cache rebuild listener {getattr(listener, '__qualname__', listener)}: {e}", exc_info=True)
+
+# --- Bounded LRU Cache ---
+class BoundedLRUCache:
+    """
+    A thread-safe, size-bounded mapping with least-recently-used eviction.
+    Bounded by the number of entries (max_entries, None = unbounded) and optionally by their total
+    size in bytes (max_bytes, measured by weigher(value)). Keeps hit/miss counters so callers can
+    expose cache efficiency.
+    """
+    def __init__(self, max_entries, max_bytes: int = 0, weigher=None):
+        self.max_entries = None if max_entries is None else max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.weigher = weigher
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.max_entries == 0:
+            return
+        size = self.weigher(value) if self.weigher else 0
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+                self.total_bytes -= self._sizes.pop(key)
+            if self.max_bytes and size > self.max_bytes:
+                return # Would evict everything else and still not fit
+            self._data[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            while (self.max_entries is not None and len(self._data) > self.max_entries) or (self.max_bytes and self.total_bytes > self.max_bytes):
+                evicted_key, _ = self._data.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(evicted_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+            if self.weigher:
+                stats["bytes"] = self.total_bytes
+                stats["max_bytes"] = self.max_bytes
+            return stats
+
+# --- Lazy Page Bodies ---
+# Maps (file path, stat_key) -> Markdown body, for pages whose records hold a PageBodyRef instead of
+# the body (metadata-only mode, PAGE_BODIES_LAZY). Bounded by PAGE_BODY_CACHE_MAX_BYTES; the key
+# includes the file's stat, so a changed file never hits the body of its previous version.
+PAGE_BODY_CACHE = BoundedLRUCache(None, max_bytes=PAGE_BODY_CACHE_MAX_BYTES, weigher=sys.getsizeof)
+
+def load_page_body(file_path: str, body_ref: PageBodyRef, use_cache: bool = True) -> str:
+    """
+    Returns the Markdown body a PageBodyRef points to, from PAGE_BODY_CACHE or read from disk.
+    use_cache=False reads without touching the cache (for bulk readers such as index builds,
+    which would otherwise evict the bodies of the pages actually being visited).
+    """
+    key = (file_path, body_ref.stat_key)
+    if use_cache:
+        body = PAGE_BODY_CACHE.get(key)
+        if body is not None:
+            return body
+    try:
+        stat_key = _stat_key(file_path)
+        content = Path(file_path).read_text(encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Body of page file {file_path} could not be read: {e}")
+        return ""
+    if stat_key == body_ref.stat_key:
+        if body_ref.length is None: # Only the frontmatter was read when the page was parsed
+            body = content[body_ref.offset:].strip()
         else:
-            flattened[new_key] = value
-    return flattened
+            body = content[body_ref.offset:body_ref.offset + body_ref.length]
+    else:
+        # Changed since the build; the watcher publishes the new version shortly. Serve the file as it is now.
+        _, body = parse_frontmatter(content)
+    if use_cache:
+        PAGE_BODY_CACHE.put(key, body)
+    return body
+
+register_body_loader(load_page_body)
+
+def get_page_body(page_data, use_cache: bool = True) -> str:
+    """Returns the Markdown body of a PAGE_CACHE entry, loading it from disk if it is not resident."""
+    body_ref = page_data.body_ref if isinstance(page_data, PageRecord) else None
+    if body_ref is not None:
+        return load_page_body(page_data.file_path, body_ref, use_cache)
+    return page_data.get("markdown_content", "")
+
+def get_page_body_cache_stats() -> dict:
+    """Returns hit/miss counters and occupancy of the lazy page body cache."""
+    stats = PAGE_BODY_CACHE.stats()
+    stats["enabled"] = PAGE_BODIES_LAZY
+    return stats
 
 # --- User Account Caching ---
 def build_user_accounts_cache(directory="user/accounts"):
-    """Loads all user accounts from YAML files into memory."""
+    """Loads all user accounts from YAML files and publishes them as the current accounts."""
+    accounts = load_user_accounts(directory)
+    if accounts is None:
+        return
+    publish_snapshot(accounts=accounts)
+    logger.info(f"User accounts cache build complete. Cached {len(accounts)} accounts.")
+
+def load_user_accounts(directory="user/accounts") -> dict | None:
+    """Loads all user accounts from YAML files. Returns {username: account data}, or None without an accounts directory."""
     accounts_dir = Path(directory)
     if not accounts_dir.is_dir():
         logger.warning(f"User accounts directory not found: {accounts_dir}")
-        return
+        return None
 
     temp_accounts_cache = {}
     logger.info("Starting user accounts cache build...")
     for account_file in accounts_dir.glob('*.yaml'):
         try:
             username = account_file.stem
-            account_data = yaml.safe_load(account_file.read_text(encoding='utf-8'))
+            account_data = safe_load(account_file.read_text(encoding='utf-8'))
             
             if account_data and "hashed_password" in account_data:
                 account_data["hashed_password"] = account_data["hashed_password"].encode('utf-8')
+                # Flattened once here, so access checks are plain set operations
+                account_data["granted_permissions"] = collect_granted_permissions(account_data.get("access"))
                 temp_accounts_cache[username] = account_data
                 logger.debug(f"Loaded user account: {username}")
             else:
                 logger.debug(f"Skipping invalid user account file: {account_file} (missing hashed_password or empty).")
         except Exception as e:
             logger.error(f"Error processing user account file {account_file}: {e}")
-    
-    USER_ACCOUNTS_CACHE.clear()
-    USER_ACCOUNTS_CACHE.update(temp_accounts_cache)
-    logger.info(f"User accounts cache build complete. Cached {len(USER_ACCOUNTS_CACHE)} accounts.")
+    return temp_accounts_cache
 
 # --- Page Content Parsing and Caching ---
 def parse_frontmatter(content):
     """Parses a string to separate YAML frontmatter from Markdown content."""
+    meta, body_offset, body_length = _parse_frontmatter_with_offsets(content)
+    return meta, content[body_offset:body_offset + body_length]
+
+def _parse_frontmatter_with_offsets(content):
+    """Like parse_frontmatter, but returns (meta, offset, length) of the Markdown content within the string."""
     match = YAML_FRONTMATTER_REGEX.search(content)
     if match:
-        frontmatter_str = match.group(1)
+        meta = _load_frontmatter(match.group(1))
+        if meta is None:
+            return {}, 0, len(content)
         content_str = content[match.end():]
-        try:
-            meta = yaml.safe_load(frontmatter_str) or {}
-            logger.debug(f"Successfully parsed YAML frontmatter. Meta: {meta}")
-            return meta, content_str.strip()
-        except yaml.YAMLError as e:
-            logger.warning(f"YAML parsing error in frontmatter: {e}. Content will be treated as plain Markdown.")
-            return {}, content
+        stripped = content_str.strip()
+        return meta, match.end() + len(content_str) - len(content_str.lstrip()), len(stripped)
     logger.debug("No YAML frontmatter found.")
-    return {}, content
+    return {}, 0, len(content)
+
+def _load_frontmatter(frontmatter_str: str):
+    """Loads a frontmatter block. Returns the meta dict, or None if it is not valid YAML (the page is then plain Markdown)."""
+    try:
+        meta = safe_load(frontmatter_str) or {}
+    except YAMLError as e:
+        logger.warning(f"YAML parsing error in frontmatter: {e}. Content will be treated as plain Markdown.")
+        return None
+    if logger.isEnabledFor(logging.DEBUG): # Formatting the meta would cost more than the C loader itself
+        logger.debug(f"Successfully parsed YAML frontmatter. Meta: {meta}")
+    return meta
+
+def _parse_frontmatter_block(file_path) -> tuple:
+    """
+    Metadata-only parse of a page file: reads it only as far as its frontmatter block, plus as much
+    of the body as it takes to tell whether the body is empty. Returns (meta, offset, length) like
+    _parse_frontmatter_with_offsets; length is None when the body runs to the end of the file (the
+    loader strips it). Files without frontmatter, or with invalid YAML, are read completely.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        head = ""
+        chunk_size = FRONTMATTER_READ_CHUNK
+        while True:
+            chunk = f.read(chunk_size)
+            head += chunk
+            at_eof = len(chunk) < chunk_size
+            match = YAML_FRONTMATTER_REGEX.search(head)
+            # A match ending before the end of the text read is the match the whole file gives.
+            if at_eof or (match and match.end() < len(head)):
+                break
+            chunk_size *= 2
+        if at_eof:
+            return _parse_frontmatter_with_offsets(head)
+
+        meta = _load_frontmatter(match.group(1))
+        if meta is None:
+            return {}, 0, len(head + f.read())
+        rest = head[match.end():]
+        while not rest.strip():
+            rest = f.read(chunk_size)
+            if not rest:
+                return meta, match.end(), 0
+        return meta, match.end(), None
+
+def _parse_page_file(file_path, lazy_bodies: bool = False) -> tuple:
+    """
+    Stats, reads and parses one page file. Returns (stat_key, page_meta, md_content), where md_content
+    is a PageBodyRef into the file instead of the body itself if lazy_bodies is set.
+    The file is stat'ed before it is read, so a write racing with the parse makes the
+    recorded stat outdated (and the file re-parsed next time) rather than the other way round.
+    """
+    stat_key = _stat_key(file_path)
+    if lazy_bodies:
+        page_meta, body_offset, body_length = _parse_frontmatter_block(file_path)
+        return stat_key, page_meta, PageBodyRef(body_offset, body_length, stat_key)
+    page_meta, md_content = parse_frontmatter(Path(file_path).read_text(encoding='utf-8'))
+    return stat_key, page_meta, md_content
 
 def _generate_slug_from_path(relative_path: Path) -> str:
     """Generates a URL-friendly slug from a file path, removing sorting prefixes."""
@@ -84,39 +315,167 @@ def _generate_slug_from_path(relative_path: Path) -> str:
             cleaned_parts.append(part.lower())
     return "/".join(cleaned_parts)
 
-def build_page_cache(directory="user/pages"):
-    """Loads all Markdown pages from the filesystem into memory, building hierarchical slugs."""
+def _build_page_entry(md_file: Path, relative_dir_path: Path, final_cache_key_slug: str, page_meta: dict, md_content: str, mtime_ns: int = 0):
+    """
+    Builds the PAGE_CACHE entry (a core.page_record.PageRecord) for one parsed page.
+    Returns None if the page should be skipped: no content and neither a container nor a blog index.
+    """
+    is_container = page_meta.get('container', False)
+    is_blog_index = page_meta.get('blog', False)
+
+    if body_is_empty(md_content) and not is_container and not is_blog_index:
+        logger.debug(f"Skipping {md_file}: Markdown content is empty, and it's neither a container nor a blog index.")
+        return None
+
+    logger.debug(f"Processing page {md_file}: final_cache_key_slug='{final_cache_key_slug}'")
+
+    return PageRecord(
+        page=page_meta,
+        markdown_content=md_content,
+        file_path=str(md_file.resolve()),
+        file_mtime=mtime_ns / 1e9, # Modification time of the source file (for Last-Modified)
+        slug=final_cache_key_slug,
+        title=page_meta.get('title', final_cache_key_slug.split('/')[-1].replace('-', ' ').capitalize()),
+        path_parts=relative_dir_path.parts,
+        access_rules=compile_access_rules(page_meta.get('access')), # Evaluated by core.security
+    )
+
+def _stat_key(file_path) -> tuple:
+    """Returns the (mtime_ns, size) pair used to tell whether a page file changed."""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _read_and_parse_files(file_paths: list, lazy_bodies: bool = False) -> list:
+    """
+    Reads and parses a chunk of page files. Runs inside a build worker process.
+    Returns a list of (file_path, stat_key, page_meta, md_content, error) tuples.
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            stat_key, page_meta, md_content = _parse_page_file(file_path, lazy_bodies)
+            results.append((file_path, stat_key, page_meta, md_content, None))
+        except Exception as e:
+            results.append((file_path, None, None, None, str(e)))
+    return results
+
+def _get_build_worker_count(file_count: int) -> int:
+    """Returns the number of build processes to use, or 1 for a serial build."""
+    workers = PAGE_CACHE_BUILD_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or file_count < PAGE_CACHE_PARALLEL_THRESHOLD:
+        return 1
+    return min(workers, -(-file_count // PAGE_CACHE_BUILD_CHUNK_SIZE))
+
+def _parse_files_in_parallel(md_files: list, workers: int) -> dict:
+    """
+    Fans reading and frontmatter parsing of all page files out to a process pool.
+    Returns {md_file: (stat_key, page_meta, md_content)}; files that failed to parse are logged and left out.
+    """
+    chunks = [
+        [str(md_file) for md_file in md_files[i:i + PAGE_CACHE_BUILD_CHUNK_SIZE]]
+        for i in range(0, len(md_files), PAGE_CACHE_BUILD_CHUNK_SIZE)
+    ]
+    # 'spawn' keeps the pool independent of the threads (file watcher, server) running in this process.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return _merge_parse_results(md_files, pool.map(functools.partial(_read_and_parse_files, lazy_bodies=PAGE_BODIES_LAZY), chunks))
+
+def _merge_parse_results(md_files: list, chunk_results) -> dict:
+    files_by_path = {str(md_file): md_file for md_file in md_files}
+    parsed = {}
+    for results in chunk_results:
+        for file_path, stat_key, page_meta, md_content, error in results:
+            if error:
+                logger.error(f"Error during initial parsing of {file_path}: {error}")
+                continue
+            parsed[files_by_path[file_path]] = (stat_key, page_meta, md_content)
+    return parsed
+
+def _read_and_parse_all(md_files: list) -> dict:
+    """
+    Reads and YAML-parses every given page file exactly once, in a process pool for large trees.
+    Returns the intermediate table {md_file: (stat_key, page_meta, md_content)} used by the slug construction.
+    """
+    if not md_files:
+        return {}
+    workers = _get_build_worker_count(len(md_files))
+    if workers > 1:
+        logger.info(f"Parsing {len(md_files)} page files in parallel with {workers} worker processes...")
+        try:
+            return _parse_files_in_parallel(md_files, workers)
+        except Exception as e:
+            logger.warning(f"Parallel page parsing failed ({e}). Falling back to a serial build.")
+    return _merge_parse_results(md_files, [_read_and_parse_files([str(md_file) for md_file in md_files], PAGE_BODIES_LAZY)])
+
+def _reuse_parsed_files(md_files: list, reusable_files: dict) -> tuple:
+    """
+    Splits md_files into entries that can be taken over from a previous build's PAGE_FILES table
+    (same mtime and size, parsed in the current body mode) and files that have to be parsed again.
+    Returns ({md_file: (stat_key, page_meta, md_content)}, [md_files to parse]).
+    """
+    reused = {}
+    stale = []
+    for md_file in md_files:
+        previous = reusable_files.get(str(md_file.resolve()))
+        try:
+            stat_key = _stat_key(md_file)
+        except OSError:
+            stale.append(md_file)
+            continue
+        if previous is not None and previous[:2] == stat_key and isinstance(previous[3], PageBodyRef) == PAGE_BODIES_LAZY:
+            reused[md_file] = (stat_key, previous[2], previous[3])
+        else:
+            stale.append(md_file)
+    return reused, stale
+
+def build_page_cache(directory="user/pages", reusable_files: dict = None, accounts: dict = None):
+    """
+    Loads all Markdown pages from the filesystem into memory, building hierarchical slugs.
+    Each file is read and parsed exactly once (phase 1); the parsed results are held in an
+    intermediate table until all level slugs are known and the cache entries are built (phase 2).
+    Everything is built off to the side and published, together with the navigation and indexes
+    built for the new pages, in a single content snapshot swap.
+
+    :param reusable_files: A PAGE_FILES table of an earlier build (e.g. from a site snapshot).
+                           Files whose mtime and size still match are taken over without being read.
+    :param accounts: Freshly loaded user accounts (load_user_accounts) to publish in the same snapshot.
+    """
     pages_dir = os.environ.get('PAGES_DIR', directory)
     logger.debug(f"Attempting to build page cache from directory: {pages_dir}")
     base_dir = Path(pages_dir)
     if not base_dir.is_dir():
         logger.debug(f"Base directory not found: {base_dir}. Skipping page cache build.")
+        if accounts is not None:
+            publish_snapshot(accounts=accounts)
         return
 
     temp_cache = {}
+    temp_sources = {}
+    temp_files = {}
     path_to_slug_map = {} # Helper to map physical paths to their slugs for parent lookups
 
-    logger.info("Starting page cache build (Pass 1: Initial Parsing)...")
-    # First pass: Parse all files and store their individual slugs
+    logger.info("Starting page cache build (Phase 1: Reading and Parsing)...")
+    phase_started = time.perf_counter()
     all_md_files = sorted(list(base_dir.rglob('default.md')), key=lambda p: len(p.parts))
+    if reusable_files:
+        parsed_files, stale_files = _reuse_parsed_files(all_md_files, reusable_files)
+        logger.info(f"Reusing {len(parsed_files)} parsed page files, re-parsing {len(stale_files)} changed ones.")
+        parsed_files.update(_read_and_parse_all(stale_files))
+    else:
+        parsed_files = _read_and_parse_all(all_md_files)
 
-    for md_file in all_md_files:
-        try:
-            relative_dir_path = md_file.relative_to(base_dir).parent
-            file_content = md_file.read_text(encoding='utf-8')
-            page_meta, _ = parse_frontmatter(file_content)
-            
-            # Determine the slug for this specific level
-            level_slug = page_meta.get('slug', generate_clean_slug(relative_dir_path.name))
-            path_to_slug_map[relative_dir_path] = level_slug
-        except Exception as e:
-            logger.error(f"Error during initial parsing of {md_file}: {e}")
+    for md_file, (_, page_meta, _) in parsed_files.items():
+        relative_dir_path = md_file.relative_to(base_dir).parent
+        # Determine the slug for this specific level
+        path_to_slug_map[relative_dir_path] = page_meta.get('slug', generate_clean_slug(relative_dir_path.name))
+    parse_duration = time.perf_counter() - phase_started
 
-    logger.info("Starting page cache build (Pass 2: Hierarchical Slug Construction)...")
+    logger.info("Starting page cache build (Phase 2: Hierarchical Slug Construction)...")
+    phase_started = time.perf_counter()
     for md_file in all_md_files:
+        if md_file not in parsed_files:
+            continue
         try:
             logger.debug(f"Processing file: {md_file}")
-            absolute_file_path = str(md_file.resolve())
             relative_dir_path = md_file.relative_to(base_dir).parent
 
             if not relative_dir_path.parts:
@@ -138,39 +497,123 @@ def build_page_cache(directory="user/pages"):
             # CRITICAL: Ensure the final key is always lowercase for consistent lookups.
             final_cache_key_slug = "/".join(slug_parts).lower()
             
-            file_content = md_file.read_text(encoding='utf-8')
-            page_meta, md_content = parse_frontmatter(file_content)
-            
-            # A page should only be skipped if it has no content AND it's not a container or blog index.
-            is_container = page_meta.get('container', False)
-            is_blog_index = page_meta.get('blog', False)
-
-            if not md_content.strip() and not is_container and not is_blog_index:
-                logger.debug(f"Skipping {md_file}: Markdown content is empty, and it's neither a container nor a blog index.")
-                continue
-
-            logger.debug(f"Processing page {md_file}: final_cache_key_slug='{final_cache_key_slug}'")
-
-            flattened_page_meta = _flatten_dict_with_prefix(page_meta, prefix="_page")
-            
-            page_entry = {
-                "page": page_meta, 
-                "markdown_content": md_content,
-                "sort_key": relative_dir_path.parts[0], 
-                "file_path": absolute_file_path,
-                "slug": final_cache_key_slug,
-                "slug_path": f"{SITE_IDENTIFIKATOR}/{final_cache_key_slug.lstrip('/')}".lower(),
-                "title": page_meta.get('title', final_cache_key_slug.split('/')[-1].replace('-', ' ').capitalize()),
-                "path_parts": list(relative_dir_path.parts)
+            stat_key, page_meta, md_content = parsed_files[md_file]
+            page_entry = _build_page_entry(md_file, relative_dir_path, final_cache_key_slug, page_meta, md_content, stat_key[0])
+            source_path = str(md_file.resolve())
+            temp_files[source_path] = (*stat_key, page_meta, md_content)
+            temp_sources[source_path] = {
+                "slug": final_cache_key_slug if page_entry else None,
+                "level_slug": path_to_slug_map.get(relative_dir_path),
+                "relative_dir": relative_dir_path,
             }
-            page_entry.update(flattened_page_meta)
-            temp_cache[final_cache_key_slug] = page_entry
+            if page_entry is None:
+                continue
+            temp_cache[page_entry.slug] = page_entry # The interned slug is shared by the key and the record
             logger.debug(f"Cached page '{final_cache_key_slug}' from {md_file}.")
 
         except Exception as e:
-            logger.error(f"Error processing file {md_file} in second pass: {e}")
+            logger.error(f"Error processing file {md_file} in slug construction: {e}")
+    slug_duration = time.perf_counter() - phase_started
     
-    PAGE_CACHE.clear()
-    PAGE_CACHE.update(temp_cache)
-    logger.debug(f"Final PAGE_CACHE content: {PAGE_CACHE}")
-    logger.info(f"Page cache build complete. Cached {len(PAGE_CACHE)} pages.")
+    phase_started = time.perf_counter()
+    changes = {"pages": temp_cache, "page_sources": temp_sources, "page_files": temp_files}
+    if accounts is not None:
+        changes["accounts"] = accounts
+    snapshot = publish_snapshot(**changes)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Final PAGE_CACHE content: {dict(snapshot.pages)}")
+    logger.info(
+        f"Page cache build timings: read+parse {parse_duration:.3f}s for {len(all_md_files)} files, "
+        f"slug construction {slug_duration:.3f}s, navigation and indexes {time.perf_counter() - phase_started:.3f}s."
+    )
+    logger.info(f"Page cache build complete. Cached {len(snapshot.pages)} pages (generation {snapshot.version}).")
+    _notify_rebuild_listeners(None)
+
+def restore_page_cache(page_cache: dict, page_sources: dict, page_files: dict, navigation=None):
+    """
+    Publishes pages restored from a site snapshot as the current content, without touching the filesystem.
+    The caller is responsible for having verified that the snapshot matches the files on disk.
+    navigation, if given, must have been built over page_cache; otherwise it is built anew.
+    """
+    changes = {"pages": page_cache, "page_sources": page_sources, "page_files": page_files}
+    if navigation is not None:
+        changes["navigation"] = navigation
+    snapshot = publish_snapshot(**changes)
+    logger.info(f"Page cache restored from snapshot. {len(snapshot.pages)} pages (generation {snapshot.version}).")
+    _notify_rebuild_listeners(None)
+
+def update_page_cache(changed_paths, directory="user/pages"):
+    """
+    Patches PAGE_CACHE for a batch of changed filesystem paths, re-parsing only the affected files.
+    The patched pages are published as a new snapshot (copy-on-write), with the navigation and
+    indexes updated for the changed slugs.
+
+    Returns the set of changed slugs (possibly empty if no page was affected), or None when the
+    change cannot be applied incrementally and the caller must run a full build_page_cache():
+    a page was added or removed, a directory holding pages was created/removed/renamed,
+    or a frontmatter 'slug' override changed (which renames the whole subtree).
+    """
+    base_dir = Path(os.environ.get('PAGES_DIR', directory)).resolve()
+    with SNAPSHOT_WRITE_LOCK: # The patch must apply to the snapshot it was computed from
+        return _patch_page_cache(changed_paths, base_dir, get_current_snapshot())
+
+def _patch_page_cache(changed_paths, base_dir: Path, current):
+    page_sources = current.page_sources
+    if not page_sources:
+        return None
+
+    updated_entries = {}
+    updated_files = {}
+    for raw_path in changed_paths:
+        path = Path(raw_path).resolve()
+        if base_dir not in path.parents:
+            continue
+        path_str = str(path)
+
+        if path.name != 'default.md':
+            # Directory events only matter if pages live (or lived) underneath.
+            if (path.is_dir() and any(path.rglob('default.md'))) or any(src.startswith(path_str + os.sep) for src in page_sources):
+                logger.info(f"Structural change detected at {path}. Full rebuild required.")
+                return None
+            continue # Assets such as images are served directly and do not affect the cache
+
+        source = page_sources.get(path_str)
+        if source is None or not path.is_file():
+            logger.info(f"Page added or removed: {path}. Full rebuild required.")
+            return None
+
+        try:
+            stat_key, page_meta, md_content = _parse_page_file(path, PAGE_BODIES_LAZY)
+        except Exception as e:
+            logger.error(f"Error re-parsing {path}: {e}. Full rebuild required.")
+            return None
+
+        relative_dir_path = source["relative_dir"]
+        level_slug = page_meta.get('slug', generate_clean_slug(relative_dir_path.name))
+        if level_slug != source["level_slug"]:
+            logger.info(f"Slug override changed in {path}. Full rebuild required.")
+            return None
+
+        was_cached = source["slug"] is not None
+        page_entry = _build_page_entry(path, relative_dir_path, source["slug"] or "", page_meta, md_content, stat_key[0])
+        if (page_entry is not None) != was_cached:
+            logger.info(f"Page {path} changed between skipped and cached. Full rebuild required.")
+            return None
+        updated_files[path_str] = (*stat_key, page_meta, md_content)
+        if page_entry is not None:
+            updated_entries[source["slug"]] = page_entry
+
+    if not updated_entries:
+        if updated_files:
+            publish_snapshot(page_files={**current.page_files, **updated_files})
+        return set()
+
+    changed_slugs = set(updated_entries)
+    snapshot = publish_snapshot(
+        changed_slugs=changed_slugs,
+        pages={**current.pages, **updated_entries},
+        page_files={**current.page_files, **updated_files},
+    )
+    logger.info(f"Page cache patched incrementally for {len(changed_slugs)} page(s): {sorted(changed_slugs)} (generation {snapshot.version}).")
+    _notify_rebuild_listeners(changed_slugs)
+    return changed_slugs
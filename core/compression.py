@@ -0,0 +1,128 @@
+# core/compression.py - Precompressed Response Variants
+"""
+Helpers for serving content compressed once instead of on every response:
+- compress_variants() produces the gzip (and, if the optional 'brotli' package is installed,
+  brotli) variants of a body; the response cache stores them next to the raw bytes,
+- negotiate_encoding() picks the variant matching a request's Accept-Encoding header,
+- PrecompressedStaticFiles serves '.gz'/'.br' sidecar files of static assets
+  (produced at build time by utils/precompress_assets.py).
+"""
+import os
+import gzip
+import logging
+import mimetypes
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Preferred encodings first; brotli only when the library is available.
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Bodies smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 512
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9 # Responses are compressed once per content generation, so a high quality is affordable
+
+
+def compress(body: bytes, encoding: str, brotli_quality: int = BROTLI_QUALITY) -> bytes:
+    """Compresses body with the given content coding ('gzip' or 'br')."""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli:
+        return brotli.compress(body, quality=brotli_quality)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def compress_variants(body: bytes) -> dict:
+    """Returns {encoding: compressed body} for all supported encodings that actually make body smaller."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {}
+    for encoding in SUPPORTED_ENCODINGS:
+        compressed = compress(body, encoding)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+def negotiate_encoding(accept_encoding: str, available) -> str | None:
+    """
+    Picks the best of the available encodings acceptable according to an Accept-Encoding header.
+    Honors q-values (q=0 refuses an encoding) and '*'; on equal weight the order of
+    SUPPORTED_ENCODINGS decides. Returns None if the identity (uncompressed) body should be sent.
+    """
+    if not accept_encoding or not available:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding] = weight
+
+    best_encoding, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding not in available:
+            continue
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best_encoding, best_weight = encoding, weight
+    return best_encoding
+
+def variant_etag(etag: str, encoding: str | None) -> str:
+    """Derives the strong ETag of an encoded representation from the ETag of the identity body."""
+    if not encoding or not etag:
+        return etag
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that answers with a precompressed sidecar ('style.css.br', 'style.css.gz') when the
+    client accepts its encoding and the sidecar is not older than the original file.
+    Without an up-to-date sidecar the original file is served as usual.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        sidecars = {}
+        for encoding in SUPPORTED_ENCODINGS:
+            sidecar_path = f"{full_path}{SIDECAR_SUFFIXES[encoding]}"
+            try:
+                sidecar_stat = os.stat(sidecar_path)
+            except OSError:
+                continue
+            if sidecar_stat.st_mtime >= stat_result.st_mtime:
+                sidecars[encoding] = (sidecar_path, sidecar_stat)
+
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), sidecars)
+        if encoding is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            if sidecars:
+                response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        sidecar_path, sidecar_stat = sidecars[encoding]
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        response = FileResponse(
+            sidecar_path,
+            status_code=status_code,
+            stat_result=sidecar_stat,
+            media_type=media_type,
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
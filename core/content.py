@@ -1,126 +1,353 @@
 # core/content.py - Content Processing Logic
 import markdown
 import re
+import asyncio
 import logging
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
-from core.cache import PAGE_CACHE
-from core.plugins import MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS, CONTENT_PROCESSORS
+from config import RENDER_CACHE_MAX_ENTRIES, RENDER_EXECUTOR_WORKERS, MARKDOWN_PARSER_POOL_SIZE, MARKDOWN_PARSER_POOL_MAX_CONFIGS
+from core.cache import BoundedLRUCache, register_rebuild_listener
+from core.state import get_snapshot
+from core.plugins import MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS, CONTENT_PROCESSORS, HTML_TAG_HANDLERS
+from core.html_rewriter import rewrite_html
 
 logger = logging.getLogger(__name__)
 
+# --- Rendered Output Cache ---
+# Maps (page_key, content_generation) -> (page_meta, html_content).
+# A rebuild bumps the generation, so stale entries can never be hit; the listener below
+# additionally drops them right away to release the memory.
+RENDERED_PAGE_CACHE = BoundedLRUCache(RENDER_CACHE_MAX_ENTRIES)
 
-def _process_image_attributes(html_content: str) -> str:
+def _drop_rendered_page_cache(changed_slugs=None):
+    RENDERED_PAGE_CACHE.clear()
+    logger.debug("Rendered page cache dropped after page cache change.")
+
+register_rebuild_listener(_drop_rendered_page_cache)
+
+# --- Single-Flight Rendering ---
+# Maps render_key -> Future of the render currently running for it. Concurrent cache misses for the
+# same page and generation (e.g. a burst right after a reload) wait for that one render and share
+# its result instead of each running the Markdown pipeline.
+_IN_FLIGHT_RENDERS = {}
+_in_flight_lock = threading.Lock()
+RENDER_FLIGHT_STATS = {"renders": 0, "deduplicated": 0}
+
+def get_render_cache_stats() -> dict:
+    """Returns hit/miss counters and occupancy of the rendered page cache, including deduplicated renders."""
+    stats = RENDERED_PAGE_CACHE.stats()
+    with _in_flight_lock:
+        stats["renders"] = RENDER_FLIGHT_STATS["renders"]
+        stats["deduplicated_renders"] = RENDER_FLIGHT_STATS["deduplicated"]
+        stats["in_flight"] = len(_IN_FLIGHT_RENDERS)
+    stats["markdown_parsers"] = get_markdown_parser_pool_stats()
+    return stats
+
+# --- Render Executor ---
+# Bounded thread pool running the synchronous, CPU-heavy parts of a page view (Markdown pipeline,
+# template rendering) off the event loop. Threads share the caches above; the interpreter switches
+# between them regularly, so a long render no longer holds up small requests on the same worker.
+# Threads are started on first use, so a preloading master that never renders forks none.
+RENDER_EXECUTOR = ThreadPoolExecutor(max_workers=RENDER_EXECUTOR_WORKERS, thread_name_prefix="render") if RENDER_EXECUTOR_WORKERS > 0 else None
+
+async def run_in_render_executor(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) in the render executor and awaits its result (inline if the executor is disabled).
+    The call runs in a copy of the caller's context, so it sees the content snapshot pinned by the request.
+    """
+    if RENDER_EXECUTOR is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(RENDER_EXECUTOR, functools.partial(context.run, func, *args, **kwargs))
+
+def shutdown_render_executor():
+    """Stops the render executor; renders still queued are cancelled."""
+    if RENDER_EXECUTOR is not None:
+        RENDER_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+# --- Markdown Parser Pool ---
+# Building a markdown.Markdown instance sets up every extension (the emoji index, the plugins'
+# processors, ...), which used to happen on every render. Parsers are pooled per effective
+# configuration: the extension list and configs after the content processors ran (e.g. toc on or off,
+# with a given depth). A render checks a parser out for its exclusive use; it is reset before reuse.
+# Maps configuration key -> list of idle parsers, least recently used configuration first.
+_MARKDOWN_PARSER_POOL = OrderedDict()
+_parser_pool_lock = threading.Lock()
+MARKDOWN_PARSER_POOL_STATS = {"created": 0, "reused": 0}
+
+def _freeze_config(value):
+    """Turns an extension config value into a hashable equivalent (objects without value equality by identity)."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze_config(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_config(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze_config(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value).__qualname__, id(value))
+    return value
+
+def get_markdown_parser_key(extensions: list, extension_configs: dict) -> tuple:
+    """Returns the pool key of an effective Markdown configuration (extension instances count by identity)."""
+    return (tuple(extensions), _freeze_config(extension_configs))
+
+@contextmanager
+def pooled_markdown_parser(extensions: list, extension_configs: dict):
+    """
+    Checks out a Markdown parser for the given configuration (built if none is idle) and returns it
+    to the pool, reset, afterwards. A parser whose use raised is discarded instead.
+    """
+    key = get_markdown_parser_key(extensions, extension_configs)
+    with _parser_pool_lock:
+        idle_parsers = _MARKDOWN_PARSER_POOL.get(key)
+        md_parser = idle_parsers.pop() if idle_parsers else None
+        MARKDOWN_PARSER_POOL_STATS["reused" if md_parser else "created"] += 1
+    if md_parser is None:
+        md_parser = markdown.Markdown(extensions=extensions, extension_configs=extension_configs)
+
+    yield md_parser
+
+    md_parser.reset()
+    with _parser_pool_lock:
+        idle_parsers = _MARKDOWN_PARSER_POOL.setdefault(key, [])
+        _MARKDOWN_PARSER_POOL.move_to_end(key)
+        if len(idle_parsers) < MARKDOWN_PARSER_POOL_SIZE:
+            idle_parsers.append(md_parser)
+        while len(_MARKDOWN_PARSER_POOL) > MARKDOWN_PARSER_POOL_MAX_CONFIGS:
+            _MARKDOWN_PARSER_POOL.popitem(last=False)
+
+def get_markdown_parser_pool_stats() -> dict:
+    """Returns how many parsers were built and reused, and the pool occupancy."""
+    with _parser_pool_lock:
+        return {
+            **MARKDOWN_PARSER_POOL_STATS,
+            "configurations": len(_MARKDOWN_PARSER_POOL),
+            "idle": sum(len(idle_parsers) for idle_parsers in _MARKDOWN_PARSER_POOL.values()),
+        }
+
+
+# --- Image Tag Rewriting ---
+# First src=" of an <img> that is neither absolute nor a URL
+_IMG_RELATIVE_SRC_REGEX = re.compile(r'src="(?!/)(?!https?://)')
+# <img ... src="path?query" ... >
+# Group 1: (<img[^>]*?src=")
+# Group 2: ([^" ]+?\?[^" ]*?) -> The full src content with query (e.g. /path/to/img.jpg?resize=200&align=center)
+# Group 3: (") -> The closing quote of the src attribute
+# Group 4: (.*?) -> The remainder of the tag before the closing marker (e.g., ' alt=".."')
+# Group 5: (\s*/?>) -> The closing marker (e.g., ' />' or '>')
+_IMG_QUERY_SRC_REGEX = re.compile(r'(<img[^>]*?src=")([^" ]+?\?[^" ]*?)(")(.*?)(\s*/?>)')
+_IMG_CLASS_REGEX = re.compile(r' class=["\']([^"\']*)["\']')
+_IMG_CLASS_ATTR_REGEX = re.compile(r'\s*class=["\'][^"\']*?["\']')
+_IMG_SIZE_ATTR_REGEX = re.compile(r'\s*(?:width|height)=["\'][^"\']*?["\']')
+_WHITESPACE_REGEX = re.compile(r'\s+')
+_TAG_CLOSER_REGEX = re.compile(r'(\s*/?>)$')
+
+
+def _add_image_attributes(match) -> str:
     """
-    Finds image tags containing URL parameters and rewrites them to add HTML attributes 
-    (width, height) and CSS classes (align).
-    
+    Rewrites one image tag with URL parameters to HTML attributes (width, height)
+    and CSS classes (align).
+
     Supported parameters:
     - ?width=XXX: Adds width="XXX" and height="auto".
     - &align=center|left|right: Adds class="align-center|left|right".
     """
-    def _add_attributes(match):
-        img_tag_start = match.group(1) # <img alt="..." src="
-        full_url = match.group(2) # The full image URL with query string
-        
-        # 1. Parse URL to get parameters and clean URL
-        
-        # Markdown parser escapoval ampersand (&) na &amp;
-        unescaped_url = full_url.replace('&amp;', '&')
+    img_tag_start = match.group(1) # <img alt="..." src="
+    full_url = match.group(2) # The full image URL with query string
 
-        url_parts = urlparse(unescaped_url)
-        query_params = parse_qs(url_parts.query)
-        
-        # Clean URL is path only, including scheme/netloc if present
-        clean_url = url_parts.path
-        if url_parts.scheme and url_parts.netloc:
-             clean_url = url_parts.scheme + '://' + url_parts.netloc + url_parts.path
-
-        # 2. Collect attributes and classes
-        new_attributes = ""
-        new_classes = ""
-
-        # --- Handle width/resize ---
-        # The 'width' parameter is used to explicitly set the width of the image element.
-        if 'width' in query_params:
-            width = query_params['width'][0]
-            new_attributes += f' width="{width}" height="auto"'
-        
-        # --- Handle align ---
-        if 'align' in query_params:
-            align_value = query_params['align'][0].lower()
-            if align_value in ['center', 'left', 'right']:
-                new_classes += f' align-{align_value}'
-        
-        # 3. Reconstruct the tag
-        # Group 3: " (closing quote of src)
-        tag_end_quote = match.group(3) 
-        tag_remainder = match.group(4) # e.g. alt="..."
-        tag_closer = match.group(5) # e.g. /> or >
-        
-        # A) Handle classes (merge new_classes with existing class attribute)
-        final_classes = new_classes.strip()
-        tag_remainder_cleaned = tag_remainder
+    # 1. Parse URL to get parameters and clean URL
 
-        # Zkontrolujeme, zda v remaining atributech již existuje class
-        # Musíme použít un-greedy match pro class="..."
-        class_match = re.search(r' class=["\']([^"\']*)["\']', tag_remainder)
-        
-        if class_match:
-            # Připojíme k existující třídě a odstraníme starý atribut class z tag_remainder
-            existing_classes = class_match.group(1)
-            final_classes = (existing_classes + ' ' + final_classes).strip()
-            # Odstranění starého atributu class z tag_remainder_cleaned
-            tag_remainder_cleaned = re.sub(r'\s*class=["\'][^"\']*?["\']', '', tag_remainder_cleaned, 1)
-
-        # B) Odstranění potenciálně duplicitních width/height z tag_remainder, 
-        # pokud tam náhodou byly už od Markdown parseru
-        tag_remainder_cleaned = re.sub(r'\s*width=["\'][^"\']*?["\']', '', tag_remainder_cleaned)
-        tag_remainder_cleaned = re.sub(r'\s*height=["\'][^"\']*?["\']', '', tag_remainder_cleaned)
-
-        # C) Vytvoření finálního atributu class (pokud existuje)
-        final_class_attr = f' class="{final_classes}"' if final_classes else ''
-        
-        # D) Kombinace nových atributů pro injekci
-        injection = new_attributes.strip()
-        if injection and final_class_attr:
-            injection += " " + final_class_attr.strip()
-        elif final_class_attr:
-            injection = final_class_attr.strip()
-
-        # E) Final construction: 
-        # [start of tag] + [clean src] + [closing src quote] + [new attributes] + [existing attributes] + [closer]
-        final_tag = f'{img_tag_start}{clean_url}{tag_end_quote} {injection} {tag_remainder_cleaned} {tag_closer}'
-        
-        # F) Cleanup: Odstranění nadbytečných mezer, standardizace na non-self closing tag
-        final_tag = re.sub(r'\s+', ' ', final_tag).strip()
-        # Odstranění potenciálního '/>' a nahrazení '>' pro non-self closing, aby šel správně aplikovat float/margin
-        final_tag = re.sub(r'(\s*/?>)$', '>', final_tag)
-        
-        return final_tag
+    # Markdown parser escapoval ampersand (&) na &amp;
+    unescaped_url = full_url.replace('&amp;', '&')
+
+    url_parts = urlparse(unescaped_url)
+    query_params = parse_qs(url_parts.query)
+
+    # Clean URL is path only, including scheme/netloc if present
+    clean_url = url_parts.path
+    if url_parts.scheme and url_parts.netloc:
+         clean_url = url_parts.scheme + '://' + url_parts.netloc + url_parts.path
+
+    # 2. Collect attributes and classes
+    new_attributes = ""
+    new_classes = ""
 
+    # --- Handle width/resize ---
+    # The 'width' parameter is used to explicitly set the width of the image element.
+    if 'width' in query_params:
+        width = query_params['width'][0]
+        new_attributes += f' width="{width}" height="auto"'
 
+    # --- Handle align ---
+    if 'align' in query_params:
+        align_value = query_params['align'][0].lower()
+        if align_value in ['center', 'left', 'right']:
+            new_classes += f' align-{align_value}'
 
-    # Regex to find <img ... src="path?query" ... >
-    # Group 1: (<img[^>]*?src=")
-    # Group 2: ([^" ]+?\?[^" ]*?) -> The full src content with query (e.g. /path/to/img.jpg?resize=200&align=center)
-    # Group 3: (") -> The closing quote of the src attribute
-    # Group 4: (.*?) -> The remainder of the tag before the closing marker (e.g., ' alt=".."')
-    # Group 5: (\s*/?>) -> The closing marker (e.g., ' />' or '>')
-    return re.sub(r'(<img[^>]*?src=")([^" ]+?\?[^" ]*?)(")(.*?)(\s*/?>)', _add_attributes, html_content)
+    # 3. Reconstruct the tag
+    # Group 3: " (closing quote of src)
+    tag_end_quote = match.group(3)
+    tag_remainder = match.group(4) # e.g. alt="..."
+    tag_closer = match.group(5) # e.g. /> or >
+
+    # A) Handle classes (merge new_classes with existing class attribute)
+    final_classes = new_classes.strip()
+    tag_remainder_cleaned = tag_remainder
+
+    # Zkontrolujeme, zda v remaining atributech již existuje class
+    # Musíme použít un-greedy match pro class="..."
+    class_match = _IMG_CLASS_REGEX.search(tag_remainder)
+
+    if class_match:
+        # Připojíme k existující třídě a odstraníme starý atribut class z tag_remainder
+        existing_classes = class_match.group(1)
+        final_classes = (existing_classes + ' ' + final_classes).strip()
+        # Odstranění starého atributu class z tag_remainder_cleaned
+        tag_remainder_cleaned = _IMG_CLASS_ATTR_REGEX.sub('', tag_remainder_cleaned, 1)
+
+    # B) Odstranění potenciálně duplicitních width/height z tag_remainder,
+    # pokud tam náhodou byly už od Markdown parseru
+    tag_remainder_cleaned = _IMG_SIZE_ATTR_REGEX.sub('', tag_remainder_cleaned)
+
+    # C) Vytvoření finálního atributu class (pokud existuje)
+    final_class_attr = f' class="{final_classes}"' if final_classes else ''
+
+    # D) Kombinace nových atributů pro injekci
+    injection = new_attributes.strip()
+    if injection and final_class_attr:
+        injection += " " + final_class_attr.strip()
+    elif final_class_attr:
+        injection = final_class_attr.strip()
+
+    # E) Final construction:
+    # [start of tag] + [clean src] + [closing src quote] + [new attributes] + [existing attributes] + [closer]
+    final_tag = f'{img_tag_start}{clean_url}{tag_end_quote} {injection} {tag_remainder_cleaned} {tag_closer}'
+
+    # F) Cleanup: Odstranění nadbytečných mezer, standardizace na non-self closing tag
+    final_tag = _WHITESPACE_REGEX.sub(' ', final_tag).strip()
+    # Odstranění potenciálního '/>' a nahrazení '>' pro non-self closing, aby šel správně aplikovat float/margin
+    final_tag = _TAG_CLOSER_REGEX.sub('>', final_tag)
+
+    return final_tag
+
+
+def _rewrite_image_tag(tag: str, context) -> str:
+    """
+    HTML rewriter handler for <img> tags of a page (see core.html_rewriter), run only when
+    the page has an image directory (context.options['base_image_path']):
+    1. relative src is prefixed with the page directory,
+    2. ?width/&align parameters become attributes and classes,
+    3. the tag is made non-self closing (for CSS alignment compatibility).
+    """
+    base_image_path = context.options.get("base_image_path")
+    if base_image_path is None:
+        return None
+    tag = _IMG_RELATIVE_SRC_REGEX.sub(lambda _: f'src="{base_image_path}/', tag, 1)
+    tag = _IMG_QUERY_SRC_REGEX.sub(_add_image_attributes, tag, 1)
+    if tag.endswith("/>"):
+        tag = tag[:-2].rstrip() + ">"
+    return tag
+
+
+def _process_image_attributes(html_content: str) -> str:
+    """
+    Finds image tags containing URL parameters and rewrites them to add HTML attributes
+    (width, height) and CSS classes (align). See _add_image_attributes.
+    """
+    return rewrite_html(html_content, [("img", lambda tag, context: _IMG_QUERY_SRC_REGEX.sub(_add_image_attributes, tag, 1))])
+
+
+# Handlers core adds to the rewrite of every page, after those of plugins
+CORE_HTML_TAG_HANDLERS = [("img", _rewrite_image_tag)]
 
 
 def get_page_data(page_path: str):
-    """Retrieves page data from the cache and converts its Markdown content to HTML."""
+    """
+    Retrieves page data from the cache and converts its Markdown content to HTML.
+    The rendered result is memoized per content generation, so repeated views of an
+    unchanged page skip the Markdown pipeline entirely.
+    """
     logger.debug(f"get_page_data: Attempting to retrieve page data for path='{page_path}'")
     page_key = page_path.lower()
-    cached_data = PAGE_CACHE.get(page_key)
+    # The page and the generation come from the same snapshot, so a render is always stored
+    # under the generation of the content it was made from.
+    snapshot = get_snapshot()
+    generation = snapshot.version
+    cached_data = snapshot.pages.get(page_key)
     if not cached_data:
         logger.debug(f"get_page_data: No cached data found for page_key='{page_key}'. Returning None.")
         return None
 
+    render_key = (page_key, generation)
+    rendered = RENDERED_PAGE_CACHE.get(render_key)
+    if rendered is None:
+        rendered = _render_single_flight(render_key, page_key, cached_data)
+        if rendered is None:
+            return None
+    else:
+        logger.debug(f"get_page_data: Rendered cache hit for page_key='{page_key}' (generation {generation}).")
+
+    page_meta, html_content = rendered
+    # Callers add request-specific keys (slug, breadcrumbs) to 'page', so hand out a copy.
+    return {
+        "page": dict(page_meta),
+        "content": html_content,
+        "sort_key": cached_data.get("sort_key"),
+        "file_path": cached_data.get("file_path")
+    }
+
+
+def _render_single_flight(render_key: tuple, page_key: str, cached_data: dict):
+    """
+    Renders a page and stores the result in RENDERED_PAGE_CACHE, unless the same render_key is
+    already being rendered by another thread; then waits for that render and returns its result.
+    """
+    with _in_flight_lock:
+        future = _IN_FLIGHT_RENDERS.get(render_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _IN_FLIGHT_RENDERS[render_key] = future
+            RENDER_FLIGHT_STATS["renders"] += 1
+        else:
+            RENDER_FLIGHT_STATS["deduplicated"] += 1
+
+    if not is_leader:
+        logger.debug(f"get_page_data: Waiting for the in-flight render of '{page_key}' (generation {render_key[1]}).")
+        return future.result()
+
+    try:
+        rendered = _render_page(page_key, cached_data)
+        if rendered is not None:
+            # Stored before the flight ends, so later requests hit the cache instead of starting a new render.
+            RENDERED_PAGE_CACHE.put(render_key, rendered)
+        future.set_result(rendered)
+        return rendered
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _IN_FLIGHT_RENDERS.pop(render_key, None)
+
+
+def _render_page(page_key: str, cached_data: dict):
+    """
+    Runs the content processors and the Markdown pipeline for one cached page.
+    Returns a (page_meta, html_content) tuple, or None if rendering failed.
+    """
     md_content = cached_data.get("markdown_content", "")
-    page_meta = cached_data.get("page", {})
+    # Processors may annotate the meta (e.g. toc_class); keep PAGE_CACHE itself untouched.
+    page_meta = dict(cached_data.get("page", {}))
 
     # Make copies to avoid modifying the global configs
     page_extensions = MARKDOWN_EXTENSIONS[:]
@@ -138,39 +365,26 @@ def get_page_data(page_path: str):
 
     if not md_content:
         logger.warning(f"get_page_data: Markdown content is empty for page_key='{page_key}'. Returning empty HTML.")
-        return {"page": page_meta, "content": "", "sort_key": cached_data.get("sort_key"), "file_path": cached_data.get("file_path")}
+        return page_meta, ""
 
     try:
-        md_parser = markdown.Markdown(extensions=page_extensions, extension_configs=page_extension_configs)
-        html_content = md_parser.convert(md_content)
+        with pooled_markdown_parser(page_extensions, page_extension_configs) as md_parser:
+            html_content = md_parser.convert(md_content)
         logger.debug(f"get_page_data: Markdown content converted to HTML for page_key='{page_key}'.")
         
+        # Images are rewritten only for pages with a directory to resolve relative src against
+        base_image_path = None
         file_path = Path(cached_data.get("file_path", ""))
         if file_path.exists():
             base_dir = Path("user/pages").resolve()
             full_relative_path = file_path.relative_to(base_dir).parent
             base_image_path = f"/user/pages/{full_relative_path}"
+
+        # --- Single-pass HTML post-processing (plugin handlers, then core image handling) ---
+        html_content = rewrite_html(html_content, HTML_TAG_HANDLERS + CORE_HTML_TAG_HANDLERS, base_image_path=base_image_path)
             
-            # 1. Fix relative paths for all local images.
-            # This regex ensures we only prepend the base path if the src does not start with a slash or protocol.
-            html_content = re.sub(r'(<img[^>]*?src=")(?!/)(?!https?://)', rf'\1{base_image_path}/', html_content)
-
-            # 2. Call the dedicated function to handle image tag attributes (resize, align)
-            html_content = _process_image_attributes(html_content)
-
-            # 3. Global normalization: Ensure all <img> are non-self closing (for CSS alignment compatibility)
-            # Replaces <img ... /> with <img ... >
-            html_content = re.sub(r'(<img[^>]*?)\s*/>', r'\1>', html_content)
-
-        # Prepare the data to be returned
-        return_data = {
-            "page": page_meta,
-            "content": html_content,
-            "sort_key": cached_data.get("sort_key"),
-            "file_path": cached_data.get("file_path")
-        }
         logger.debug(f"get_page_data: Successfully prepared data for page_key='{page_key}'.")
-        return return_data
+        return page_meta, html_content
     except Exception as e:
         logger.error(f"get_page_data: Error processing Markdown or adjusting image paths for page_key='{page_key}': {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
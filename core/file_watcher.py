@@ -1,55 +1,173 @@
 import time
 import logging
 import os
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from config import WATCHER_QUIET_PERIOD, WATCHER_MAX_LATENCY
 
 logger = logging.getLogger(__name__)
 
-class ContentChangeHandler(FileSystemEventHandler):
-    """A handler for filesystem events that triggers a content reload."""
+# The scheduler of the running watcher, kept so its metrics can be inspected and it can be stopped.
+_reload_scheduler = None
 
-    def __init__(self, reload_callback):
-        super().__init__()
+
+class ReloadScheduler:
+    """
+    Coalesces changed paths into batches and runs the reload callback on a dedicated worker thread.
+
+    This is a trailing-edge debounce: a reload fires only after no new event arrived for
+    `quiet_period` seconds, so a `git pull` or rsync of many files results in a single reload
+    that sees the final state. To keep a steady stream of events from postponing the reload
+    forever, a batch is flushed at the latest `max_latency` seconds after its first event.
+    Events arriving while a reload runs are collected into the next batch.
+    """
+
+    def __init__(self, reload_callback, quiet_period: float = WATCHER_QUIET_PERIOD, max_latency: float = WATCHER_MAX_LATENCY):
         self.reload_callback = reload_callback
-        self._debounce_time = 1.0  # 1 second
-        self._last_event_time = 0
+        self.quiet_period = quiet_period
+        self.max_latency = max(max_latency, quiet_period)
+        self._condition = threading.Condition()
+        self._pending_paths = set()
+        self._first_event_time = None
+        self._last_event_time = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="content-reload-worker", daemon=True)
+        self.metrics = {
+            "reloads": 0,
+            "failed_reloads": 0,
+            "paths_reloaded": 0,
+            "last_batch_size": 0,
+            "last_duration": None,
+            "max_duration": 0.0,
+            "total_duration": 0.0,
+            "last_reload_at": None,
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, paths):
+        """Adds changed paths to the pending batch. Never blocks the caller for longer than a lock acquisition."""
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending_paths:
+                self._first_event_time = now
+            self._pending_paths.update(paths)
+            self._last_event_time = now
+            self._condition.notify()
+
+    def stop(self, timeout: float = None):
+        """Stops the worker thread after flushing any pending batch."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def get_metrics(self) -> dict:
+        """Returns a copy of the reload metrics (durations in seconds)."""
+        with self._condition:
+            metrics = dict(self.metrics)
+            metrics["pending_paths"] = len(self._pending_paths)
+        metrics["average_duration"] = round(metrics["total_duration"] / metrics["reloads"], 4) if metrics["reloads"] else None
+        return metrics
+
+    def _wait_for_batch(self):
+        """Blocks until a batch is due (or the scheduler stops) and returns it."""
+        with self._condition:
+            while not self._pending_paths and not self._stopped:
+                self._condition.wait()
+            while self._pending_paths and not self._stopped:
+                now = time.monotonic()
+                deadline = min(self._last_event_time + self.quiet_period, self._first_event_time + self.max_latency)
+                if now >= deadline:
+                    break
+                self._condition.wait(deadline - now)
+            batch, self._pending_paths = self._pending_paths, set()
+            self._first_event_time = self._last_event_time = None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._wait_for_batch()
+            if batch:
+                self._reload(batch)
+            elif self._stopped:
+                return
+
+    def _reload(self, batch):
+        logger.debug(f"[File Watcher] Quiet window elapsed. Triggering content reload for {len(batch)} path(s).")
+        started = time.perf_counter()
+        failed = False
+        try:
+            self.reload_callback(batch)
+        except Exception as e:
+            failed = True
+            logger.error(f"[File Watcher] Content reload failed: {e}", exc_info=True)
+        duration = time.perf_counter() - started
 
-    def _should_trigger(self):
-        """Debounce events to avoid rapid reloads."""
-        current_time = time.time()
-        if (current_time - self._last_event_time) > self._debounce_time:
-            self._last_event_time = current_time
-            return True
-        return False
+        with self._condition:
+            self.metrics["reloads"] += 1
+            self.metrics["failed_reloads"] += int(failed)
+            self.metrics["paths_reloaded"] += len(batch)
+            self.metrics["last_batch_size"] = len(batch)
+            self.metrics["last_duration"] = round(duration, 4)
+            self.metrics["max_duration"] = round(max(self.metrics["max_duration"], duration), 4)
+            self.metrics["total_duration"] += duration
+            self.metrics["last_reload_at"] = time.time()
+        logger.info(f"[File Watcher] Content reload of {len(batch)} path(s) took {duration:.3f}s.")
+
+
+class ContentChangeHandler(FileSystemEventHandler):
+    """A handler for filesystem events that schedules a content reload."""
+
+    # Events that do not change anything on disk (watchdog emits them for plain reads).
+    IGNORED_EVENT_TYPES = {'opened', 'closed_no_write'}
+
+    def __init__(self, schedule_callback):
+        super().__init__()
+        self.schedule_callback = schedule_callback
 
     def on_any_event(self, event):
         """
-        Catches all events and triggers a reload if it's a relevant change.
-        - Ignores directory events (we only care about file changes).
+        Catches all events and passes relevant changed paths to the scheduler.
+        - Ignores directory 'modified' events (they just echo changes of the files inside),
+          but keeps directory creation/deletion/moves, which change the page structure.
         - Ignores events from hidden files/directories (like .git, __pycache__).
+        Runs on watchdog's dispatch thread, so it only records paths and returns immediately.
         """
-        if event.is_directory:
+        if event.event_type in self.IGNORED_EVENT_TYPES:
+            return
+        if event.is_directory and event.event_type == 'modified':
             return
-        
+
         # Ignore hidden files and common temporary files
         path_part = event.src_path.split(os.sep)
         if any(part.startswith('.') for part in path_part) or event.src_path.endswith('~'):
             return
 
-        if self._should_trigger():
-            logger.debug(f"[File Watcher] Change detected: {event.event_type} on {event.src_path}. Triggering content reload.")
-            self.reload_callback()
+        changed_paths = {event.src_path}
+        dest_path = getattr(event, 'dest_path', '')
+        if dest_path:
+            changed_paths.add(dest_path)
+
+        logger.debug(f"[File Watcher] Change detected: {event.event_type} on {event.src_path}.")
+        self.schedule_callback(changed_paths)
 
 def start_watcher(paths_to_watch, reload_callback):
     """
     Initializes and starts the filesystem observer in a background thread.
-    
+
     :param paths_to_watch: A list of directory/file paths to monitor.
-    :param reload_callback: The function to call when a change is detected.
+    :param reload_callback: The function to call when a change is detected. It receives the set of
+                            changed paths and runs on the reload worker thread, once per quiet window.
     :return: The observer instance.
     """
-    event_handler = ContentChangeHandler(reload_callback)
+    global _reload_scheduler
+    _reload_scheduler = ReloadScheduler(reload_callback).start()
+    event_handler = ContentChangeHandler(_reload_scheduler.submit)
     observer = Observer()
     for path in paths_to_watch:
         if os.path.exists(path):
@@ -57,7 +175,19 @@ def start_watcher(paths_to_watch, reload_callback):
             logger.info(f"Watching for changes in: {path}")
         else:
             logger.warning(f"Path not found, not watching: {path}")
-            
+
     observer.start()
     logger.info("File watcher started in background thread.")
     return observer
+
+def stop_watcher(observer):
+    """Stops the filesystem observer and the reload worker thread."""
+    if observer:
+        observer.stop()
+        observer.join()
+    if _reload_scheduler:
+        _reload_scheduler.stop()
+
+def get_reload_metrics() -> dict:
+    """Returns the reload metrics of the running watcher, or an empty dict if it is not running."""
+    return _reload_scheduler.get_metrics() if _reload_scheduler else {}
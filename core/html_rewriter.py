@@ -0,0 +1,126 @@
+# core/html_rewriter.py - Single-Pass HTML Post-Processing
+"""
+Streaming rewriter of rendered page HTML.
+
+Post-processing used to be a chain of full-document regular expressions: the alerts and notices
+plugins each ran one as a Markdown postprocessor, and core then ran three more for images (relative
+src, ?width/&align attributes, self-closing normalization). Every installed rewriter meant another
+scan and another copy of the whole page.
+
+Here the HTML is tokenized once. A single pattern matches only the tags some handler is registered
+for, and each match is dispatched to the handlers of its tag name, so the cost stays one pass no
+matter how many rewriters are installed. Handlers are plain functions:
+
+    handler(tag: str, context: RewriteContext) -> str | None
+
+`tag` is the raw start tag (e.g. '<img alt="x" src="a.png" />'), as returned by the previous
+handler of the same tag name. Returning a string replaces it, None keeps it. Through the context a
+handler can look at the text right after the tag, drop a prefix of it and replace the element's end
+tag, which is all a paragraph-to-<div> rewrite such as the alerts plugin needs. Tag names are
+matched case-sensitively, as Markdown emits them (lower case).
+"""
+import re
+import functools
+
+# --- Tokenizer ---
+@functools.lru_cache(maxsize=32)
+def _compile_tag_pattern(tag_names: tuple):
+    """One pattern for start and end tags of all handled tag names (e.g. <img ...>, <p>, </p>)."""
+    names = "|".join(re.escape(name) for name in tag_names)
+    return re.compile(rf'<(/?)({names})(?=[\s/>])[^>]*>')
+
+
+class RewriteContext:
+    """State of one rewrite, passed to handlers together with the tag they handle."""
+
+    __slots__ = ('html', 'options', 'tag_name', 'position', '_pending_end_tags', '_output')
+
+    def __init__(self, html: str, options: dict, output: list):
+        self.html = html
+        self.options = options   # per-render values, e.g. base_image_path
+        self.tag_name = None     # name of the tag being handled
+        self.position = 0        # index in html right after the tag being handled
+        self._pending_end_tags = {}
+        self._output = output
+
+    def match(self, pattern):
+        """Matches a compiled pattern against the text right after the current tag (nothing is consumed)."""
+        return pattern.match(self.html, self.position)
+
+    def skip_to(self, index: int):
+        """Drops the source text between the current tag and index from the output."""
+        self.position = max(self.position, index)
+
+    def replace_end_tag(self, replacement: str, strip_content: bool = False) -> bool:
+        """
+        Replaces the next end tag of the current tag name (e.g. the </p> closing a paragraph) with
+        replacement. With strip_content, trailing whitespace of the element's content is dropped too.
+        Returns False, scheduling nothing, when the document has no such end tag.
+        """
+        if self.html.find(f'</{self.tag_name}>', self.position) == -1:
+            return False
+        self._pending_end_tags.setdefault(self.tag_name, []).append(
+            (replacement, len(self._output) + 1 if strip_content else None) # +1: after the start tag
+        )
+        return True
+
+    def _close(self, tag_name: str, end_tag: str) -> str:
+        pending = self._pending_end_tags.get(tag_name)
+        if not pending:
+            return end_tag
+        replacement, content_start = pending.pop()
+        if content_start is not None:
+            _rstrip_output(self._output, content_start)
+        return replacement
+
+
+def _rstrip_output(output: list, start: int):
+    """Strips trailing whitespace of the text emitted since output[start]."""
+    while len(output) > start:
+        stripped = output[-1].rstrip()
+        if stripped:
+            output[-1] = stripped
+            return
+        output.pop()
+
+
+# --- Rewriting ---
+def rewrite_html(html: str, handlers: list, **options) -> str:
+    """
+    Rewrites html in one pass with handlers, a list of (tag_name, handler) pairs. Handlers of the same
+    tag name run in list order, each receiving the tag returned by the previous one. Keyword arguments
+    are available to handlers as context.options.
+    """
+    handlers_by_tag = {}
+    for tag_name, handler in handlers:
+        handlers_by_tag.setdefault(tag_name, []).append(handler)
+    if not html or not handlers_by_tag:
+        return html
+
+    output = []
+    append = output.append
+    context = RewriteContext(html, options, output)
+    pending_end_tags = context._pending_end_tags
+    last_end = 0
+    for match in _compile_tag_pattern(tuple(sorted(handlers_by_tag))).finditer(html):
+        start, end = match.span()
+        if start < last_end: # inside text a handler has skipped
+            continue
+        append(html[last_end:start])
+        last_end = end
+        tag, is_end_tag, tag_name = match.group(0, 1, 2)
+
+        if is_end_tag:
+            append(context._close(tag_name, tag) if pending_end_tags.get(tag_name) else tag)
+            continue
+
+        context.tag_name, context.position = tag_name, end
+        for handler in handlers_by_tag[tag_name]:
+            rewritten = handler(tag, context)
+            if rewritten is not None:
+                tag = rewritten
+        append(tag)
+        last_end = context.position
+
+    append(html[last_end:])
+    return "".join(output)
@@ -6,6 +6,8 @@ import logging
 import json
 import re
 from config import SITE_IDENTIFIKATOR
+from core.security import get_permission_fingerprint, get_page_access_by_spec_rules
+from core.state import register_navigation_builder
 from core.utils import generate_clean_slug, render_html_list, remove_diacritics # Import new utility functions
 
 # Get a logger instance for this module.
@@ -19,30 +21,45 @@ class NavigationBuilder:
     """
     Builds and manages hierarchical navigation structures from a flat page cache.
     """
-    def __init__(self, page_cache, access_checker):
+    def __init__(self, page_cache, access_checker, prebuilt_state: dict = None):
         """
         Initializes the NavigationBuilder.
         Args:
             page_cache (dict): The global PAGE_CACHE containing all page data.
             access_checker (function): A reference to the get_page_access_by_spec_rules function from main.py.
                                        This is a key dependency for checking permissions.
+            prebuilt_state (dict): Optional result of get_state() of a builder over the very same pages
+                                   (e.g. restored from a site snapshot). It is used instead of building the tree.
         """
         self.page_cache = page_cache
         self.access_checker = access_checker
         self.site_identifier = SITE_IDENTIFIKATOR # Store the site identifier
         self.parent_to_children_map = {} # OPTIMIZATION: Direct lookup map
+        # Memoized navigation output keyed by permission fingerprint. The result only depends on
+        # the tree (fixed for the lifetime of this builder) and the user's access set.
+        self._menu_cache = {}
+        self._search_tree_cache = {}
         # IMPORTANT! The tree is built only once upon initialization.
         # This is efficient as it avoids rebuilding the entire structure on every request.
         # The tree is rebuilt only when the application reloads its content.
-        self.tree = self._build_tree()
+        if prebuilt_state is not None:
+            self.tree = prebuilt_state['tree']
+            self.parent_to_children_map = prebuilt_state['parent_to_children_map']
+        else:
+            self.tree = self._build_tree()
+
+    def get_state(self) -> dict:
+        """Returns the built structures (tree and parent-to-children map), e.g. for persisting them in a site snapshot."""
+        return {'tree': self.tree, 'parent_to_children_map': self.parent_to_children_map}
 
     def _build_tree(self):
         """
         Constructs a hierarchical tree and a parent-to-children map from the flat PAGE_CACHE.
         """
         tree = {self.site_identifier: {'__meta__': {}, '__children__': {}}}
-        # Reset the map each time the tree is built
+        # Reset the map (and anything memoized from the old tree) each time the tree is built
         self.parent_to_children_map = {self.site_identifier: []}
+        self.invalidate_cache()
 
         sorted_pages = sorted(self.page_cache.items(), key=lambda item: len(item[0].split('/')))
         
@@ -71,6 +88,37 @@ class NavigationBuilder:
         logger.debug("_build_tree: Finished building navigation tree.")
         return tree
 
+    def with_updated_pages(self, page_cache, changed_slugs):
+        """
+        Returns a new builder over page_cache with the metadata of changed_slugs refreshed (after an
+        incremental page cache update), leaving this builder (possibly still serving requests of
+        an older content snapshot) untouched. Only the tree nodes on the paths to the changed pages
+        are copied; everything else, including the parent-to-children map, is shared.
+        """
+        def copy_node(node):
+            return {'__meta__': node['__meta__'], '__children__': dict(node['__children__'])}
+
+        tree = dict(self.tree)
+        tree[self.site_identifier] = copy_node(self.tree[self.site_identifier])
+        for slug in changed_slugs:
+            page_data = page_cache.get(slug)
+            if not page_data:
+                continue
+            node = tree[self.site_identifier]
+            for part in page_data.get('path_parts', slug.split('/')):
+                child = node['__children__'].get(part)
+                if child is None:
+                    node = None
+                    break
+                child = copy_node(child)
+                node['__children__'][part] = child
+                node = child
+            if node is None:
+                logger.warning(f"with_updated_pages: No tree node found for '{slug}'. Skipping.")
+                continue
+            node['__meta__'] = page_data
+        return NavigationBuilder(page_cache, self.access_checker, prebuilt_state={'tree': tree, 'parent_to_children_map': self.parent_to_children_map})
+
     def _get_sort_key(self, item: tuple) -> tuple:
         """
         Helper function to determine the sort key for a navigation item.
@@ -186,26 +234,46 @@ class NavigationBuilder:
 
     # --- Public Methods ---
 
+    def invalidate_cache(self):
+        """Drops all memoized navigation output. Must be called whenever the tree changes."""
+        self._menu_cache.clear()
+        self._search_tree_cache.clear()
+        logger.debug("NavigationBuilder: Navigation cache invalidated.")
+
     def get_menu_data(self, current_user: dict):
         """
         Returns the data structure for the main menu.
         This method respects the 'visible: false' flag in page frontmatter.
         The output is a list of dictionaries, intended for rendering in a Jinja2 template.
+        The list is memoized per permission fingerprint and shared between requests,
+        so callers must treat it as read-only.
         """
-        # Pass self.site_identifier as the initial parent_slug to start building from the root
-        return self._build_navigation_data(self.tree[self.site_identifier]['__children__'], current_user, for_main_nav=True, parent_slug=self.site_identifier)
+        fingerprint = get_permission_fingerprint(current_user)
+        menu_data = self._menu_cache.get(fingerprint)
+        if menu_data is None:
+            # Pass self.site_identifier as the initial parent_slug to start building from the root
+            menu_data = self._build_navigation_data(self.tree[self.site_identifier]['__children__'], current_user, for_main_nav=True, parent_slug=self.site_identifier)
+            self._menu_cache[fingerprint] = menu_data
+            logger.debug(f"get_menu_data: Built and cached menu for fingerprint '{fingerprint}'.")
+        return menu_data
 
     def get_search_tree_html(self, current_user: dict, show_all: bool = True):
         """
         Returns the full, nested page tree as a complete HTML string, now using the central renderer.
+        Memoized per permission fingerprint and show_all flag.
         """
-        full_nav_data = self._build_navigation_data(
-            self.tree[self.site_identifier]['__children__'], 
-            current_user, 
-            for_main_nav=(not show_all), 
-            parent_slug=self.site_identifier
-        )
-        return render_html_list(full_nav_data, tag='ul', css_class='list')
+        cache_key = (get_permission_fingerprint(current_user), show_all)
+        tree_html = self._search_tree_cache.get(cache_key)
+        if tree_html is None:
+            full_nav_data = self._build_navigation_data(
+                self.tree[self.site_identifier]['__children__'], 
+                current_user, 
+                for_main_nav=(not show_all), 
+                parent_slug=self.site_identifier
+            )
+            tree_html = render_html_list(full_nav_data, tag='ul', css_class='list')
+            self._search_tree_cache[cache_key] = tree_html
+        return tree_html
 
     def get_sitemap_data(self, current_user: dict):
         """
@@ -240,7 +308,10 @@ class NavigationBuilder:
             # --- Check Access Control (CRITICAL) ---
             # We must check if the current user is allowed to see this page at all,
             # regardless of the 'show_all_children' visibility flag.
-            page_access_rules = page_data.get('page', {}).get('access')
+            # Prefer the rules compiled at cache build time; fall back to the raw frontmatter block.
+            page_access_rules = page_data.get('access_rules')
+            if page_access_rules is None:
+                page_access_rules = page_data.get('page', {}).get('access')
             if page_access_rules:
                 has_access = self.access_checker(page_access_rules, current_user)
                 if not has_access:
@@ -323,3 +394,14 @@ class NavigationBuilder:
         logger.debug(f"generate_breadcrumbs: Generated {len(breadcrumbs)} breadcrumbs.")
         return breadcrumbs
 
+
+def build_snapshot_navigation(page_cache, previous_navigation=None, changed_slugs=None):
+    """
+    Builds the navigation of a new content snapshot (registered with core.state): incrementally
+    from the previous snapshot's navigation for an edit of known pages, otherwise from scratch.
+    """
+    if previous_navigation is not None and changed_slugs:
+        return previous_navigation.with_updated_pages(page_cache, changed_slugs)
+    return NavigationBuilder(page_cache, get_page_access_by_spec_rules)
+
+register_navigation_builder(build_snapshot_navigation)
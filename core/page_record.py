@@ -0,0 +1,205 @@
+# core/page_record.py - Compact Page Records
+"""
+The PAGE_CACHE entry of one page.
+
+Entries used to be plain dicts holding the frontmatter, the body, several derived strings and a
+second copy of every frontmatter value under flattened '_page.*' keys. PageRecord keeps only what
+cannot be derived, in __slots__:
+- the slug and the path parts are interned, so the PAGE_CACHE keys, the navigation and all pages
+  below the same directory share one string object per distinct value,
+- 'sort_key' and 'slug_path' are computed on access,
+- the flattened '_page.*' keys are a lazy view over the nested frontmatter, resolved on lookup.
+
+A PageRecord is a MutableMapping with the keys of the former dict, so plugins and templates that
+read entries with record['title'] or record.get('_page.taxonomy.author') keep working. Keys that
+are not fields (set by plugins) are kept in a small side dict created on first use.
+
+In the metadata-only mode (config.PAGE_BODIES_LAZY) a record holds a PageBodyRef instead of its
+Markdown body; record.markdown_content then loads the body through the loader registered by
+core.cache (an LRU bounded by size), so bodies of pages nobody reads never stay in memory.
+"""
+import sys
+from collections.abc import MutableMapping
+from config import SITE_IDENTIFIKATOR
+
+# Prefix of the flattened frontmatter keys: record['_page.taxonomy.author'] == record['page']['taxonomy']['author'].
+FLATTENED_META_PREFIX = "_page."
+
+# The keys of a record in the order of the former entry dicts (the flattened keys follow them).
+RECORD_KEYS = ('page', 'markdown_content', 'sort_key', 'file_path', 'file_mtime', 'slug', 'slug_path', 'title', 'path_parts', 'access_rules')
+_RECORD_KEY_SET = frozenset(RECORD_KEYS)
+_DERIVED_KEYS = frozenset(('sort_key', 'slug_path'))
+_MISSING = object()
+
+# loader(file_path, body_ref) -> str, registered by core.cache for bodies that are not resident.
+_body_loader = None
+
+def register_body_loader(loader):
+    """Sets the callable loading bodies of records that hold a PageBodyRef."""
+    global _body_loader
+    _body_loader = loader
+
+
+class PageBodyRef:
+    """
+    Where a page's Markdown body lies in its file: the text slice [offset, offset + length) of the file
+    as of stat_key. A length of None means the rest of the file from offset, stripped (the parse read
+    only the frontmatter, so the exact length is unknown but the body is known not to be empty).
+    """
+    __slots__ = ('offset', 'length', 'stat_key')
+
+    def __init__(self, offset: int, length: int, stat_key: tuple):
+        self.offset = offset
+        self.length = length
+        self.stat_key = stat_key
+
+    def __eq__(self, other):
+        return isinstance(other, PageBodyRef) and (self.offset, self.length, self.stat_key) == (other.offset, other.length, other.stat_key)
+
+    def __hash__(self):
+        return hash((self.offset, self.length, self.stat_key))
+
+    def __repr__(self):
+        return f"PageBodyRef(offset={self.offset}, length={self.length}, stat_key={self.stat_key})"
+
+    def __reduce__(self):
+        return (PageBodyRef, (self.offset, self.length, self.stat_key))
+
+def body_is_empty(body) -> bool:
+    """Tells whether a page body (a string or a PageBodyRef) has no content, without loading it."""
+    if isinstance(body, PageBodyRef):
+        return body.length == 0
+    return not body.strip()
+
+def page_has_body(page_data) -> bool:
+    """Tells whether a PAGE_CACHE entry has Markdown content, without loading a lazy body."""
+    if isinstance(page_data, PageRecord):
+        return not body_is_empty(page_data._body)
+    return bool(page_data.get('markdown_content'))
+
+
+class PageRecord(MutableMapping):
+    """One cached page: the frontmatter ('page'), the Markdown body and the facts derived from its location."""
+    __slots__ = ('page', '_body', 'file_path', 'file_mtime', 'slug', 'title', 'path_parts', 'access_rules', '_extra')
+
+    def __init__(self, page: dict, markdown_content, file_path: str, file_mtime: float, slug: str, title, path_parts, access_rules, extra: dict = None):
+        self.page = page
+        self._body = markdown_content # The body itself, or a PageBodyRef in the metadata-only mode
+        self.file_path = file_path
+        self.file_mtime = file_mtime
+        self.slug = sys.intern(slug)
+        self.title = title
+        self.path_parts = tuple(sys.intern(part) for part in path_parts)
+        self.access_rules = access_rules
+        self._extra = extra or None
+
+    # --- Body and Derived Fields ---
+    @property
+    def markdown_content(self) -> str:
+        body = self._body
+        if body.__class__ is str:
+            return body
+        return _body_loader(self.file_path, body)
+
+    @markdown_content.setter
+    def markdown_content(self, value: str):
+        self._body = value
+
+    @property
+    def body_ref(self):
+        """The PageBodyRef of a body loaded on use (metadata-only mode), or None if the body is resident."""
+        body = self._body
+        return body if isinstance(body, PageBodyRef) else None
+
+    @property
+    def sort_key(self) -> str:
+        if self._extra is not None and 'sort_key' in self._extra:
+            return self._extra['sort_key']
+        return self.path_parts[0]
+
+    @property
+    def slug_path(self) -> str:
+        if self._extra is not None and 'slug_path' in self._extra:
+            return self._extra['slug_path']
+        return f"{SITE_IDENTIFIKATOR}/{self.slug.lstrip('/')}".lower()
+
+    # --- Mapping Interface ---
+    def __getitem__(self, key):
+        if key in _RECORD_KEY_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        if isinstance(key, str) and key.startswith(FLATTENED_META_PREFIX):
+            value = _lookup_flattened(self.page, key[len(FLATTENED_META_PREFIX):])
+            if value is not _MISSING:
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _RECORD_KEY_SET:
+            return getattr(self, key)
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if key in _RECORD_KEY_SET and key not in _DERIVED_KEYS:
+            setattr(self, key, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if self._extra is None or key not in self._extra:
+            raise KeyError(f"Cannot delete '{key}' from a PageRecord (only keys added to it can be deleted).")
+        del self._extra[key]
+        if not self._extra:
+            self._extra = None
+
+    def __iter__(self):
+        yield from RECORD_KEYS
+        extra = self._extra or {}
+        for key in _iter_flattened_keys(self.page, FLATTENED_META_PREFIX[:-1]):
+            if key not in extra:
+                yield key
+        for key in extra:
+            if key not in _RECORD_KEY_SET:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self) -> dict:
+        """Returns a plain dict with all keys, the flattened ones included (like copying the former entry dict)."""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"PageRecord(slug={self.slug!r}, title={self.title!r}, file_path={self.file_path!r})"
+
+    def __reduce__(self):
+        return (PageRecord, (self.page, self._body, self.file_path, self.file_mtime,
+                             self.slug, self.title, self.path_parts, self.access_rules, self._extra))
+
+
+def _lookup_flattened(meta: dict, dotted_key: str):
+    """Resolves a flattened key ('taxonomy.author') in nested frontmatter; only non-dict leaves match."""
+    for key, value in meta.items():
+        name = str(key)
+        if isinstance(value, dict):
+            if dotted_key.startswith(name + "."):
+                found = _lookup_flattened(value, dotted_key[len(name) + 1:])
+                if found is not _MISSING:
+                    return found
+        elif name == dotted_key:
+            return value
+    return _MISSING
+
+def _iter_flattened_keys(meta: dict, prefix: str):
+    for key, value in meta.items():
+        new_key = f"{prefix}.{key}"
+        if isinstance(value, dict):
+            yield from _iter_flattened_keys(value, new_key)
+        else:
+            yield new_key
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 ACTIVE_PLUGIN_NAMES = []
 ACTIVE_PLUGINS = {'css': [], 'js': []}
 CONTENT_PROCESSORS = []
+HTML_TAG_HANDLERS = [] # (tag_name, handler) pairs for core.html_rewriter
 MARKDOWN_EXTENSIONS = ['attr_list', 'fenced_code', 'pymdownx.tilde', 'md_in_html', 'pymdownx.tasklist', 'tables']
 MARKDOWN_EXTENSION_CONFIGS = {
     'fenced_code': {'lang_prefix': 'language-'},
@@ -32,6 +33,7 @@ def load_plugins(app, get_nav_builder, templates, theme_config, theme_skin, get_
     ACTIVE_PLUGINS['css'].clear()
     ACTIVE_PLUGINS['js'].clear()
     CONTENT_PROCESSORS.clear()
+    HTML_TAG_HANDLERS.clear()
 
     if 'toc' in MARKDOWN_EXTENSIONS:
         MARKDOWN_EXTENSIONS.remove('toc')
@@ -82,6 +84,11 @@ def load_plugins(app, get_nav_builder, templates, theme_config, theme_skin, get_
                             CONTENT_PROCESSORS.append(processor)
                             logger.info(f"Registered content processor for plugin: {plugin_name}")
 
+                    if hasattr(module, 'register_html_handlers'):
+                        handlers = module.register_html_handlers()
+                        HTML_TAG_HANDLERS.extend(handlers.items())
+                        logger.info(f"Registered HTML handlers for plugin {plugin_name}: {list(handlers)}")
+
                     # --- Plugin Template Path Registration ---
                     plugin_template_dir = plugin / 'templates'
                     if plugin_template_dir.is_dir():
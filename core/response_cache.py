@@ -0,0 +1,119 @@
+# core/response_cache.py - Full-Response Cache for Anonymous Page Views
+import hashlib
+import logging
+from starlette.responses import Response
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_BYTES, COMPRESSED_PAGE_CACHE_MAX_BYTES
+from core.cache import PAGE_CACHE, BoundedLRUCache, get_content_generation, register_rebuild_listener
+from core.compression import SUPPORTED_ENCODINGS, compress_variants, negotiate_encoding, variant_etag
+
+logger = logging.getLogger(__name__)
+
+# --- Response Cache ---
+# Maps (base_url, page_key, content_generation) ->
+#     {"body": bytes, "variants": {encoding: compressed bytes}, "headers": dict, "media_type": str}.
+# The body is compressed once when it is stored, so hits never spend CPU on compression.
+# Only successful responses for visitors without a session user are stored. Access rules depend on
+# nothing but the page and the user, so an anonymous visitor allowed to see a page at one generation
+# is allowed to see it for the whole generation; a hit can therefore skip the access check as well.
+RESPONSE_CACHE = BoundedLRUCache(
+    None,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    weigher=lambda entry: len(entry["body"]) + sum(len(variant) for variant in entry["variants"].values()),
+)
+
+def _drop_response_cache(changed_slugs=None):
+    RESPONSE_CACHE.clear()
+    logger.debug("Response cache dropped after page cache change.")
+
+register_rebuild_listener(_drop_response_cache)
+
+# --- Compressed Page Variants ---
+# The response cache is opt-in, but rendered pages are compressed either way: the variants of a rendered
+# body are cached under a digest of the body itself, so whatever went into the page (content, templates,
+# the user), identical bytes are compressed once and different bytes never share variants.
+COMPRESSED_PAGE_CACHE = BoundedLRUCache(
+    None,
+    max_bytes=COMPRESSED_PAGE_CACHE_MAX_BYTES,
+    weigher=lambda variants: sum(len(variant) for variant in variants.values()),
+)
+
+def get_compressed_variants(body: bytes) -> dict:
+    """Returns {encoding: compressed body} for a rendered body, compressing it only on the first call."""
+    key = hashlib.blake2b(body, digest_size=16).digest()
+    variants = COMPRESSED_PAGE_CACHE.get(key)
+    if variants is None:
+        variants = compress_variants(body)
+        COMPRESSED_PAGE_CACHE.put(key, variants)
+    return variants
+
+def build_compressed_response(body: bytes, headers: dict, request_headers, media_type: str = "text/html") -> Response:
+    """Builds the response for a freshly rendered (not response-cached) page, compressed as negotiated."""
+    entry = {"body": body, "variants": get_compressed_variants(body), "headers": dict(headers), "media_type": media_type}
+    return build_cached_response(entry, request_headers)
+
+def get_response_cache_key(base_url: str, page_key: str) -> tuple:
+    """Returns the cache key of a page for the current content generation."""
+    return (base_url, page_key, get_content_generation())
+
+def get_cached_response(key: tuple):
+    """Returns the cached response entry for key, or None (always None while the cache is disabled)."""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    return RESPONSE_CACHE.get(key)
+
+def is_response_cacheable(page_key: str) -> bool:
+    """Tells whether a page's response may be cached; pages opt out with 'response_cache: false'."""
+    if not RESPONSE_CACHE_ENABLED:
+        return False
+    return PAGE_CACHE.get(page_key, {}).get('page', {}).get('response_cache', True) is not False
+
+def store_response(key: tuple, body: bytes, headers: dict, media_type: str = "text/html") -> dict:
+    """Compresses and stores the final response body and headers under key. Returns the new entry."""
+    entry = {"body": body, "variants": compress_variants(body), "headers": dict(headers), "media_type": media_type}
+    RESPONSE_CACHE.put(key, entry)
+    logger.debug(f"Response for '{key[1]}' cached ({len(body)} bytes, variants {sorted(entry['variants'])}, generation {key[2]}).")
+    return entry
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluates an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+def match_representation_etag(if_none_match: str, etag: str) -> str | None:
+    """
+    Returns the ETag of the representation (identity or one of the compressed variants of etag) that
+    an If-None-Match header matches, or None. Lets a page answer 304 before it is rendered.
+    """
+    for encoding in (None, *SUPPORTED_ENCODINGS):
+        representation_etag = variant_etag(etag, encoding)
+        if etag_matches(if_none_match, representation_etag):
+            return representation_etag
+    return None
+
+def build_cached_response(entry: dict, request_headers) -> Response:
+    """
+    Builds the response for a cache entry: the variant negotiated from Accept-Encoding (or the raw
+    body), with its own ETag, or 304 if the client already holds that representation.
+    """
+    encoding = negotiate_encoding(request_headers.get("accept-encoding"), entry["variants"])
+    headers = dict(entry["headers"])
+    if entry["variants"]:
+        headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+    if "ETag" in headers:
+        headers["ETag"] = variant_etag(headers["ETag"], encoding)
+        if etag_matches(request_headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=entry["variants"][encoding], headers=headers, media_type=entry["media_type"])
+    return Response(content=entry["body"], headers=headers, media_type=entry["media_type"])
+
+def get_response_cache_stats() -> dict:
+    """Returns hit/miss counters and occupancy of the response cache."""
+    stats = RESPONSE_CACHE.stats()
+    stats["enabled"] = RESPONSE_CACHE_ENABLED
+    stats["compressed_pages"] = COMPRESSED_PAGE_CACHE.stats()
+    return stats
@@ -2,12 +2,17 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 from urllib.parse import urlparse
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Global caches will be imported from core.cache
 from core.cache import PAGE_CACHE, USER_ACCOUNTS_CACHE
+from core.access import ALLOW_ALL, CompiledAccessRules, compile_access_rules, collect_granted_permissions
+
+# Fingerprint shared by all requests without a logged-in user.
+ANONYMOUS_FINGERPRINT = "anonymous"
 
 class AuthManager:
     """Handles authorization and access control logic."""
@@ -79,70 +84,58 @@ def get_page_meta(slug: str, key_path: str, default=None):
         return default
 
 def get_page_access_by_spec_rules(page_identifier, current_user: dict = None) -> bool:
-    """Centralized function to check all access rules for a given page and user."""
-    
-    if isinstance(page_identifier, str):
+    """
+    Centralized function to check all access rules for a given page and user.
+    page_identifier is a page slug, a raw 'access' rules dict or already compiled rules
+    (the 'access_rules' of a PAGE_CACHE entry); the decision itself is a set operation.
+    """
+    if isinstance(page_identifier, CompiledAccessRules):
+        slug_for_logging = "COMPILED_ACCESS_RULES"
+        access_rules = page_identifier
+    elif isinstance(page_identifier, str):
         slug_for_logging = page_identifier
-        page_access_rules = get_page_meta(page_identifier, 'access', {})
+        page_entry = PAGE_CACHE.get(page_identifier)
+        if page_entry is None:
+            access_rules = ALLOW_ALL
+        else:
+            access_rules = page_entry.get('access_rules')
+            if access_rules is None: # Entry built without compiled rules (e.g. by a plugin)
+                access_rules = compile_access_rules(page_entry.get('page', {}).get('access'))
     elif isinstance(page_identifier, dict):
         slug_for_logging = "ACCESS_RULES_DICT"
-        page_access_rules = page_identifier
+        access_rules = compile_access_rules(page_identifier)
     else:
-        # Invalid type, deny access for safety
         slug_for_logging = "INVALID_IDENTIFIER"
-        page_access_rules = {}
-
-    logger.debug(f"get_page_access_by_spec_rules: Checking access for identifier='{slug_for_logging}', user='{current_user.get('username') if current_user else 'anonymous'}'")
+        access_rules = ALLOW_ALL
 
-    if not page_access_rules:
-        logger.debug(f"get_page_access_by_spec_rules: No specific access rules for page '{slug_for_logging}'. Access granted by default.")
+    if not access_rules:
         return True
 
-    user_permissions = current_user.get('access', {}) if current_user else {}
-    if not user_permissions and current_user:
-        logger.warning(f"get_page_access_by_spec_rules: User '{current_user.get('username')}' has no defined permissions but is authenticated.")
-
-    # Check for negative rules first (e.g., access: site.login: false)
-    for perm_key, required_value in page_access_rules.items():
-        if required_value is False:
-            perm_parts = perm_key.split('.')
-            current_level = user_permissions
-            for part in perm_parts:
-                current_level = current_level.get(part) if isinstance(current_level, dict) else None
-                if current_level is None: break
-            
-            if current_level is True:
-                logger.debug(f"get_page_access_by_spec_rules: Access DENIED for page '{slug_for_logging}' due to negative rule '{perm_key}'.")
-                return False # Negative rule is an immediate exit
-
-    # Now check for positive rules (e.g., access: site.login: true)
-    required_true_rules = {k: v for k, v in page_access_rules.items() if v is True}
-
-    if not required_true_rules:
-        logger.debug(f"get_page_access_by_spec_rules: No positive access rules for page '{slug_for_logging}'. Access granted by default.")
-        return True
-
-    # If we have positive rules, access is denied by default unless a rule is met.
-    access_granted = False
-    if current_user:
-        for perm_key, required_value in required_true_rules.items():
-            perm_parts = perm_key.split('.')
-            current_level = user_permissions
-            for part in perm_parts:
-                current_level = current_level.get(part) if isinstance(current_level, dict) else None
-                if current_level is None: break
-            
-            if current_level is True:
-                access_granted = True
-                logger.debug(f"get_page_access_by_spec_rules: Access GRANTED for page '{slug_for_logging}' by rule '{perm_key}'.")
-                break # First matching rule is enough
-    
-    if not access_granted:
-        logger.debug(f"get_page_access_by_spec_rules: Access DENIED for page '{slug_for_logging}' - no matching positive rule found for user.")
-
-    logger.debug(f"get_page_access_by_spec_rules: Final access decision for page '{slug_for_logging}': {access_granted}.")
+    access_granted = access_rules.allows(get_granted_permissions(current_user))
+    if not access_granted and logger.isEnabledFor(logging.DEBUG): # Keep the hot path free of string formatting
+        logger.debug(f"get_page_access_by_spec_rules: Access DENIED for page '{slug_for_logging}' to user '{current_user.get('username') if current_user else 'anonymous'}' ({access_rules}).")
     return access_granted
 
+def get_granted_permissions(current_user: dict = None) -> frozenset:
+    """Returns the set of dotted permission keys granted to a user (empty for anonymous visitors)."""
+    if not current_user:
+        return frozenset()
+    granted_permissions = current_user.get('granted_permissions')
+    if granted_permissions is None: # User dict not loaded through build_user_accounts_cache
+        granted_permissions = collect_granted_permissions(current_user.get('access'))
+    return granted_permissions
+
+def get_permission_fingerprint(current_user: dict = None) -> str:
+    """
+    Returns a short, stable fingerprint of the user's granted permissions.
+    Users with identical permissions share a fingerprint; anonymous visitors get their own bucket.
+    Anything that depends only on permissions (e.g. the rendered menu) can be cached by it.
+    """
+    if not current_user:
+        return ANONYMOUS_FINGERPRINT
+    canonical = "\n".join(sorted(get_granted_permissions(current_user)))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
 def get_current_user(request: Request):
     """Retrieves the current user's data from the session cookie."""
     username = request.session.get("username")
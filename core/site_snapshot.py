@@ -0,0 +1,192 @@
+# core/site_snapshot.py - Persistent Compiled-Site Snapshot
+"""
+Persists the compiled site to a single file, so that a starting worker does not have to
+read, parse and index every page again.
+
+The snapshot holds the parsed page files (PAGE_FILES), PAGE_CACHE, PAGE_SOURCES, the navigation
+tree with its parent-to-children map and the components registered by plugins (e.g. the search
+index), plus a manifest of (mtime_ns, size) for every page file. On restore:
+- if the manifest matches the files on disk, everything is taken over as it is;
+- otherwise only the changed files are re-parsed and the navigation is rebuilt. Components are
+  handed over together with the slugs they have to refresh, or dropped when the page structure
+  changed (pages added, removed or renamed).
+"""
+import os
+import time
+import pickle
+import logging
+import tempfile
+from pathlib import Path
+from core.cache import build_page_cache, restore_page_cache, register_rebuild_listener
+from core.state import get_current_snapshot
+from core.navigation import NavigationBuilder
+from config import SITE_SNAPSHOT_PATH, PAGE_BODIES_LAZY
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the structure of the pickled pages, navigation or components changes.
+SNAPSHOT_FORMAT_VERSION = 6
+
+# --- Global Variables ---
+# name -> callable returning the current component to persist (registered by plugins).
+SNAPSHOT_COMPONENT_PROVIDERS = {}
+# name -> (component, stale_slugs) restored from the snapshot and not yet taken by its plugin.
+_restored_components = {}
+# True while the content in memory is exactly what the snapshot file holds.
+_snapshot_is_current = False
+
+
+def _mark_snapshot_outdated(changed_slugs=None):
+    global _snapshot_is_current
+    _snapshot_is_current = False
+
+register_rebuild_listener(_mark_snapshot_outdated)
+
+# --- Components ---
+def register_snapshot_component(name: str, provider):
+    """Registers a callable returning a (picklable) component to be stored in the snapshot under name."""
+    SNAPSHOT_COMPONENT_PROVIDERS[name] = provider
+
+def take_snapshot_component(name: str) -> tuple:
+    """
+    Returns (component, stale_slugs) restored from the snapshot, or (None, None) if there is none.
+    stale_slugs is the set of pages that changed since the snapshot was written; the component
+    must refresh them before use. A component can be taken only once.
+    """
+    return _restored_components.pop(name, (None, None))
+
+def is_snapshot_current() -> bool:
+    """Tells whether the snapshot on disk matches the content in memory (i.e. saving it again is pointless)."""
+    return _snapshot_is_current
+
+# --- Loading and Saving ---
+def _get_pages_dir(directory: str) -> Path:
+    return Path(os.environ.get('PAGES_DIR', directory)).resolve()
+
+def _scan_manifest(base_dir: Path) -> dict:
+    """Returns {absolute path: (mtime_ns, size)} of all page files currently on disk."""
+    manifest = {}
+    for md_file in base_dir.rglob('default.md'):
+        try:
+            stat = md_file.stat()
+        except OSError:
+            continue
+        manifest[str(md_file.resolve())] = (stat.st_mtime_ns, stat.st_size)
+    return manifest
+
+def load_site_snapshot(path: str = SITE_SNAPSHOT_PATH, directory: str = "user/pages"):
+    """Loads the snapshot file. Returns its content, or None if it is missing, unreadable or does not fit."""
+    snapshot_file = Path(path)
+    if not snapshot_file.is_file():
+        logger.info(f"No site snapshot found at {snapshot_file}.")
+        return None
+    try:
+        with open(snapshot_file, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Site snapshot {snapshot_file} could not be loaded: {e}")
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_FORMAT_VERSION:
+        logger.info(f"Site snapshot {snapshot_file} has an incompatible format. Ignoring it.")
+        return None
+    if snapshot.get('pages_dir') != str(_get_pages_dir(directory)):
+        logger.info(f"Site snapshot {snapshot_file} was built from another pages directory. Ignoring it.")
+        return None
+    if snapshot.get('page_bodies_lazy') != PAGE_BODIES_LAZY:
+        logger.info(f"Site snapshot {snapshot_file} was built in another page body mode. Ignoring it.")
+        return None
+    return snapshot
+
+def restore_site_snapshot(access_checker, path: str = SITE_SNAPSHOT_PATH, directory: str = "user/pages"):
+    """
+    Restores the page cache from the snapshot, re-parsing only page files whose stat changed.
+    Returns the NavigationBuilder published with the restored pages, or None if no usable snapshot
+    exists (the content is left untouched and the caller has to run a full build).
+    """
+    global _snapshot_is_current
+    started = time.perf_counter()
+    snapshot = load_site_snapshot(path, directory)
+    if snapshot is None:
+        return None
+
+    _restored_components.clear()
+    current_manifest = _scan_manifest(_get_pages_dir(directory))
+    if current_manifest == snapshot['manifest']:
+        nav_builder = NavigationBuilder(snapshot['page_cache'], access_checker, prebuilt_state=snapshot['navigation'])
+        restore_page_cache(snapshot['page_cache'], snapshot['page_sources'], snapshot['page_files'], navigation=nav_builder)
+        _restored_components.update({name: (component, set()) for name, component in snapshot['components'].items()})
+        _snapshot_is_current = True
+        logger.info(f"Site snapshot restored unchanged in {time.perf_counter() - started:.3f}s.")
+        return nav_builder
+
+    build_page_cache(directory, reusable_files=snapshot['page_files'])
+    content = get_current_snapshot()
+    nav_builder = content.navigation
+
+    page_sources = content.page_sources
+    old_sources = snapshot['page_sources']
+    same_structure = page_sources.keys() == old_sources.keys() and all(
+        source['slug'] == old_sources[source_path]['slug'] for source_path, source in page_sources.items()
+    )
+    if same_structure:
+        stale_slugs = {
+            page_sources[source_path]['slug']
+            for source_path, stat_key in current_manifest.items()
+            if snapshot['manifest'].get(source_path) != stat_key and page_sources.get(source_path, {}).get('slug')
+        }
+        _restored_components.update({name: (component, stale_slugs) for name, component in snapshot['components'].items()})
+        logger.info(f"Site snapshot restored with {len(stale_slugs)} changed page(s) in {time.perf_counter() - started:.3f}s.")
+    else:
+        logger.info(f"Site snapshot restored with structural changes in {time.perf_counter() - started:.3f}s. Components will be rebuilt.")
+    return nav_builder
+
+def save_site_snapshot(nav_builder, path: str = SITE_SNAPSHOT_PATH, directory: str = "user/pages") -> bool:
+    """
+    Writes the current content to the snapshot file. The file is replaced atomically, so workers
+    starting concurrently either see the previous snapshot or the complete new one.
+    """
+    global _snapshot_is_current
+    started = time.perf_counter()
+    content = get_current_snapshot()
+    components = {}
+    for name, provider in SNAPSHOT_COMPONENT_PROVIDERS.items():
+        try:
+            component = provider()
+        except Exception as e:
+            logger.error(f"Error getting snapshot component '{name}': {e}", exc_info=True)
+            continue
+        if component is not None:
+            components[name] = component
+
+    snapshot = {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'pages_dir': str(_get_pages_dir(directory)),
+        'page_bodies_lazy': PAGE_BODIES_LAZY,
+        'manifest': {source_path: entry[:2] for source_path, entry in content.page_files.items()},
+        'page_files': dict(content.page_files),
+        'page_cache': dict(content.pages),
+        'page_sources': dict(content.page_sources),
+        'navigation': nav_builder.get_state(),
+        'components': components,
+    }
+
+    snapshot_file = Path(path)
+    temp_path = None
+    try:
+        snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=snapshot_file.parent, prefix=f".{snapshot_file.name}.", delete=False) as f:
+            temp_path = f.name
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, snapshot_file)
+    except Exception as e:
+        logger.error(f"Error writing site snapshot {snapshot_file}: {e}", exc_info=True)
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+    _snapshot_is_current = True
+    logger.info(f"Site snapshot written to {snapshot_file} ({len(content.pages)} pages, components: {sorted(components)}) in {time.perf_counter() - started:.3f}s.")
+    return True
@@ -0,0 +1,217 @@
+# core/state.py - Immutable Content Snapshots
+"""
+All content a request works with lives in one immutable, versioned ContentSnapshot: the pages,
+the user accounts, the parse tables of the last build, the navigation and the indexes built by
+plugins (e.g. the search index). A reload builds the next snapshot entirely off to the side and
+publishes it with a single reference swap, so readers never wait for a reload and never see a
+half-built cache or pages that do not match the navigation.
+
+- The snapshot version doubles as the content generation: every publish increments it, and caches
+  of derived data (rendered HTML, responses, ETags) key their entries by it.
+- SnapshotPinningMiddleware pins the snapshot current at the start of a request for the whole
+  request, including work handed to executor threads (see core.content.run_in_render_executor).
+- The module-level mappings in core.cache (PAGE_CACHE, USER_ACCOUNTS_CACHE, ...) are live views
+  of the pinned (or current) snapshot. Writes through them are copy-on-write: they publish a new
+  snapshot and never modify a published one.
+"""
+import logging
+import threading
+from contextvars import ContextVar
+from collections.abc import MutableMapping
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ('pages', 'accounts', 'page_sources', 'page_files', 'navigation', 'indexes')
+
+
+class ContentSnapshot:
+    """
+    One published state of the site content. Immutable: the mappings are read-only proxies and
+    attributes cannot be reassigned. A new state is derived with publish_snapshot().
+    """
+    __slots__ = ('version',) + SNAPSHOT_FIELDS
+
+    def __init__(self, version: int, pages: dict, accounts: dict, page_sources: dict, page_files: dict, navigation, indexes: dict):
+        set_attribute = object.__setattr__
+        set_attribute(self, 'version', version)
+        set_attribute(self, 'pages', _read_only(pages))
+        set_attribute(self, 'accounts', _read_only(accounts))
+        set_attribute(self, 'page_sources', _read_only(page_sources))
+        set_attribute(self, 'page_files', _read_only(page_files))
+        set_attribute(self, 'navigation', navigation)
+        set_attribute(self, 'indexes', _read_only(indexes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ContentSnapshot is immutable; publish a new snapshot instead.")
+
+    def __delattr__(self, name):
+        raise AttributeError("ContentSnapshot is immutable; publish a new snapshot instead.")
+
+    def __repr__(self):
+        return f"ContentSnapshot(version={self.version}, pages={len(self.pages)}, accounts={len(self.accounts)}, indexes={sorted(self.indexes)})"
+
+
+def _read_only(mapping):
+    return mapping if isinstance(mapping, MappingProxyType) else MappingProxyType(mapping)
+
+
+# --- Global Variables ---
+_current_snapshot = ContentSnapshot(0, {}, {}, {}, {}, None, {})
+# The snapshot pinned by the running request (None outside of requests: readers see the current one).
+_pinned_snapshot = ContextVar('pinned_snapshot', default=None)
+# Serializes writers (build-then-swap, copy-on-write updates). Readers never take it.
+SNAPSHOT_WRITE_LOCK = threading.RLock()
+# Builds the navigation for new pages: builder(pages, previous_navigation, changed_slugs) -> navigation.
+_navigation_builder = None
+# name -> builder(pages, previous_index, changed_slugs) -> index, for indexes kept in the snapshot.
+SNAPSHOT_INDEX_BUILDERS = {}
+
+
+# --- Reading ---
+def get_snapshot() -> ContentSnapshot:
+    """Returns the snapshot pinned by the running request, or the current one."""
+    return _pinned_snapshot.get() or _current_snapshot
+
+def get_current_snapshot() -> ContentSnapshot:
+    """Returns the most recently published snapshot, regardless of any pinned one."""
+    return _current_snapshot
+
+def pin_snapshot(snapshot: ContentSnapshot = None):
+    """Pins a snapshot (default: the current one) for the running context. Returns a token for release_snapshot()."""
+    return _pinned_snapshot.set(snapshot or _current_snapshot)
+
+def release_snapshot(token):
+    """Releases a snapshot pinned by pin_snapshot()."""
+    _pinned_snapshot.reset(token)
+
+
+class SnapshotPinningMiddleware:
+    """ASGI middleware pinning the current content snapshot for the duration of each HTTP request."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _pinned_snapshot.set(_current_snapshot)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _pinned_snapshot.reset(token)
+
+
+# --- Publishing ---
+def register_navigation_builder(builder):
+    """Sets the callable building the navigation of every snapshot whose pages change."""
+    global _navigation_builder
+    _navigation_builder = builder
+
+def register_snapshot_index(name: str, builder, index=None):
+    """
+    Registers an index kept in every snapshot and rebuilt by builder whenever the pages change.
+    index is an already built index for the current pages (e.g. restored from a site snapshot);
+    without it the builder builds one. Publishes a snapshot holding the index.
+    """
+    with SNAPSHOT_WRITE_LOCK:
+        SNAPSHOT_INDEX_BUILDERS[name] = builder
+        current = _current_snapshot
+        if index is None:
+            index = builder(current.pages, None, None)
+        publish_snapshot(indexes={**current.indexes, name: index})
+
+def publish_snapshot(changed_slugs=None, **changes) -> ContentSnapshot:
+    """
+    Derives the next snapshot from the current one with the given fields replaced and publishes it.
+    When the pages change, the navigation and all registered indexes are rebuilt for them, unless
+    given explicitly; changed_slugs (None = everything) lets the builders update incrementally.
+    Without changes only the version is incremented (a new content generation for the same content).
+    Mappings handed over become part of the snapshot and must not be modified afterwards.
+    """
+    global _current_snapshot
+    unknown_fields = set(changes) - set(SNAPSHOT_FIELDS)
+    if unknown_fields:
+        raise TypeError(f"Unknown content snapshot fields: {sorted(unknown_fields)}")
+
+    with SNAPSHOT_WRITE_LOCK:
+        previous = _current_snapshot
+        fields = {field: getattr(previous, field) for field in SNAPSHOT_FIELDS}
+        fields.update(changes)
+        if 'pages' in changes:
+            pages = fields['pages']
+            if 'navigation' not in changes:
+                fields['navigation'] = _navigation_builder(pages, previous.navigation, changed_slugs) if _navigation_builder else None
+            if 'indexes' not in changes and SNAPSHOT_INDEX_BUILDERS:
+                fields['indexes'] = {
+                    name: builder(pages, previous.indexes.get(name), changed_slugs)
+                    for name, builder in SNAPSHOT_INDEX_BUILDERS.items()
+                }
+        snapshot = ContentSnapshot(previous.version + 1, **fields)
+        _current_snapshot = snapshot # The single reference swap readers observe
+    logger.debug(f"Published {snapshot}.")
+    return snapshot
+
+
+class SnapshotMapping(MutableMapping):
+    """
+    Live dict-like view of one mapping field of the pinned (or current) snapshot.
+    Writes are copy-on-write: they copy the field of the current snapshot, apply the change and
+    publish the result as a new snapshot (with a full navigation and index rebuild for pages).
+    They are meant for rare updates and tests; reloads publish whole mappings instead.
+    """
+    __slots__ = ('_field',)
+
+    def __init__(self, field: str):
+        self._field = field
+
+    def _mapping(self):
+        return getattr(get_snapshot(), self._field)
+
+    def __getitem__(self, key):
+        return self._mapping()[key]
+
+    def get(self, key, default=None):
+        return self._mapping().get(key, default)
+
+    def __contains__(self, key):
+        return key in self._mapping()
+
+    def __iter__(self):
+        return iter(self._mapping())
+
+    def __len__(self):
+        return len(self._mapping())
+
+    def keys(self):
+        return self._mapping().keys()
+
+    def items(self):
+        return self._mapping().items()
+
+    def values(self):
+        return self._mapping().values()
+
+    def copy(self) -> dict:
+        return dict(self._mapping())
+
+    def __repr__(self):
+        return repr(dict(self._mapping()))
+
+    def _write(self, change):
+        with SNAPSHOT_WRITE_LOCK:
+            data = dict(getattr(_current_snapshot, self._field))
+            change(data)
+            publish_snapshot(**{self._field: data})
+
+    def __setitem__(self, key, value):
+        self._write(lambda data: data.__setitem__(key, value))
+
+    def __delitem__(self, key):
+        self._write(lambda data: data.__delitem__(key))
+
+    def update(self, *args, **kwargs):
+        self._write(lambda data: data.update(*args, **kwargs))
+
+    def clear(self):
+        self._write(dict.clear)
@@ -1,6 +1,7 @@
 # core/utils.py - Utility functions for the CMS.
 import unidecode
 import math
+from pathlib import Path
 
 
 def remove_diacritics(text: str) -> str:
@@ -332,3 +333,19 @@ def render_html_list(items: list, tag: str = 'ul', is_root: bool = True, css_cla
 def wrap_in_container_div(html_content: str) -> str:
     """Wraps the given HTML content in a container div for styling."""
     return f'<div class="container-div">{html_content}</div>'
+
+
+def collect_source_file_stats(directories: list, suffixes: set) -> list:
+    """
+    Returns sorted (path, mtime_ns, size) tuples of the files with one of the given suffixes below
+    the given directories (or of the given paths themselves if they are files). Missing paths are skipped.
+    """
+    stats = []
+    for directory in directories:
+        directory = Path(directory)
+        paths = [directory] if directory.is_file() else directory.rglob("*")
+        for path in paths:
+            if path.is_file() and path.suffix in suffixes:
+                stat = path.stat()
+                stats.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return sorted(stats)
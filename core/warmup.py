@@ -0,0 +1,177 @@
+# core/warmup.py - Background Warm-up of the Rendered Page Cache
+"""
+After a content rebuild the rendered page cache is empty, so the first visitor of every page would
+pay for its Markdown rendering. The warm-up thread renders pages ahead of them:
+- pages are ordered by the view counts this worker records in read_page (most-viewed first),
+- it renders through get_page_data, so it shares single-flight renders with live requests,
+- it keeps to WARMUP_CPU_BUDGET by sleeping between renders in proportion to the CPU time spent,
+- it stops as soon as the content generation changes and starts over for the new one.
+The thread is started per worker from the application's startup event (never in a preloading master).
+"""
+import time
+import logging
+import threading
+from collections import Counter
+from config import WARMUP_ENABLED, WARMUP_MAX_PAGES, WARMUP_CPU_BUDGET, WARMUP_START_DELAY, RENDER_CACHE_MAX_ENTRIES
+from core.cache import PAGE_CACHE, get_content_generation, register_rebuild_listener
+from core.state import get_current_snapshot, pin_snapshot, release_snapshot
+from core.content import RENDERED_PAGE_CACHE, get_page_data
+from core.page_record import page_has_body
+
+logger = logging.getLogger(__name__)
+
+# Interval of checking the content generation, which also changes without a rebuild (e.g. account reloads).
+GENERATION_POLL_INTERVAL = 5.0
+
+# --- Page View Counts ---
+# Maps page slug -> number of views in this worker. Only slugs present in PAGE_CACHE are counted,
+# so the counter stays bounded by the number of pages.
+PAGE_VIEW_COUNTS = Counter()
+_view_counts_lock = threading.Lock()
+
+def record_page_view(page_key: str):
+    """Counts one view of a page (ignored for paths that are not cached pages)."""
+    if page_key in PAGE_CACHE:
+        with _view_counts_lock:
+            PAGE_VIEW_COUNTS[page_key] += 1
+
+def get_warmup_order(limit: int = None) -> list:
+    """Returns the slugs of renderable pages, most-viewed first (ties keep the page cache order)."""
+    with _view_counts_lock:
+        view_counts = dict(PAGE_VIEW_COUNTS)
+    slugs = [
+        slug for slug, page in list(PAGE_CACHE.items())
+        if page_has_body(page) and not page.get('page', {}).get('blog', False) and not page.get('page', {}).get('container', False)
+    ]
+    slugs.sort(key=lambda slug: view_counts.get(slug, 0), reverse=True)
+    return slugs if limit is None else slugs[:limit]
+
+# --- Warm-up ---
+WARMUP_STATUS = {
+    "state": "idle", # idle | waiting | running | done | cancelled
+    "generation": None,
+    "total": 0,
+    "rendered": 0,
+    "already_cached": 0,
+    "failed": 0,
+    "cpu_seconds": 0.0,
+    "started_at": None,
+    "finished_at": None,
+}
+_status_lock = threading.Lock()
+_wakeup = threading.Event()
+_shutdown = threading.Event()
+_warmup_thread = None
+
+def _update_status(**changes):
+    with _status_lock:
+        WARMUP_STATUS.update(changes)
+
+def get_warmup_status() -> dict:
+    """Returns a snapshot of the warm-up progress of this worker."""
+    with _status_lock:
+        status = dict(WARMUP_STATUS)
+    status["enabled"] = WARMUP_ENABLED
+    status["running"] = _warmup_thread is not None and _warmup_thread.is_alive()
+    status["cpu_budget"] = WARMUP_CPU_BUDGET
+    status["content_generation"] = get_content_generation()
+    return status
+
+def run_warmup(generation: int = None, cpu_budget: float = WARMUP_CPU_BUDGET, max_pages: int = WARMUP_MAX_PAGES) -> bool:
+    """
+    Pre-renders pages into the rendered page cache for the given content generation (default: current).
+    Returns False if it was cancelled because the generation changed or the service is shutting down.
+    """
+    snapshot = get_current_snapshot()
+    generation = snapshot.version if generation is None else generation
+    limit = RENDER_CACHE_MAX_ENTRIES if max_pages is None else max_pages
+    # Work on one snapshot throughout; a newer one cancels the run.
+    token = pin_snapshot(snapshot)
+    try:
+        return _warm_up_pages(get_warmup_order(limit), generation, cpu_budget)
+    finally:
+        release_snapshot(token)
+
+def _warm_up_pages(slugs: list, generation: int, cpu_budget: float) -> bool:
+    _update_status(state="running", generation=generation, total=len(slugs), rendered=0, already_cached=0,
+                   failed=0, cpu_seconds=0.0, started_at=time.time(), finished_at=None)
+    logger.info(f"Warm-up of {len(slugs)} pages started (generation {generation}, CPU budget {cpu_budget:.0%}).")
+
+    cpu_total = 0.0
+    for slug in slugs:
+        if _shutdown.is_set() or _wakeup.is_set() or get_current_snapshot().version != generation:
+            _update_status(state="cancelled", finished_at=time.time())
+            logger.info(f"Warm-up of generation {generation} cancelled after {cpu_total:.2f} s of CPU time.")
+            return False
+        if (slug.lower(), generation) in RENDERED_PAGE_CACHE:
+            with _status_lock:
+                WARMUP_STATUS["already_cached"] += 1
+            continue
+
+        cpu_started = time.thread_time()
+        try:
+            rendered = get_page_data(slug) is not None
+        except Exception as e:
+            logger.error(f"Warm-up: rendering of '{slug}' failed: {e}", exc_info=True)
+            rendered = False
+        cpu_spent = time.thread_time() - cpu_started
+        cpu_total += cpu_spent
+        with _status_lock:
+            WARMUP_STATUS["rendered" if rendered else "failed"] += 1
+            WARMUP_STATUS["cpu_seconds"] = round(cpu_total, 4)
+
+        # Duty cycle: after spending t seconds of CPU, idle t * (1 - budget) / budget seconds.
+        if 0 < cpu_budget < 1:
+            _shutdown.wait(cpu_spent * (1 - cpu_budget) / cpu_budget)
+
+    _update_status(state="done", finished_at=time.time())
+    logger.info(f"Warm-up of generation {generation} done: {len(slugs)} pages, {cpu_total:.2f} s of CPU time.")
+    return True
+
+def _warmup_loop():
+    warmed_generation = None
+    while not _shutdown.is_set():
+        woken = _wakeup.wait(GENERATION_POLL_INTERVAL)
+        if _shutdown.is_set():
+            break
+        if not woken and get_current_snapshot().version == warmed_generation:
+            continue
+        _update_status(state="waiting")
+        # Let a burst of reloads settle; every further rebuild restarts the delay.
+        while _wakeup.is_set() and not _shutdown.is_set():
+            _wakeup.clear()
+            _shutdown.wait(WARMUP_START_DELAY)
+        if _shutdown.is_set():
+            break
+        generation = get_current_snapshot().version
+        if run_warmup(generation):
+            warmed_generation = generation
+
+def _schedule_warmup(changed_slugs=None):
+    if _warmup_thread is not None:
+        _wakeup.set()
+
+register_rebuild_listener(_schedule_warmup)
+
+def start_warmup_service():
+    """Starts the warm-up thread of this worker and warms up the current content."""
+    global _warmup_thread
+    if not WARMUP_ENABLED or (_warmup_thread is not None and _warmup_thread.is_alive()):
+        return
+    _shutdown.clear()
+    _warmup_thread = threading.Thread(target=_warmup_loop, name="render-warmup", daemon=True)
+    _warmup_thread.start()
+    _wakeup.set()
+    logger.info("Render cache warm-up service started.")
+
+def stop_warmup_service():
+    """Stops the warm-up thread; a warm-up in progress is cancelled before its next page."""
+    global _warmup_thread
+    if _warmup_thread is None:
+        return
+    _shutdown.set()
+    _wakeup.set()
+    _warmup_thread.join(timeout=5)
+    _warmup_thread = None
+    _wakeup.clear()
+    logger.info("Render cache warm-up service stopped.")
@@ -0,0 +1,24 @@
+# core/yaml_loader.py - Shared YAML Loading
+"""
+One place for loading YAML (page frontmatter, user accounts, theme configuration).
+
+PyYAML's pure-Python SafeLoader dominated the cold start of large sites. When PyYAML is built with
+LibYAML, its C-accelerated CSafeLoader is used instead; it constructs the same safe types (strings,
+numbers, dates, lists, dicts), only an order of magnitude faster. Without LibYAML the pure-Python
+loader is used transparently.
+"""
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+    YAML_LIBYAML_ENABLED = True
+except ImportError: # PyYAML built without LibYAML
+    from yaml import SafeLoader
+    YAML_LIBYAML_ENABLED = False
+
+YAMLError = yaml.YAMLError
+
+
+def safe_load(stream):
+    """Drop-in replacement of yaml.safe_load using the fastest available safe loader."""
+    return yaml.load(stream, Loader=SafeLoader)
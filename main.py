@@ -1,8 +1,10 @@
 import os
-import yaml
 import logging
 import bcrypt
 import sys
+import time
+import hashlib
+from email.utils import formatdate
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Request, HTTPException, Form, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -14,17 +16,24 @@ import json
 from urllib.parse import urlparse
 
 # --- Project-Specific Imports ---
-from config import THEME_SKIN, DEBUG, SECRET_KEY, LOG_LEVEL
-from core.navigation import NavigationBuilder
-from core.file_watcher import start_watcher
+from config import THEME_SKIN, DEBUG, SECRET_KEY, LOG_LEVEL, SITE_SNAPSHOT_ENABLED
+import core.navigation  # registers the snapshot navigation builder
+from core.file_watcher import start_watcher, stop_watcher, get_reload_metrics
 
 # --- Core Module Imports ---
-from core.cache import PAGE_CACHE, USER_ACCOUNTS_CACHE, build_page_cache, build_user_accounts_cache, _generate_slug_from_path
+from core.cache import PAGE_CACHE, USER_ACCOUNTS_CACHE, build_page_cache, build_user_accounts_cache, load_user_accounts, update_page_cache, bump_content_generation, get_content_generation, get_page_body_cache_stats, _generate_slug_from_path
+from core.state import SnapshotPinningMiddleware, get_snapshot
 from core.plugins import load_plugins
-from core.security import AuthManager, get_current_user, get_page_access_by_spec_rules
+from core.security import AuthManager, get_current_user, get_page_access_by_spec_rules, get_permission_fingerprint
+from core.access import compile_access_rules
+from core.yaml_loader import safe_load
 from core.templating import templates, get_base_template_context, THEME_CONFIG
-from core.content import get_page_data
-from core.utils import generate_clean_slug, remove_diacritics, render_html_list, render_multicolumn_list, parse_container_config, wrap_in_container_div
+from core.content import get_page_data, get_render_cache_stats, run_in_render_executor, shutdown_render_executor
+from core.response_cache import get_response_cache_key, get_cached_response, is_response_cacheable, store_response, get_response_cache_stats, build_cached_response, build_compressed_response, match_representation_etag
+from core.compression import PrecompressedStaticFiles
+from core.site_snapshot import restore_site_snapshot, save_site_snapshot, is_snapshot_current
+from core.warmup import record_page_view, get_warmup_status, start_warmup_service, stop_warmup_service
+from core.utils import collect_source_file_stats, generate_clean_slug, remove_diacritics, render_html_list, render_multicolumn_list, parse_container_config, wrap_in_container_div
 try:
     from user.plugin.blog.blog import blog_page_handler # NOVÝ IMPORT
 except ModuleNotFoundError:
@@ -83,9 +92,16 @@ observer: Observer = None
 # --- Initial Content and Navigation Build (Run in Global Scope for Multi-Worker Safety) ---
 logging.info("Building initial caches in global scope...")
 build_user_accounts_cache()
-build_page_cache()
-nav_builder = NavigationBuilder(PAGE_CACHE, get_page_access_by_spec_rules)
-logging.info("Initial NavigationBuilder created.")
+# A compiled-site snapshot lets the worker skip reading and parsing unchanged pages.
+# Either way the pages are published together with their navigation in one content snapshot.
+restored_nav_builder = restore_site_snapshot(get_page_access_by_spec_rules) if SITE_SNAPSHOT_ENABLED else None
+if restored_nav_builder is None:
+    build_page_cache()
+logging.info("Initial content snapshot published with its navigation.")
+
+def get_nav_builder():
+    """Returns the navigation of the content snapshot pinned by the running request (or the current one)."""
+    return get_snapshot().navigation
 
 # --- FastAPI Application Initialization ---
 app = FastAPI()
@@ -93,7 +109,7 @@ app = FastAPI()
 # Load theme config early for plugins
 theme_config_path = Path(f"{THEME_SKIN}/theme.yaml")
 if theme_config_path.exists():
-    THEME_CONFIG.update(yaml.safe_load(theme_config_path.read_text()))
+    THEME_CONFIG.update(safe_load(theme_config_path.read_text()))
     logger.debug(f"Theme configuration loaded from {theme_config_path}.")
 else:
     logger.warning(f"Theme configuration file not found at {theme_config_path}. Using default settings.")
@@ -102,63 +118,114 @@ else:
 logger.info("Calling load_plugins...")
 load_plugins(
     app,
-    get_nav_builder=lambda: nav_builder,
+    get_nav_builder=get_nav_builder,
     templates=templates,
     theme_config=THEME_CONFIG,
     theme_skin=THEME_SKIN,
     get_full_page_cache=lambda: PAGE_CACHE # Added for new author and dumpcache plugins
 )
 
+# Persist the compiled site (including plugin components such as the search index) for the next start.
+if SITE_SNAPSHOT_ENABLED and not is_snapshot_current():
+    save_site_snapshot(get_nav_builder())
+
+
 
+# Pin one content snapshot per request, so a reload running meanwhile never changes what it sees
+app.add_middleware(SnapshotPinningMiddleware)
 
 # Add session middleware
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
 # Mount static file directories
-app.mount("/user/theme", StaticFiles(directory="user/theme"), name="themes")
+# Theme and plugin assets are served from precompressed .gz/.br sidecars when available (utils/precompress_assets.py).
+app.mount("/user/theme", PrecompressedStaticFiles(directory="user/theme"), name="themes")
 app.mount("/user/pages", StaticFiles(directory="user/pages"), name="user_pages")
 app.mount("/user/accounts", StaticFiles(directory="user/accounts"), name="user_accounts")
-app.mount("/user/plugin", StaticFiles(directory="user/plugin"), name="plugins")
+app.mount("/user/plugin", PrecompressedStaticFiles(directory="user/plugin"), name="plugins")
 
 
 # --- Live Reload and Application Lifecycle ---
+def reload_theme_config():
+    """Reloads the theme configuration from theme.yaml into THEME_CONFIG."""
+    theme_config_path = Path(f"{THEME_SKIN}/theme.yaml")
+    if theme_config_path.exists():
+        THEME_CONFIG.clear()
+        THEME_CONFIG.update(safe_load(theme_config_path.read_text()))
+        logger.info("Theme configuration reloaded.")
+    else:
+        logger.warning(f"Theme configuration file not found at {theme_config_path} during reload. Using existing settings.")
+
 def reload_all_content():
-    """Central function to reload all caches and rebuild navigation."""
-    global nav_builder
+    """
+    Central function to reload all caches and rebuild navigation. Accounts, pages, navigation
+    and indexes are built off to the side and published in a single content snapshot swap.
+    """
     logger.info("--- RELOADING ALL CONTENT ---")
     try:
-        theme_config_path = Path(f"{THEME_SKIN}/theme.yaml")
-        if theme_config_path.exists():
-            THEME_CONFIG.clear()
-            THEME_CONFIG.update(yaml.safe_load(theme_config_path.read_text()))
-            logger.info("Theme configuration reloaded.")
-        else:
-            logger.warning(f"Theme configuration file not found at {theme_config_path} during reload. Using existing settings.")
-
-        build_user_accounts_cache()
-        build_page_cache()
-
-        nav_builder = NavigationBuilder(PAGE_CACHE, get_page_access_by_spec_rules)
-        logger.info("NavigationBuilder rebuilt.")
+        reload_theme_config()
+
+        build_page_cache(accounts=load_user_accounts())
+        logger.info("Content snapshot published with rebuilt navigation.")
         logger.info("--- CONTENT RELOAD COMPLETE ---")
     except Exception as e:
         logger.error(f"Error during content reload: {e}", exc_info=True)
 
+def reload_changed_content(changed_paths=None):
+    """
+    Reloads only what a batch of changed paths affects (called by the file watcher).
+    Page edits are patched into a copy of the pages and the navigation tree and published as a new
+    content snapshot; a full page cache and navigation rebuild only happens when the directory
+    structure or a slug override changed. Without paths, everything is reloaded.
+    """
+    if not changed_paths:
+        reload_all_content()
+        return
+
+    logger.info(f"--- RELOADING CHANGED CONTENT ({len(changed_paths)} path(s)) ---")
+    try:
+        theme_config_path = Path(f"{THEME_SKIN}/theme.yaml").resolve()
+        accounts_dir = Path("user/accounts").resolve()
+        resolved_paths = {Path(p).resolve() for p in changed_paths}
+
+        if theme_config_path in resolved_paths:
+            reload_theme_config()
+            bump_content_generation()
+            resolved_paths.discard(theme_config_path)
+
+        if any(accounts_dir in p.parents for p in resolved_paths):
+            # Publishing the accounts starts a new generation: pages show account data (e.g. the full name), so their ETags must change
+            build_user_accounts_cache()
+            resolved_paths = {p for p in resolved_paths if accounts_dir not in p.parents}
+
+        if resolved_paths:
+            changed_slugs = update_page_cache(resolved_paths)
+            if changed_slugs is None:
+                build_page_cache()
+                logger.info("Content snapshot published with rebuilt navigation.")
+            elif changed_slugs:
+                logger.info(f"Content snapshot published with navigation updated for {len(changed_slugs)} page(s).")
+        logger.info("--- CHANGED CONTENT RELOAD COMPLETE ---")
+    except Exception as e:
+        logger.error(f"Error during incremental content reload: {e}", exc_info=True)
+
 @app.on_event("startup")
 async def startup_event():
     global observer
     logger.info("FastAPI application startup event initiated.")
     paths_to_watch = ["user/pages", "user/accounts", f"{THEME_SKIN}/theme.yaml"]
-    observer = start_watcher(paths_to_watch, reload_all_content)
+    observer = start_watcher(paths_to_watch, reload_changed_content)
     logger.info("File watcher initialized and started.")
+    start_warmup_service()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("FastAPI application shutdown event initiated.")
     if observer:
-        observer.stop()
-        observer.join()
+        stop_watcher(observer)
         logger.info("File watcher stopped.")
+    stop_warmup_service()
+    shutdown_render_executor()
     logger.info("FastAPI application shutdown complete.")
 
 
@@ -183,7 +250,7 @@ async def login_get(request: Request, message: str = None, next: str = None, acc
         logger.info("User already logged in and not facing an access error, redirecting from login page to /.")
         return RedirectResponse(url="/", status_code=303)
     
-    context = get_base_template_context(request, nav_builder)
+    context = get_base_template_context(request, get_nav_builder())
     context.update({
         "message": message,
         "page": {"title": "Login", "hero": {"enabled": False}, "sidebar": {"enabled": False, "widgets": []}, "breadcrumbs": [{"title": "Login", "url": "/login"}]},
@@ -266,7 +333,7 @@ async def user_profile(request: Request):
         minutes, _ = divmod(remainder, 60)
         time_left_parts = {"days": days, "hours": hours, "minutes": minutes}
 
-    context = get_base_template_context(request, nav_builder)
+    context = get_base_template_context(request, get_nav_builder())
     context.update({
         "login_time": login_time,
         "expires_time": expires_time,
@@ -277,59 +344,57 @@ async def user_profile(request: Request):
     return templates.TemplateResponse("profile.html.twig", context)
 
 
-# --- Main Content Route ---
-@app.get("/{page_path:path}", response_class=HTMLResponse)
-async def read_page(request: Request, page_path: str):
-    logger.debug(f"Request to read page for path: '{page_path}'")
-    page_path_from_url = page_path.lower() if page_path else sorted(PAGE_CACHE.items(), key=lambda item: item[1]['sort_key'])[0][0].lower()
-    page_path_to_load = page_path_from_url
-    logger.debug(f"Resolved page_path_to_load: '{page_path_to_load}'")
-
-    # --- Refactored Access Control ---
-    auth_manager = AuthManager()
-    access_response = auth_manager.check_access_and_get_response(request, page_path_to_load)
-    if access_response:
-        return access_response  # Immediately return the redirect if access is denied
+# --- Cache Statistics Route ---
+CACHE_STATS_ACCESS_RULES = compile_access_rules({"admin.login": True})
 
-    # Initialize container variables to avoid UnboundLocalError
-    is_container = False
-    num_columns = 1
-    list_format = 'list2'
-    show_all_children = True
-    
-    if access_response:
-        return access_response  # Immediately return the redirect if access is denied
-
-    # Initialize container variables to avoid UnboundLocalError
-    is_container = False
-    num_columns = 1
-    list_format = 'list2'
-    show_all_children = True
-    
-    # Re-define current_user as it's needed for other parts of the function (e.g., get_children_details)
+@app.get("/cache_stats")
+async def cache_stats(request: Request):
+    """Returns the counters of this worker's caches. Requires the 'admin.login' permission."""
     current_user = get_current_user(request)
-    username_log = current_user.get('username') if current_user else 'anonymous'
-    logger.debug(f"Access granted for page '{page_path_to_load}' for user '{username_log}'. Proceeding with content retrieval.")
-    
-    # --- NEW CONTAINER-FIRST LOGIC (Refactored) ---
+    if not current_user:
+        return RedirectResponse(url="/login?next=/cache_stats", status_code=303)
+    if not get_page_access_by_spec_rules(CACHE_STATS_ACCESS_RULES, current_user):
+        raise HTTPException(status_code=403, detail="Administrator access required.")
+    return {
+        "worker_pid": os.getpid(),
+        "content_generation": get_content_generation(),
+        "render_cache": get_render_cache_stats(),
+        "response_cache": get_response_cache_stats(),
+        "page_body_cache": get_page_body_cache_stats(),
+        "reloads": get_reload_metrics(),
+    }
+
+@app.get("/warmup_status")
+async def warmup_status(request: Request):
+    """Reports the progress of this worker's render cache warm-up. Requires the 'admin.login' permission."""
+    current_user = get_current_user(request)
+    if not current_user:
+        return RedirectResponse(url="/login?next=/warmup_status", status_code=303)
+    if not get_page_access_by_spec_rules(CACHE_STATS_ACCESS_RULES, current_user):
+        raise HTTPException(status_code=403, detail="Administrator access required.")
+    status = get_warmup_status()
+    status["worker_pid"] = os.getpid()
+    return status
+
+
+# --- Page View Data ---
+def resolve_page_path(page_path: str) -> str:
+    """Returns the cache key for a URL path; the empty path (site root) resolves to the first page."""
+    return page_path.lower() if page_path else sorted(PAGE_CACHE.items(), key=lambda item: item[1]['sort_key'])[0][0].lower()
+
+def build_page_view_data(page_path: str, current_user: dict = None) -> dict | None:
+    """
+    Builds the template data for a page path: the rendered page, a container index or a generated
+    index of subpages, including the slug and breadcrumbs. Returns None if nothing exists at the path.
+    Access control is the caller's responsibility. Shared by read_page and the static export.
+    """
+    nav_builder = get_nav_builder()
+    page_path_to_load = resolve_page_path(page_path)
     cached_page = PAGE_CACHE.get(page_path_to_load, {})
     page_meta = cached_page.get('page', {})
     current_user_is_logged_in = bool(current_user)
-    
-    # --- BLOG INDEX CHECK (High Priority) ---
-    if page_meta.get('blog', False) and blog_page_handler:
-        logger.info(f"Page '{page_path_to_load}' is a blog index. Handing off to blog_page_handler.")
-        return await blog_page_handler(
-            request, 
-            cached_page, 
-            page_path_to_load, 
-            page_path,
-            get_nav_builder=lambda: nav_builder,
-            get_full_page_cache=lambda: PAGE_CACHE
-        )
-    
-    is_container, num_columns, list_format, show_all_children = parse_container_config(page_meta, current_user_is_logged_in)
 
+    is_container, num_columns, list_format, show_all_children = parse_container_config(page_meta, current_user_is_logged_in)
 
     data = None
     if is_container:
@@ -350,7 +415,7 @@ async def read_page(request: Request, page_path: str):
         logger.debug(f"Page '{page_path_to_load}' is not an explicit container. Attempting to retrieve standard page data.")
         data = get_page_data(page_path_to_load)
 
-    # Fallback: if no data yet (e.g. dir without default.md), try to generate an index.
+        # Fallback: if no data yet (e.g. dir without default.md), try to generate an index.
         if not data:
             logger.debug(f"No direct page data for '{page_path_to_load}'. Attempting to generate index of subpages as a fallback.")
             children_json_list = nav_builder.get_children_details(page_path_to_load, current_user, show_all_children=show_all_children)
@@ -362,13 +427,9 @@ async def read_page(request: Request, page_path: str):
                 index_title = page_path_to_load.split('/')[-1].replace('-', ' ').capitalize() if page_path_to_load else "Root"
                 data = {"page": {"title": f"Index of {index_title}"}, "content": html_content}
                 logger.info(f"Generated index page for '{page_path_to_load}'. Title: '{index_title}'")
-        
-        if not data:
-            logger.error(f"Page '{page_path_to_load}' not found and no index could be generated. Raising 404 HTTPException.")
-            raise HTTPException(status_code=404, detail=f"Page '{page_path_to_load}' not found.")
-    if data is None:
-        logger.error(f"Failed to retrieve or generate content for page path '{page_path_to_load}'. Aborting page rendering.")
-        raise HTTPException(status_code=404, detail=f"Page '{page_path_to_load}' not found.")
+
+    if not data:
+        return None
 
     # Add slug to page data so it's available in the template context.
     # This is required for plugins like 'page-yaml' to function correctly.
@@ -379,11 +440,184 @@ async def read_page(request: Request, page_path: str):
     breadcrumbs = nav_builder.generate_breadcrumbs(page_path, data)
     data['page']['breadcrumbs'] = breadcrumbs
     logger.debug(f"Generated breadcrumbs: {breadcrumbs}")
+    return data
+
+
+# --- Conditional Requests ---
+# Validators are derived from the content itself, not from the per-process content generation: every
+# worker (and the same worker after a restart) issues the same ETag for the same content, so
+# If-None-Match hits no matter which worker answers. The content digest covers the manifest of the
+# published page files (mtime and size of every source) and the theme configuration; it is computed
+# once per content snapshot.
+# Templates and code shape every page too, but editing them does not publish a new snapshot (Jinja
+# reloads edited templates by itself) and a deploy may leave the pages as they are. The source digest
+# covers their file stats and is re-checked at most every ETAG_SOURCE_CHECK_INTERVAL seconds.
+ETAG_SOURCE_PATHS = [f"{THEME_SKIN}/templates", "user/plugin", "core", "main.py", "config.py"]
+ETAG_SOURCE_SUFFIXES = {".twig", ".html", ".py"}
+ETAG_SOURCE_CHECK_INTERVAL = 2.0
+_content_digest = (None, "")  # (snapshot version, digest)
+_source_digest = (None, "")   # (time.monotonic() of the check, digest)
+
+def _json_default(value):
+    """Serializes sets (e.g. granted permissions) in a stable order for digests."""
+    return sorted(value) if isinstance(value, (set, frozenset)) else str(value)
+
+def get_content_digest() -> str:
+    """Returns a digest of the content of the pinned snapshot, identical in every worker process."""
+    global _content_digest
+    snapshot = get_snapshot()
+    version, digest = _content_digest
+    if version != snapshot.version:
+        manifest = hashlib.sha1()
+        for file_path in sorted(snapshot.page_files):
+            mtime_ns, size = snapshot.page_files[file_path][:2]
+            manifest.update(f"{file_path}:{mtime_ns}:{size}\n".encode("utf-8"))
+        manifest.update(json.dumps(THEME_CONFIG, sort_keys=True, default=_json_default).encode("utf-8"))
+        digest = manifest.hexdigest()
+        _content_digest = (snapshot.version, digest)
+    return digest
+
+def get_source_digest() -> str:
+    """Returns a digest of the templates and code files, identical in every worker process running the same deploy."""
+    global _source_digest
+    checked_at, digest = _source_digest
+    now = time.monotonic()
+    if checked_at is None or now - checked_at >= ETAG_SOURCE_CHECK_INTERVAL:
+        stats = collect_source_file_stats(ETAG_SOURCE_PATHS, ETAG_SOURCE_SUFFIXES)
+        digest = hashlib.sha1(json.dumps(stats).encode("utf-8")).hexdigest()
+        _source_digest = (now, digest)
+    return digest
+
+def get_page_validators(page_path_to_load: str, current_user: dict = None) -> dict:
+    """
+    Returns the validator headers of a page for the given user: a strong ETag derived from the
+    content and source digests, the slug and the user's permission fingerprint (plus the username and account
+    data, since pages show who is logged in), and Last-Modified from the source file if the page has one.
+    """
+    username = current_user.get('username', '') if current_user else ''
+    account_source = json.dumps(current_user, sort_keys=True, default=_json_default) if current_user else ''
+    validator_source = (
+        f"{get_content_digest()}:{get_source_digest()}:{page_path_to_load}:"
+        f"{get_permission_fingerprint(current_user)}:{username}:{account_source}"
+    )
+    headers = {
+        "ETag": f'"{hashlib.sha1(validator_source.encode("utf-8")).hexdigest()}"',
+        "Cache-Control": "private, no-cache",
+        "Vary": "Cookie",
+    }
+    file_mtime = PAGE_CACHE.get(page_path_to_load, {}).get('file_mtime')
+    if file_mtime:
+        headers["Last-Modified"] = formatdate(file_mtime, usegmt=True)
+    return headers
+
+def page_exists(page_path_to_load: str) -> bool:
+    """Tells whether read_page would find something at the path, without rendering it."""
+    return page_path_to_load in PAGE_CACHE or page_path_to_load in get_nav_builder().parent_to_children_map
+
 
-    context = get_base_template_context(request, nav_builder)
+# --- Main Content Route ---
+def not_modified_response(request: Request, headers: dict):
+    """
+    Returns a 304 response if If-None-Match matches the page's identity ETag or the ETag of one of its
+    compressed variants (which clients store for compressed responses), otherwise None.
+    """
+    matched_etag = match_representation_etag(request.headers.get("if-none-match"), headers["ETag"])
+    if matched_etag is None:
+        return None
+    if matched_etag != headers["ETag"]:
+        headers = {**headers, "ETag": matched_etag, "Vary": f"{headers['Vary']}, Accept-Encoding"}
+    return Response(status_code=304, headers=headers)
+
+@app.head("/{page_path:path}")
+async def head_page(request: Request, page_path: str):
+    """Answers HEAD requests from the caches alone: access check, existence and validators, no rendering."""
+    page_path_to_load = resolve_page_path(page_path)
+    access_response = AuthManager().check_access_and_get_response(request, page_path_to_load)
+    if access_response:
+        return access_response
+    if not page_exists(page_path_to_load):
+        return Response(status_code=404)
+
+    headers = get_page_validators(page_path_to_load, get_current_user(request))
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    return Response(status_code=200, headers=headers, media_type="text/html")
+
+def render_page_response(request: Request, page_path: str, current_user: dict = None, headers: dict = None):
+    """
+    Renders the full HTML response of a page (synchronous, CPU-bound; read_page runs it in the
+    render executor). Raises HTTPException 404 if nothing exists at the path.
+    """
+    page_path_to_load = resolve_page_path(page_path)
+    data = build_page_view_data(page_path, current_user)
+    if not data:
+        logger.error(f"Page '{page_path_to_load}' not found and no index could be generated. Raising 404 HTTPException.")
+        raise HTTPException(status_code=404, detail=f"Page '{page_path_to_load}' not found.")
+
+    context = get_base_template_context(request, get_nav_builder())
     context.update(data)
     logger.debug("Base template context updated.")
     
     template_name = data.get("page", {}).get("template", "base.html.twig") or "base.html.twig"
     logger.debug(f"Rendering page using template: '{template_name}' for page_path: '{page_path_to_load}'.")
-    return templates.TemplateResponse(template_name, context)
+    return templates.TemplateResponse(template_name, context, headers=headers)
+
+@app.get("/{page_path:path}", response_class=HTMLResponse)
+async def read_page(request: Request, page_path: str):
+    logger.debug(f"Request to read page for path: '{page_path}'")
+    page_path_to_load = resolve_page_path(page_path)
+    logger.debug(f"Resolved page_path_to_load: '{page_path_to_load}'")
+    record_page_view(page_path_to_load) # Popularity drives the order of the render cache warm-up
+
+    # --- Anonymous Response Cache ---
+    # Served before the access check: only responses that passed it for anonymous visitors are stored.
+    response_cache_key = None
+    if get_current_user(request) is None:
+        response_cache_key = get_response_cache_key(str(request.base_url), page_path_to_load)
+        cached_response = get_cached_response(response_cache_key)
+        if cached_response:
+            logger.debug(f"Serving '{page_path_to_load}' from the response cache.")
+            return build_cached_response(cached_response, request.headers)
+
+    # --- Refactored Access Control ---
+    auth_manager = AuthManager()
+    access_response = auth_manager.check_access_and_get_response(request, page_path_to_load)
+    if access_response:
+        return access_response  # Immediately return the redirect if access is denied
+
+    # Re-define current_user as it's needed for other parts of the function (e.g., get_children_details)
+    current_user = get_current_user(request)
+    username_log = current_user.get('username') if current_user else 'anonymous'
+    logger.debug(f"Access granted for page '{page_path_to_load}' for user '{username_log}'. Proceeding with content retrieval.")
+    
+    # --- BLOG INDEX CHECK (High Priority) ---
+    cached_page = PAGE_CACHE.get(page_path_to_load, {})
+    if cached_page.get('page', {}).get('blog', False) and blog_page_handler:
+        logger.info(f"Page '{page_path_to_load}' is a blog index. Handing off to blog_page_handler.")
+        return await blog_page_handler(
+            request, 
+            cached_page, 
+            page_path_to_load, 
+            page_path,
+            get_nav_builder=get_nav_builder,
+            get_full_page_cache=lambda: PAGE_CACHE
+        )
+
+    # Conditional GET: validators are computed before any Markdown or Jinja work (and after the access check).
+    validator_headers = get_page_validators(page_path_to_load, current_user)
+    not_modified = not_modified_response(request, validator_headers)
+    if not_modified and page_exists(page_path_to_load):
+        logger.debug(f"ETag matched for '{page_path_to_load}'. Returning 304 Not Modified.")
+        return not_modified
+
+    # Markdown and template rendering run in the render executor, keeping the event loop free.
+    response = await run_in_render_executor(render_page_response, request, page_path, current_user, validator_headers)
+    if response_cache_key and is_response_cacheable(page_path_to_load):
+        # Serve the freshly stored entry, so the client already gets the negotiated compressed variant.
+        cache_entry = store_response(response_cache_key, response.body, validator_headers)
+        return build_cached_response(cache_entry, request.headers)
+    if response.status_code == 200:
+        # Without the response cache the page is still sent compressed; the variants are cached by body.
+        return build_compressed_response(response.body, validator_headers, request.headers)
+    return response
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# serve.py - Preloading multi-worker launcher
+"""
+Runs GravIT with several Uvicorn workers that share one copy of the content caches.
+
+`uvicorn main:app --workers N` imports main.py in every worker, so every worker builds and
+holds its own PAGE_CACHE, USER_ACCOUNTS_CACHE, navigation tree and plugin indexes. This
+launcher imports main.py (i.e. builds all caches and loads the plugins) once in the master
+process and only then forks the workers, which therefore start instantly and share the
+memory pages of the preloaded data copy-on-write.
+
+To keep those pages shared, the garbage collector is disabled while the caches are built and
+gc.freeze() moves every object into the permanent generation right before forking, so the
+collectors of the workers never touch (and thus never copy) the inherited objects.
+Memory that a worker writes to, e.g. the content it rebuilds after a change on disk, becomes
+private to that worker. The memory_stats plugin reports shared and private memory per worker.
+
+Usage:
+    python serve.py --uds /run/uvicorn-cms.sock --workers 4
+    python serve.py --host 127.0.0.1 --port 8000 --workers 2
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import logging
+import argparse
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# A worker that dies sooner than this after being forked is restarted only after a pause.
+MIN_WORKER_LIFETIME = 5.0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run GravIT with preloaded caches shared by forked Uvicorn workers.")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind socket to this host.")
+    parser.add_argument("--port", type=int, default=8000, help="Bind socket to this port.")
+    parser.add_argument("--uds", default=None, help="Bind to a UNIX domain socket instead of host/port.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument("--proxy-headers", action="store_true", help="Trust X-Forwarded-* headers (behind a reverse proxy).")
+    parser.add_argument("--forwarded-allow-ips", default="127.0.0.1", help="Addresses trusted to send proxy headers.")
+    return parser.parse_args()
+
+
+class PreloadLauncher:
+    """Forks and supervises the workers of one preloaded application."""
+
+    def __init__(self, cms, args):
+        self.cms = cms
+        self.args = args
+        self.config = uvicorn.Config(
+            cms.app,
+            host=args.host,
+            port=args.port,
+            uds=args.uds,
+            proxy_headers=args.proxy_headers,
+            forwarded_allow_ips=args.forwarded_allow_ips,
+            log_config=None,  # main.py has already configured logging
+        )
+        self.socket = self.config.bind_socket()
+        self.workers = {}  # pid -> fork time
+        self.stopping = False
+
+    def spawn_worker(self, replacement: bool = False):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            logger.info(f"Started worker {pid}.")
+            return
+        exit_code = 0
+        try:
+            self._run_worker(replacement)
+        except BaseException as e:
+            if not isinstance(e, (SystemExit, KeyboardInterrupt)):
+                logger.error(f"Worker {os.getpid()} failed: {e}", exc_info=True)
+                exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self, replacement: bool):
+        # Uvicorn installs its own handlers; drop the master's.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()  # The inherited, frozen objects stay out of this worker's collections.
+        if replacement:
+            # The master does not watch the filesystem, so its copy may be outdated by now.
+            self.cms.reload_all_content()
+        server = uvicorn.Server(self.config)
+        server.run(sockets=[self.socket])
+
+    def stop(self, signum=None, frame=None):
+        if not self.stopping:
+            logger.info("Stopping workers...")
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Everything allocated so far (caches, navigation, plugins, templates) becomes permanent.
+        gc.freeze()
+        logger.info(f"Preloaded application frozen ({gc.get_freeze_count()} objects). Forking {self.args.workers} worker(s).")
+        for _ in range(self.args.workers):
+            self.spawn_worker()
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            logger.info(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}.")
+            if self.stopping:
+                continue
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn_worker(replacement=True)
+
+        self.socket.close()
+        if self.args.uds and os.path.exists(self.args.uds):
+            os.remove(self.args.uds)
+        logger.info("All workers stopped.")
+
+
+def main():
+    args = parse_args()
+    # Collections in the master would only shuffle the objects the workers are going to share.
+    gc.disable()
+    import main as cms  # Builds all caches and loads the plugins (see main.py).
+    PreloadLauncher(cms, args).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
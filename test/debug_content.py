@@ -39,20 +39,22 @@ else:
 # Můj kód se už zloguje.
 
 # Vypnu cache a plugins pro tento test (dočasně):
+# get_page_data čte stránky z aktuálního snímku obsahu (core.state), proto je publikujeme jako nový snímek.
 import core.content
-core.content.PAGE_CACHE = {
+from core.state import publish_snapshot
+publish_snapshot(pages={
     'home': {
         'markdown_content': '![Gravit](gravit_code.png?resize=300&align=center)\n![Popisek obrázku](gravit_code.png?resize=100&align=center)',
         'page': {},
         'sort_key': 0,
         'file_path': '/var/www/cms.n0ip.eu/user/pages/001.Home/default.md'
     }
-}
+})
 core.content.MARKDOWN_EXTENSIONS = [] # Vypnu extension, aby nedošlo k chybám
 core.content.MARKDOWN_EXTENSION_CONFIGS = {}
 core.content.CONTENT_PROCESSORS = []
 
-print(f"DEBUG: Volám get_page_data s manuálně vytvořeným PAGE_CACHE.")
+print(f"DEBUG: Volám get_page_data s manuálně publikovanými stránkami.")
 page_data = get_page_data(PAGE_SLUG)
 
 if page_data:
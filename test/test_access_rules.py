@@ -0,0 +1,59 @@
+import sys
+import os
+import pickle
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.access import ALLOW_ALL, CompiledAccessRules, compile_access_rules, collect_granted_permissions
+from core.cache import PAGE_CACHE, USER_ACCOUNTS_CACHE, build_page_cache, build_user_accounts_cache
+from core.security import get_page_access_by_spec_rules, get_granted_permissions
+
+
+class TestAccessRules(unittest.TestCase):
+    """Testuje předkompilovaná pravidla přístupu a množiny oprávnění uživatelů."""
+
+    def test_granted_permissions_are_flattened(self):
+        access = {'site': {'login': True, 'editor': {'publish': True}, 'banned': False}, 'admin': True, 'a.b': True}
+        self.assertEqual(collect_granted_permissions(access), {'site.login', 'site.editor.publish', 'admin'})
+        self.assertEqual(collect_granted_permissions(None), frozenset())
+
+    def test_compiled_rules_decisions(self):
+        rules = compile_access_rules({'site.login': True, 'admin.login': True, 'site.banned': False, 'note': 'x'})
+        self.assertTrue(rules.allows({'site.login'}))
+        self.assertTrue(rules.allows({'admin.login'}))
+        self.assertFalse(rules.allows({'site.login', 'site.banned'}))
+        self.assertFalse(rules.allows(frozenset()))
+        # Jen negativní pravidlo: stránka je veřejná, kromě uživatelů s tímto oprávněním
+        only_negative = compile_access_rules({'site.login': False})
+        self.assertTrue(only_negative.allows(frozenset()))
+        self.assertFalse(only_negative.allows({'site.login'}))
+
+    def test_rules_without_effect_are_shared(self):
+        self.assertIs(compile_access_rules(None), ALLOW_ALL)
+        self.assertIs(compile_access_rules({'site.login': 'yes'}), ALLOW_ALL)
+        self.assertFalse(ALLOW_ALL)
+        self.assertIs(pickle.loads(pickle.dumps(ALLOW_ALL)), ALLOW_ALL)
+        rules = compile_access_rules({'site.login': True})
+        self.assertEqual(pickle.loads(pickle.dumps(rules)), rules)
+
+    def test_checker_accepts_slug_dict_and_compiled_rules(self):
+        os.environ.pop('PAGES_DIR', None)
+        build_page_cache()
+        build_user_accounts_cache()
+        user = {'username': 'u', 'access': {'admin': {'login': True}}}
+        self.assertEqual(get_granted_permissions(user), {'admin.login'})
+        for slug, entry in PAGE_CACHE.items():
+            self.assertIsInstance(entry['access_rules'], CompiledAccessRules)
+            for current_user in (None, user, *USER_ACCOUNTS_CACHE.values()):
+                expected = get_page_access_by_spec_rules(entry['access_rules'], current_user)
+                self.assertEqual(get_page_access_by_spec_rules(slug, current_user), expected)
+                self.assertEqual(get_page_access_by_spec_rules(entry['page'].get('access') or {}, current_user), expected)
+        self.assertTrue(get_page_access_by_spec_rules('neexistujici/stranka', None))
+        for account in USER_ACCOUNTS_CACHE.values():
+            self.assertEqual(account['granted_permissions'], collect_granted_permissions(account.get('access')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
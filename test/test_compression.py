@@ -0,0 +1,50 @@
+import sys
+import os
+import gzip
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from starlette.datastructures import Headers
+from core.compression import negotiate_encoding, compress_variants, variant_etag
+from core.response_cache import build_cached_response
+
+
+class TestCompression(unittest.TestCase):
+    """Testuje vyjednání Accept-Encoding a předkomprimované varianty odpovědí."""
+
+    def test_negotiation(self):
+        available = {'gzip': b''}
+        self.assertEqual(negotiate_encoding('gzip, deflate', available), 'gzip')
+        self.assertEqual(negotiate_encoding('*', available), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, deflate', available))
+        self.assertIsNone(negotiate_encoding('deflate', available))
+        self.assertIsNone(negotiate_encoding('', available))
+        self.assertIsNone(negotiate_encoding('gzip', {}))
+
+    def test_small_bodies_are_not_compressed(self):
+        self.assertEqual(compress_variants(b'<p>kratke</p>'), {})
+        body = b'<p>obsah stranky</p>' * 100
+        self.assertEqual(gzip.decompress(compress_variants(body)['gzip']), body)
+
+    def test_cached_entry_serves_negotiated_variant(self):
+        body = b'<p>obsah stranky</p>' * 100
+        entry = {"body": body, "variants": compress_variants(body), "headers": {"ETag": '"abc"', "Vary": "Cookie"}, "media_type": "text/html"}
+
+        response = build_cached_response(entry, Headers({'accept-encoding': 'gzip'}))
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['etag'], variant_etag('"abc"', 'gzip'))
+        self.assertEqual(response.headers['vary'], 'Cookie, Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.body), body)
+
+        identity = build_cached_response(entry, Headers({}))
+        self.assertNotIn('content-encoding', identity.headers)
+        self.assertEqual(identity.body, body)
+
+        not_modified = build_cached_response(entry, Headers({'accept-encoding': 'gzip', 'if-none-match': response.headers['etag']}))
+        self.assertEqual(not_modified.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,113 @@
+import sys
+import os
+import gzip
+import asyncio
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from core.cache import PAGE_CACHE, bump_content_generation
+from core.state import get_current_snapshot, publish_snapshot
+from core import response_cache
+from core.response_cache import etag_matches, COMPRESSED_PAGE_CACHE
+from config import THEME_SKIN
+from starlette.requests import Request
+
+
+def make_request(path: str, etag: str = None, accept_encoding: str = None) -> Request:
+    """Sestaví minimální anonymní požadavek, případně s hlavičkami If-None-Match a Accept-Encoding."""
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": headers, "scheme": "http", "server": ("localhost", 80), "client": ("127.0.0.1", 1),
+        "root_path": "", "http_version": "1.1", "app": main.app, "session": {},
+    })
+
+
+class TestConditionalGet(unittest.TestCase):
+    """Testuje validátory stránek (ETag, Last-Modified) a vyhodnocení If-None-Match."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Jiné testy mohou PAGE_CACHE naplnit z dočasných adresářů; načteme znovu skutečný obsah.
+        os.environ.pop('PAGES_DIR', None)
+        main.reload_all_content()
+        cls.slug = next(slug for slug, page in PAGE_CACHE.items() if page.get('markdown_content'))
+
+    def test_etag_depends_on_content_and_permissions(self):
+        admin = {'username': 'admin', 'access': {'admin': {'login': True}}}
+        anonymous_etag = main.get_page_validators(self.slug)['ETag']
+
+        self.assertEqual(main.get_page_validators(self.slug)['ETag'], anonymous_etag)
+        self.assertNotEqual(main.get_page_validators(self.slug, admin)['ETag'], anonymous_etag)
+        # Nová generace se stejným obsahem (např. v jiném workeru nebo po restartu) má stejný ETag.
+        bump_content_generation()
+        self.assertEqual(main.get_page_validators(self.slug)['ETag'], anonymous_etag)
+
+        page_files = dict(get_current_snapshot().page_files)
+        file_path = next(iter(page_files))
+        mtime_ns, size, *rest = page_files[file_path]
+        try:
+            publish_snapshot(page_files={**page_files, file_path: (mtime_ns + 1, size, *rest)})
+            self.assertNotEqual(main.get_page_validators(self.slug)['ETag'], anonymous_etag)
+        finally:
+            publish_snapshot(page_files=page_files)
+        self.assertEqual(main.get_page_validators(self.slug)['ETag'], anonymous_etag)
+
+    def test_template_edit_changes_etag(self):
+        slug = next(slug for slug, page in PAGE_CACHE.items() if page.get('markdown_content') and not page['access_rules'])
+        template = next(Path(f"{THEME_SKIN}/templates").rglob("*.twig"))
+        stat = template.stat()
+        with mock.patch.object(main, 'ETAG_SOURCE_CHECK_INTERVAL', 0):
+            etag = main.get_page_validators(slug)['ETag']
+            response = asyncio.run(main.read_page(make_request(f'/{slug}', etag), slug))
+            self.assertEqual(response.status_code, 304)
+            try:
+                os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+                response = asyncio.run(main.read_page(make_request(f'/{slug}', etag), slug))
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['etag'], etag)
+            finally:
+                os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            self.assertEqual(main.get_page_validators(slug)['ETag'], etag)
+
+    def test_rendered_page_is_compressed_without_response_cache(self):
+        self.assertFalse(response_cache.RESPONSE_CACHE_ENABLED)
+        slug = next(slug for slug, page in PAGE_CACHE.items() if page.get('markdown_content') and not page['access_rules'])
+        COMPRESSED_PAGE_CACHE.clear()
+
+        response = asyncio.run(main.read_page(make_request(f'/{slug}', accept_encoding='gzip'), slug))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['vary'])
+        identity = asyncio.run(main.read_page(make_request(f'/{slug}'), slug))
+        self.assertEqual(gzip.decompress(response.body), identity.body)
+        self.assertEqual(COMPRESSED_PAGE_CACHE.stats()['hits'], 1)  # stejné tělo se komprimuje jen jednou
+
+        # Uložený ETag komprimované varianty dostane 304 ještě před vykreslením.
+        not_modified = asyncio.run(main.read_page(make_request(f'/{slug}', response.headers['etag'], 'gzip'), slug))
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers['etag'], response.headers['etag'])
+
+    def test_last_modified_comes_from_source_file(self):
+        headers = main.get_page_validators(self.slug)
+        self.assertTrue(headers['ETag'].startswith('"'))
+        self.assertTrue(headers['Last-Modified'].endswith('GMT'))
+
+    def test_if_none_match_evaluation(self):
+        etag = '"abc"'
+        self.assertTrue(etag_matches('"abc"', etag))
+        self.assertTrue(etag_matches('"x", W/"abc"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"abcd"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,89 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import PAGE_CACHE, build_page_cache, update_page_cache, get_content_generation
+from core.state import get_snapshot, get_current_snapshot, pin_snapshot, release_snapshot
+import core.navigation  # registruje sestavení navigace pro nové snímky
+
+
+def write_page(path: Path, frontmatter: str, body: str):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'default.md').write_text(f"---\n{frontmatter}\n---\n{body}\n", encoding='utf-8')
+
+
+class TestContentSnapshots(unittest.TestCase):
+    """Testuje neměnné snímky obsahu, jejich připnutí a výměnu jedním přiřazením."""
+
+    def setUp(self):
+        self.pages_dir = Path(tempfile.mkdtemp())
+        write_page(self.pages_dir / '01.Docs', 'title: Docs', 'Dokumentace')
+        write_page(self.pages_dir / '01.Docs' / '01.Install', 'title: Install', 'Instalace')
+        os.environ['PAGES_DIR'] = str(self.pages_dir)
+        build_page_cache()
+
+    def tearDown(self):
+        del os.environ['PAGES_DIR']
+        shutil.rmtree(self.pages_dir)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = get_current_snapshot()
+        with self.assertRaises(AttributeError):
+            snapshot.pages = {}
+        with self.assertRaises(TypeError):
+            snapshot.pages['novy'] = {}
+        self.assertEqual(snapshot.version, get_content_generation())
+        self.assertEqual(set(snapshot.navigation.page_cache), set(snapshot.pages))
+
+    def test_pinned_snapshot_survives_reload(self):
+        token = pin_snapshot()
+        try:
+            pinned = get_snapshot()
+            write_page(self.pages_dir / '02.About', 'title: About', 'O nas')
+            build_page_cache()
+
+            # Požadavek s připnutým snímkem vidí stále původní stránky i navigaci
+            self.assertIs(get_snapshot(), pinned)
+            self.assertNotIn('about', PAGE_CACHE)
+            self.assertNotIn('about', get_snapshot().navigation.parent_to_children_map[get_snapshot().navigation.site_identifier])
+            self.assertIn('about', get_current_snapshot().pages)
+        finally:
+            release_snapshot(token)
+        self.assertIn('about', PAGE_CACHE)
+        self.assertIn('about', get_snapshot().navigation.parent_to_children_map[get_snapshot().navigation.site_identifier])
+
+    def test_incremental_update_is_copy_on_write(self):
+        before = get_current_snapshot()
+        md_file = self.pages_dir / '01.Docs' / '01.Install' / 'default.md'
+        write_page(md_file.parent, 'title: Instalace', 'Nova instalace')
+        self.assertEqual(update_page_cache([str(md_file)]), {'docs/install'})
+
+        after = get_current_snapshot()
+        self.assertEqual(after.version, before.version + 1)
+        self.assertEqual(before.pages['docs/install']['markdown_content'], 'Instalace')
+        self.assertEqual(after.pages['docs/install']['markdown_content'], 'Nova instalace')
+
+        old_titles = [child['title'] for child in before.navigation.get_menu_data(None)[0]['children']]
+        new_titles = [child['title'] for child in after.navigation.get_menu_data(None)[0]['children']]
+        self.assertEqual(old_titles, ['Install'])
+        self.assertEqual(new_titles, ['Instalace'])
+        self.assertIs(after.navigation.parent_to_children_map, before.navigation.parent_to_children_map)
+
+    def test_writes_through_view_publish_new_snapshot(self):
+        before = get_current_snapshot()
+        PAGE_CACHE['docs/novy'] = {'page': {}, 'markdown_content': 'x'}
+        self.assertNotIn('docs/novy', before.pages)
+        self.assertIn('docs/novy', get_current_snapshot().pages)
+        self.assertGreater(get_content_generation(), before.version)
+        del PAGE_CACHE['docs/novy']
+        self.assertNotIn('docs/novy', PAGE_CACHE)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
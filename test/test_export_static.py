@@ -0,0 +1,73 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from core.cache import PAGE_CACHE, bump_content_generation
+from core.access import compile_access_rules
+from utils import export_static
+
+
+class TestExportStatic(unittest.TestCase):
+    """Testuje statický export veřejných stránek (výběr stránek, výstup, inkrementální export)."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Jiné testy mohou PAGE_CACHE naplnit z dočasných adresářů; načteme znovu skutečný obsah.
+        os.environ.pop('PAGES_DIR', None)
+        main.reload_all_content()
+        export_static._cms = main
+
+    def setUp(self):
+        self.output_dir = Path(tempfile.mkdtemp())
+        # Stránka bez potomků, která není zároveň kořenem webu
+        root_slug = main.resolve_page_path("")
+        self.slug = next(
+            slug for slug, page in PAGE_CACHE.items()
+            if page.get('markdown_content') and slug != root_slug and slug not in main.get_nav_builder().parent_to_children_map
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_export_writes_pages_and_is_incremental(self):
+        summary = export_static.export_site(self.output_dir, "https://example.com/", workers=2)
+        self.assertEqual(summary['failed'], 0)
+        self.assertTrue((self.output_dir / 'index.html').exists())
+        self.assertIn('<html', (self.output_dir / self.slug / 'index.html').read_text(encoding='utf-8').lower())
+
+        summary = export_static.export_site(self.output_dir, "https://example.com/", workers=2)
+        self.assertEqual(summary['rendered'], 0)
+
+        original_content = PAGE_CACHE[self.slug]['markdown_content']
+        try:
+            PAGE_CACHE[self.slug]['markdown_content'] = original_content + "\n\nExportovany odstavec"
+            bump_content_generation()
+            summary = export_static.export_site(self.output_dir, "https://example.com/", workers=1)
+        finally:
+            PAGE_CACHE[self.slug]['markdown_content'] = original_content
+            bump_content_generation()
+        self.assertEqual(summary['rendered'], 1)
+        self.assertIn('Exportovany odstavec', (self.output_dir / self.slug / 'index.html').read_text(encoding='utf-8'))
+
+    def test_protected_pages_are_not_exported(self):
+        page_entry = PAGE_CACHE[self.slug]
+        # Pravidla přístupu se kompilují při sestavení cache, proto je nastavíme i zkompilovaná.
+        page_entry['page']['access'] = {'admin.login': True}
+        page_entry['access_rules'] = compile_access_rules(page_entry['page']['access'])
+        try:
+            self.assertNotIn(self.slug, export_static.collect_page_paths())
+        finally:
+            del page_entry['page']['access']
+            page_entry['access_rules'] = compile_access_rules(None)
+        self.assertIn(self.slug, export_static.collect_page_paths())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
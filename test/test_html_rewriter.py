@@ -0,0 +1,112 @@
+import sys
+import os
+import re
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main  # načte pluginy (obslužné funkce přepisu HTML)
+from core import content
+from core.cache import PAGE_CACHE
+from core.html_rewriter import rewrite_html
+from core.plugins import HTML_TAG_HANDLERS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BASE_IMAGE_PATH = "/user/pages/004.Install"
+
+ALERTS_PATTERN = re.compile(r'<p>(\|{1,4})(\+)?=(.*?)</p>', re.DOTALL)
+NOTICES_PATTERN = re.compile(r'<p>(\!{1,4})(?:(\+)=|=?)\s?(.*?)</p>', re.DOTALL)
+LEVELS = {1: 'info', 2: 'success', 3: 'warning', 4: 'danger'}
+
+
+def legacy_postprocess(html, base_image_path):
+    """Původní zpracování: regulární výrazy přes celý dokument (alerts, notices, tři průchody pro obrázky)."""
+    html = ALERTS_PATTERN.sub(lambda m: f'<div class="alert {LEVELS[len(m[1])]}{" closable" if m[2] else ""}">{m[3]}</div>', html)
+    html = NOTICES_PATTERN.sub(lambda m: f'<div class="notice {LEVELS[len(m[1])]}{" closable" if m[2] else ""}">{m[3].strip()}</div>', html)
+    if base_image_path is not None:
+        html = re.sub(r'(<img[^>]*?src=")(?!/)(?!https?://)', rf'\1{base_image_path}/', html)
+        html = content._process_image_attributes(html)
+        html = re.sub(r'(<img[^>]*?)\s*/>', r'\1>', html)
+    return html
+
+
+SAMPLES = [
+    '<p>|= info</p>\n<p>||+= success <em>x</em></p>\n<p>|||=warn\n<img alt="a" src="x.png?width=10&amp;align=center" /></p>',
+    '<p>||||= danger</p><p>|||||= pět</p><p class="x">|= atribut</p>',
+    '<p>!  mezery  </p>\n<p>!+= zavírací </p>\n<p>!!!!=d</p>\n<p>!!!!! mnoho</p>\n<p>!</p><p>! <img src="a.png"/>  </p>',
+    '<p>|= bez konce',
+    '<img src="r.png" class="k" width="3" height=\'4\' /><img src="r.png?align=right&amp;width=7" class="k l" alt="z"/>',
+    '<img alt="b" src="/abs.png" /><img src="http://e.com/x.png?width=5"><IMG src="up.png"><img alt="n" src="q.png?align=bogus">',
+    '<img\nsrc="nl.png?width=3"\n/><img data-src="/a.png" src="b.png"><!-- <img src="c.png" /> --><p><code>&lt;img src="code.png"&gt;</code></p>',
+    '',
+]
+
+
+class TestHtmlRewriter(unittest.TestCase):
+    """Testuje jednoprůchodový přepis vykresleného HTML obslužnými funkcemi značek."""
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.pop('PAGES_DIR', None)
+        main.reload_all_content()
+
+    def rewrite(self, html, base_image_path=BASE_IMAGE_PATH):
+        return rewrite_html(html, HTML_TAG_HANDLERS + content.CORE_HTML_TAG_HANDLERS, base_image_path=base_image_path)
+
+    def test_plugins_register_paragraph_handlers(self):
+        self.assertEqual([tag_name for tag_name, _ in HTML_TAG_HANDLERS], ['p', 'p'])
+
+    def test_matches_legacy_postprocessing(self):
+        for sample in SAMPLES:
+            for base_image_path in (BASE_IMAGE_PATH, None):
+                with self.subTest(sample=sample, base_image_path=base_image_path):
+                    self.assertEqual(self.rewrite(sample, base_image_path), legacy_postprocess(sample, base_image_path))
+
+    def test_pages_match_legacy_postprocessing(self):
+        pages = [page for page in PAGE_CACHE.values() if page.get('markdown_content')]
+        self.assertTrue(pages)
+        for page in pages:
+            md_parser = content.markdown.Markdown(extensions=content.MARKDOWN_EXTENSIONS, extension_configs=content.MARKDOWN_EXTENSION_CONFIGS)
+            html = md_parser.convert(page['markdown_content'])
+            base_image_path = f"/user/pages/{Path(page['file_path']).relative_to(PROJECT_ROOT / 'user' / 'pages').parent}"
+            with self.subTest(page=page['slug']):
+                self.assertEqual(self.rewrite(html, base_image_path), legacy_postprocess(html, base_image_path))
+
+    def test_render_uses_rewriter(self):
+        page = PAGE_CACHE['install']
+        _, html = content._render_page('install', dict(page, markdown_content="|+= Pozor\n\n![Logo](logo.png?width=50)"))
+        self.assertIn('<div class="alert info closable"> Pozor</div>', html)
+        self.assertIn('<img alt="Logo" src="/user/pages/004.Install/logo.png" width="50" height="auto">', html)
+
+    def test_handlers_share_one_pass(self):
+        calls = []
+
+        def mark_paragraph(tag, context):
+            calls.append(tag)
+            return '<p class="a">' if tag == '<p>' else None
+
+        def extend_class(tag, context):
+            calls.append(tag)
+            return tag.replace('"a"', f'"a {context.options["extra"]}"')
+
+        def drop_prefix(tag, context):
+            match = context.match(re.compile(r'#+ '))
+            if match and context.replace_end_tag('</h2>', strip_content=True):
+                context.skip_to(match.end())
+                return '<h2>'
+            return None
+
+        handlers = [('p', mark_paragraph), ('p', extend_class), ('div', drop_prefix)]
+        html = '<p>jedna</p><div># dva  </div><div>tři</div><span><p>čtyři</p></span>'
+        self.assertEqual(
+            rewrite_html(html, handlers, extra='b'),
+            '<p class="a b">jedna</p><h2>dva</h2><div>tři</div><span><p class="a b">čtyři</p></span>',
+        )
+        self.assertEqual(calls, ['<p>', '<p class="a">', '<p>', '<p class="a">'])
+        self.assertEqual(rewrite_html(html, []), html)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
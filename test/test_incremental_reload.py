@@ -0,0 +1,77 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import PAGE_CACHE, build_page_cache, update_page_cache, get_content_generation
+from core.navigation import NavigationBuilder
+from core.security import get_page_access_by_spec_rules
+from user.plugin.search.search_index import SearchIndex
+
+
+def write_page(path: Path, frontmatter: str, body: str):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'default.md').write_text(f"---\n{frontmatter}\n---\n{body}\n", encoding='utf-8')
+
+
+class TestIncrementalReload(unittest.TestCase):
+    """Testuje inkrementální aktualizaci PAGE_CACHE podle změněných cest."""
+
+    def setUp(self):
+        self.pages_dir = Path(tempfile.mkdtemp())
+        write_page(self.pages_dir / '01.Docs', 'title: Docs', 'Dokumentace')
+        write_page(self.pages_dir / '01.Docs' / '01.Install', 'title: Install', 'Instalace systemu')
+        write_page(self.pages_dir / '02.About', 'title: About', 'O nas')
+        (self.pages_dir / '02.About' / 'logo.png').write_bytes(b'png')
+        os.environ['PAGES_DIR'] = str(self.pages_dir)
+        build_page_cache()
+
+    def tearDown(self):
+        del os.environ['PAGES_DIR']
+        shutil.rmtree(self.pages_dir)
+
+    def test_body_change_patches_single_page(self):
+        generation = get_content_generation()
+        nav_builder = NavigationBuilder(PAGE_CACHE, get_page_access_by_spec_rules)
+        index = SearchIndex.build(PAGE_CACHE)
+
+        md_file = self.pages_dir / '01.Docs' / '01.Install' / 'default.md'
+        write_page(md_file.parent, 'title: Instalace', 'Nova instalace')
+        changed = update_page_cache([str(md_file)])
+
+        self.assertEqual(changed, {'docs/install'})
+        self.assertEqual(get_content_generation(), generation + 1)
+        self.assertEqual(PAGE_CACHE['docs/install']['markdown_content'], 'Nova instalace')
+
+        new_nav_builder = nav_builder.with_updated_pages(PAGE_CACHE, changed)
+        titles = [child['title'] for child in new_nav_builder.get_menu_data(None)[0]['children']]
+        self.assertEqual(titles, ['Instalace'])
+        old_titles = [child['title'] for child in nav_builder.get_menu_data(None)[0]['children']]
+        self.assertEqual(old_titles, ['Install'])  # původní navigace zůstala beze změny
+
+        new_index = index.with_updated_documents(PAGE_CACHE, changed)
+        self.assertIn('docs/install', new_index.search('nova'))
+        self.assertNotIn('docs/install', new_index.search('systemu'))
+        self.assertIn('docs/install', index.search('systemu'))  # původní index zůstal beze změny
+
+    def test_asset_change_is_ignored(self):
+        self.assertEqual(update_page_cache([str(self.pages_dir / '02.About' / 'logo.png')]), set())
+
+    def test_structural_changes_require_full_rebuild(self):
+        write_page(self.pages_dir / '03.New', 'title: New', 'Nova stranka')
+        self.assertIsNone(update_page_cache([str(self.pages_dir / '03.New' / 'default.md')]))
+
+        self.assertIsNone(update_page_cache([str(self.pages_dir / '01.Docs')]))
+
+        md_file = self.pages_dir / '02.About' / 'default.md'
+        write_page(md_file.parent, 'title: About\nslug: o-nas', 'O nas')
+        self.assertIsNone(update_page_cache([str(md_file)]))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+import markdown
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main  # načte pluginy (rozšíření Markdownu a procesory obsahu)
+from core import content
+from core.cache import PAGE_CACHE
+from core.plugins import MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS
+
+
+def fresh_parser_render(page_key, cached_data):
+    """Vykreslí stránku původním způsobem: nový parser pro každé vykreslení."""
+    with mock.patch.object(content, 'pooled_markdown_parser', lambda extensions, configs: _FreshParser(extensions, configs)):
+        return content._render_page(page_key, cached_data)
+
+
+class _FreshParser:
+    def __init__(self, extensions, configs):
+        self.parser = markdown.Markdown(extensions=extensions, extension_configs=configs)
+
+    def __enter__(self):
+        return self.parser
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class TestMarkdownParserPool(unittest.TestCase):
+    """Testuje znovupoužívání Markdown parserů podle efektivní konfigurace rozšíření."""
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.pop('PAGES_DIR', None)
+        main.reload_all_content()
+
+    def setUp(self):
+        content._MARKDOWN_PARSER_POOL.clear()
+
+    def test_pooled_renders_match_fresh_parsers(self):
+        pages = [(slug, page) for slug, page in PAGE_CACHE.items() if page.get('markdown_content')]
+        toc_page = dict(pages[0][1], page=dict(pages[0][1]['page'], toc={'enabled': True, 'baselevel': 2, 'headinglevel': 3}))
+        pages.append(('toc-stranka', toc_page))
+        expected = {slug: fresh_parser_render(slug, page) for slug, page in pages}
+
+        # Dvakrát dopředu i pozpátku, aby se parsery znovu použily po stránkách s jiným obsahem
+        for order in (pages, pages[::-1], pages):
+            for slug, page in order:
+                self.assertEqual(content._render_page(slug, page), expected[slug], slug)
+
+        # Při postupném vykreslování stačí jeden parser pro každou konfiguraci (TOC vypnuté, různé hloubky TOC)
+        stats = content.get_markdown_parser_pool_stats()
+        self.assertEqual(stats['idle'], stats['configurations'])
+        self.assertLess(stats['configurations'], len(pages))
+
+    def test_parsers_are_keyed_by_configuration(self):
+        configs = {k: v.copy() for k, v in MARKDOWN_EXTENSION_CONFIGS.items()}
+        toc_configs = dict(configs, toc={'toc_depth': '2-3'})
+        key = content.get_markdown_parser_key(MARKDOWN_EXTENSIONS, configs)
+        self.assertEqual(key, content.get_markdown_parser_key(list(MARKDOWN_EXTENSIONS), {k: v.copy() for k, v in configs.items()}))
+        self.assertNotEqual(key, content.get_markdown_parser_key(MARKDOWN_EXTENSIONS + ['toc'], toc_configs))
+        self.assertNotEqual(
+            content.get_markdown_parser_key(MARKDOWN_EXTENSIONS + ['toc'], toc_configs),
+            content.get_markdown_parser_key(MARKDOWN_EXTENSIONS + ['toc'], dict(configs, toc={'toc_depth': '1-6'})),
+        )
+
+    def test_checkout_is_exclusive_and_bounded(self):
+        created_before = content.MARKDOWN_PARSER_POOL_STATS['created']
+        with content.pooled_markdown_parser(['tables'], {}) as first:
+            with content.pooled_markdown_parser(['tables'], {}) as second:
+                self.assertIsNot(first, second)  # souběžné použití dostane jiný parser
+        self.assertEqual(content.MARKDOWN_PARSER_POOL_STATS['created'] - created_before, 2)
+        with content.pooled_markdown_parser(['tables'], {}) as reused:
+            self.assertIn(reused, (first, second))
+
+        with mock.patch.object(content, 'MARKDOWN_PARSER_POOL_MAX_CONFIGS', 2):
+            for depth in range(5):
+                with content.pooled_markdown_parser(['toc'], {'toc': {'toc_depth': depth + 1}}):
+                    pass
+            self.assertEqual(content.get_markdown_parser_pool_stats()['configurations'], 2)
+
+    def test_failed_parser_is_discarded(self):
+        with self.assertRaises(RuntimeError):
+            with content.pooled_markdown_parser(['tables'], {}):
+                raise RuntimeError("chyba při převodu")
+        self.assertEqual(content.get_markdown_parser_pool_stats()['idle'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,48 @@
+import sys
+import os
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import PAGE_CACHE, build_page_cache
+from core.navigation import NavigationBuilder
+from core.security import get_page_access_by_spec_rules, get_permission_fingerprint, ANONYMOUS_FINGERPRINT
+
+
+class TestNavigationCache(unittest.TestCase):
+    """Testuje memoizaci hlavního menu podle otisku oprávnění uživatele."""
+
+    def setUp(self):
+        if 'PAGES_DIR' in os.environ:
+            del os.environ['PAGES_DIR']
+        build_page_cache()
+        self.nav_builder = NavigationBuilder(PAGE_CACHE, get_page_access_by_spec_rules)
+
+    def test_fingerprint_depends_only_on_access(self):
+        user_a = {"username": "a", "access": {"site": {"login": True}}}
+        user_b = {"username": "b", "access": {"site": {"login": True}}}
+        admin = {"username": "c", "access": {"admin": {"login": True}}}
+        self.assertEqual(get_permission_fingerprint(None), ANONYMOUS_FINGERPRINT)
+        self.assertEqual(get_permission_fingerprint(user_a), get_permission_fingerprint(user_b))
+        self.assertNotEqual(get_permission_fingerprint(user_a), get_permission_fingerprint(admin))
+        self.assertNotEqual(get_permission_fingerprint(user_a), ANONYMOUS_FINGERPRINT)
+
+    def test_menu_is_memoized_per_fingerprint(self):
+        anonymous_menu = self.nav_builder.get_menu_data(None)
+        self.assertIs(self.nav_builder.get_menu_data(None), anonymous_menu)
+
+        user_menu = self.nav_builder.get_menu_data({"username": "a", "access": {"site": {"login": True}}})
+        self.assertIsNot(user_menu, anonymous_menu)
+        self.assertEqual(len(self.nav_builder._menu_cache), 2)
+
+    def test_invalidate_cache(self):
+        menu = self.nav_builder.get_menu_data(None)
+        self.nav_builder.invalidate_cache()
+        rebuilt = self.nav_builder.get_menu_data(None)
+        self.assertIsNot(rebuilt, menu)
+        self.assertEqual(rebuilt, menu)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import cache
+from core.cache import PAGE_CACHE, PAGE_FILES, PAGE_BODY_CACHE, build_page_cache, update_page_cache, get_page_body, parse_frontmatter
+from core.page_record import PageBodyRef, page_has_body
+from user.plugin.search.search_index import SearchIndex
+
+PAGES = {
+    '01.Docs': "---\ntitle: Docs\n---\n\n  Dokumentace s diakritikou: příliš žluťoučký kůň  \n\n",
+    '01.Docs/01.Install': "---\ntitle: Install\n---\nInstalace\n\n## Krok 1\n",
+    '02.Plain': "Stránka bez frontmatter\n",
+    '03.Broken': "---\ntitle: [neuzavřený\n---\nRozbitý YAML\n",
+    '04.Container': "---\ntitle: Container\ncontainer: true\n---\n",
+}
+
+
+class TestLazyPageBodies(unittest.TestCase):
+    """Testuje režim jen s metadaty: těla stránek se načítají z disku až při použití."""
+
+    def setUp(self):
+        self.pages_dir = Path(tempfile.mkdtemp())
+        for relative_dir, content in PAGES.items():
+            (self.pages_dir / relative_dir).mkdir(parents=True, exist_ok=True)
+            (self.pages_dir / relative_dir / 'default.md').write_text(content, encoding='utf-8')
+        os.environ['PAGES_DIR'] = str(self.pages_dir)
+        PAGE_BODY_CACHE.clear()
+        patcher = mock.patch.object(cache, 'PAGE_BODIES_LAZY', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        build_page_cache()
+
+    def tearDown(self):
+        del os.environ['PAGES_DIR']
+        shutil.rmtree(self.pages_dir)
+        PAGE_BODY_CACHE.clear()
+
+    def expected_body(self, relative_dir):
+        return parse_frontmatter(PAGES[relative_dir])[1]
+
+    def test_bodies_are_not_resident(self):
+        self.assertEqual(set(PAGE_CACHE), {'docs', 'docs/install', 'plain', 'broken', 'container'})
+        for page in PAGE_CACHE.values():
+            self.assertIsInstance(page.body_ref, PageBodyRef)
+        for entry in PAGE_FILES.values():
+            self.assertIsInstance(entry[3], PageBodyRef)
+        self.assertEqual(len(PAGE_BODY_CACHE), 0)
+        self.assertFalse(page_has_body(PAGE_CACHE['container']))
+        self.assertTrue(page_has_body(PAGE_CACHE['docs']))
+
+    def test_bodies_match_eager_parsing(self):
+        for relative_dir, slug in [('01.Docs', 'docs'), ('01.Docs/01.Install', 'docs/install'), ('02.Plain', 'plain'), ('03.Broken', 'broken')]:
+            self.assertEqual(PAGE_CACHE[slug]['markdown_content'], self.expected_body(relative_dir))
+        self.assertEqual(PAGE_CACHE['container'].markdown_content, '')
+        self.assertEqual(PAGE_BODY_CACHE.stats()['misses'], 5)
+        PAGE_CACHE['docs'].markdown_content
+        self.assertEqual(PAGE_BODY_CACHE.stats()['hits'], 1)
+
+    def test_body_cache_is_bounded_by_size(self):
+        body_size = sys.getsizeof(PAGE_CACHE['docs'].markdown_content)
+        PAGE_BODY_CACHE.clear()
+        with mock.patch.object(PAGE_BODY_CACHE, 'max_bytes', body_size + 1):
+            PAGE_CACHE['docs'].markdown_content
+            PAGE_CACHE['docs/install'].markdown_content
+            self.assertEqual(len(PAGE_BODY_CACHE), 1)
+            self.assertLessEqual(PAGE_BODY_CACHE.total_bytes, body_size + 1)
+
+    def test_bulk_reads_bypass_body_cache(self):
+        self.assertEqual(get_page_body(PAGE_CACHE['docs'], use_cache=False), self.expected_body('01.Docs'))
+        index = SearchIndex.build(PAGE_CACHE)
+        self.assertIn('docs/install', index.documents)
+        self.assertNotIn('container', index.documents)
+        self.assertEqual(len(PAGE_BODY_CACHE), 0)
+
+    def test_changed_file_is_read_anew(self):
+        md_file = self.pages_dir / '02.Plain' / 'default.md'
+        md_file.write_text("Delší nový obsah stránky\n", encoding='utf-8')
+        os.utime(md_file, ns=(1, 1))
+        # Před zpracováním změny se čte aktuální soubor, ne staré offsety
+        self.assertEqual(PAGE_CACHE['plain'].markdown_content, "Delší nový obsah stránky\n")
+        self.assertEqual(update_page_cache([str(md_file)]), {'plain'})
+        self.assertIsInstance(PAGE_CACHE['plain'].body_ref, PageBodyRef)
+        self.assertEqual(PAGE_CACHE['plain'].markdown_content, "Delší nový obsah stránky\n")
+
+    def test_switching_mode_reparses_files(self):
+        with mock.patch.object(cache, 'PAGE_BODIES_LAZY', False):
+            build_page_cache(reusable_files=dict(PAGE_FILES))
+            self.assertIsNone(PAGE_CACHE['docs'].body_ref)
+            self.assertEqual(PAGE_CACHE['docs']['markdown_content'], self.expected_body('01.Docs'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+import sys
+import os
+import pickle
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import _build_page_entry
+from core.page_record import PageRecord, RECORD_KEYS
+
+
+def build_record(slug='docs/install', meta=None):
+    meta = meta if meta is not None else {
+        'title': 'Instalace',
+        'date': '2024-10-28',
+        'taxonomy': {'author': 'Jan', 'tag': ['cms']},
+        'metadata': {},
+    }
+    return _build_page_entry(Path('user/pages/01.Docs/01.Install/default.md'), Path('01.Docs') / '01.Install', slug, meta, 'Obsah', 1_000_000_000)
+
+
+class TestPageRecord(unittest.TestCase):
+    """Testuje kompaktní záznam stránky v PAGE_CACHE a jeho kompatibilitu se slovníkem."""
+
+    def test_keys_match_former_entry_dict(self):
+        record = build_record()
+        self.assertIsInstance(record, PageRecord)
+        self.assertEqual(list(record), list(RECORD_KEYS) + ['_page.title', '_page.date', '_page.taxonomy.author', '_page.taxonomy.tag'])
+        self.assertEqual(len(record), len(RECORD_KEYS) + 4)
+        self.assertEqual(record['sort_key'], '01.Docs')
+        self.assertEqual(record['path_parts'], ('01.Docs', '01.Install'))
+        self.assertTrue(record['slug_path'].endswith('/docs/install'))
+        self.assertEqual(record['file_mtime'], 1.0)
+
+    def test_flattened_keys_are_lazy_view_of_meta(self):
+        record = build_record()
+        self.assertEqual(record.get('_page.taxonomy.author'), 'Jan')
+        self.assertEqual(record['_page.taxonomy.tag'], ['cms'])
+        self.assertIsNone(record.get('_page.taxonomy'))  # vnořené slovníky nejsou listy
+        self.assertNotIn('_page.metadata', record)
+        self.assertNotIn('_page.neexistuje', record)
+        record['page']['taxonomy']['author'] = 'Petr'
+        self.assertEqual(record['_page.taxonomy.author'], 'Petr')
+
+    def test_flattened_keys_with_dots_and_non_string_keys(self):
+        record = build_record(meta={'a.b': 1, 'a': {'c': 2}, 2024: {'x': 3}})
+        self.assertEqual(record['_page.a.b'], 1)
+        self.assertEqual(record['_page.a.c'], 2)
+        self.assertEqual(record['_page.2024.x'], 3)
+
+    def test_slugs_and_path_parts_are_interned(self):
+        first = build_record(slug="".join(['docs/', 'install']))
+        second = build_record(slug="".join(['docs/', 'install']))
+        self.assertIs(first.slug, second.slug)
+        self.assertIs(first.path_parts[0], second.path_parts[0])
+        self.assertIs(first['sort_key'], second.path_parts[0])
+
+    def test_writes_behave_like_dict(self):
+        record = build_record()
+        record['markdown_content'] = 'Nový obsah'
+        self.assertEqual(record.markdown_content, 'Nový obsah')
+        record['plugin_data'] = {'x': 1}
+        record['sort_key'] = 'jiny'
+        self.assertEqual(record['plugin_data'], {'x': 1})
+        self.assertEqual(record.sort_key, 'jiny')
+        self.assertIn('plugin_data', list(record))
+        del record['plugin_data']
+        self.assertNotIn('plugin_data', record)
+        with self.assertRaises(KeyError):
+            del record['title']
+        self.assertEqual(record.copy()['_page.title'], 'Instalace')
+        self.assertIsInstance(record.copy(), dict)
+
+    def test_pickle_round_trip(self):
+        record = build_record()
+        record['plugin_data'] = 1
+        restored = pickle.loads(pickle.dumps(record))
+        self.assertEqual(restored, record)
+        self.assertIs(restored.slug, sys.intern('docs/install'))
+        self.assertEqual(restored.access_rules, record.access_rules)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
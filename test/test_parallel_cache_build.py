@@ -0,0 +1,80 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import cache
+from core.cache import PAGE_CACHE, PAGE_SOURCES, PAGE_FILES, build_page_cache
+
+PAGES = {
+    '01.Docs': "---\ntitle: Docs\n---\nDokumentace\n",
+    '01.Docs/01.Install': "---\ntitle: Install\nslug: instalace\n---\nInstalace\n",
+    '01.Docs/02.Usage': "---\ntitle: Usage\naccess:\n  admin:\n    login: true\n---\nPoužití\n",
+    '01.Docs/02.Usage/01.Advanced': "---\ntitle: Advanced\n---\nPro pokročilé\n",
+    '02.Blog': "---\ntitle: Blog\ncontainer: true\n---\n",
+    '02.Blog/01.First': "---\ntitle: První\n---\nPrvní článek\n",
+    '02.Blog/02.Second': "---\ntitle: Druhý\n---\nDruhý článek\n",
+    '03.Plain': "Stránka bez frontmatter\n",
+    '04.Broken': "---\ntitle: [neuzavřený\n---\nRozbitý YAML\n",
+    '05.About': "---\ntitle: O nás\nvisible: false\n---\nO nás\n",
+}
+
+
+class TestParallelCacheBuild(unittest.TestCase):
+    """Testuje paralelní čtení stránek v procesech a záložní sériové sestavení při selhání poolu."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pages_dir = Path(tempfile.mkdtemp())
+        for relative_dir, content in PAGES.items():
+            (cls.pages_dir / relative_dir).mkdir(parents=True, exist_ok=True)
+            (cls.pages_dir / relative_dir / 'default.md').write_text(content, encoding='utf-8')
+        os.environ['PAGES_DIR'] = str(cls.pages_dir)
+        with mock.patch.object(cache, 'PAGE_CACHE_BUILD_WORKERS', 1):
+            build_page_cache()
+        cls.serial = (dict(PAGE_CACHE), dict(PAGE_SOURCES), dict(PAGE_FILES))
+
+    @classmethod
+    def tearDownClass(cls):
+        del os.environ['PAGES_DIR']
+        shutil.rmtree(cls.pages_dir)
+
+    def force_parallel_build(self):
+        """Nízký práh a 2 procesy vynutí paralelní větev i na malém stromu a na jednom CPU."""
+        for name, value in [('PAGE_CACHE_BUILD_WORKERS', 2), ('PAGE_CACHE_PARALLEL_THRESHOLD', 1), ('PAGE_CACHE_BUILD_CHUNK_SIZE', 3)]:
+            patcher = mock.patch.object(cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assert_equals_serial_build(self):
+        serial_pages, serial_sources, serial_files = self.serial
+        self.assertEqual(len(serial_pages), len(PAGES))
+        self.assertEqual(dict(PAGE_CACHE), serial_pages)
+        self.assertEqual(dict(PAGE_SOURCES), serial_sources)
+        self.assertEqual(dict(PAGE_FILES), serial_files)
+
+    def test_parallel_build_matches_serial_build(self):
+        self.force_parallel_build()
+        with mock.patch.object(cache, '_parse_files_in_parallel', wraps=cache._parse_files_in_parallel) as parallel:
+            build_page_cache()
+        parallel.assert_called_once()
+        self.assertEqual(parallel.call_args.args[1], 2)
+        self.assert_equals_serial_build()
+
+    def test_failing_pool_falls_back_to_serial_build(self):
+        self.force_parallel_build()
+        with mock.patch.object(cache, 'ProcessPoolExecutor', side_effect=OSError("pool nelze spustit")):
+            with self.assertLogs('core.cache', level='WARNING') as logs:
+                build_page_cache()
+        self.assertTrue(any("Falling back to a serial build" in line for line in logs.output))
+        self.assert_equals_serial_build()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
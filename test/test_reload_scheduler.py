@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import threading
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.file_watcher import ReloadScheduler
+
+
+class TestReloadScheduler(unittest.TestCase):
+    """Testuje sdružování událostí a trailing-edge debounce file watcheru."""
+
+    def setUp(self):
+        self.batches = []
+        self.reloaded = threading.Event()
+
+        def reload_callback(batch):
+            self.batches.append(set(batch))
+            self.reloaded.set()
+
+        self.reload_callback = reload_callback
+
+    def test_burst_is_coalesced_into_one_reload(self):
+        scheduler = ReloadScheduler(self.reload_callback, quiet_period=0.2, max_latency=5.0).start()
+        for i in range(20):
+            scheduler.submit({f"user/pages/{i}/default.md"})
+            time.sleep(0.005)
+
+        self.assertTrue(self.reloaded.wait(2.0))
+        scheduler.stop(timeout=2.0)
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(self.batches[0]), 20)
+
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics['reloads'], 1)
+        self.assertEqual(metrics['last_batch_size'], 20)
+        self.assertIsNotNone(metrics['last_duration'])
+
+    def test_max_latency_caps_continuous_events(self):
+        scheduler = ReloadScheduler(self.reload_callback, quiet_period=0.2, max_latency=0.4).start()
+        started = time.monotonic()
+        # Události přicházejí rychleji než quiet_period, reload musí přesto proběhnout.
+        while not self.reloaded.is_set() and time.monotonic() - started < 3.0:
+            scheduler.submit({"user/pages/a/default.md"})
+            time.sleep(0.05)
+        scheduler.stop(timeout=2.0)
+
+        self.assertTrue(self.reloaded.is_set())
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_stop_flushes_pending_batch(self):
+        scheduler = ReloadScheduler(self.reload_callback, quiet_period=10.0, max_latency=10.0).start()
+        scheduler.submit({"user/accounts/a.yaml"})
+        scheduler.stop(timeout=2.0)
+        self.assertEqual(self.batches, [{"user/accounts/a.yaml"}])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
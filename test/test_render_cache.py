@@ -0,0 +1,113 @@
+import sys
+import os
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import PAGE_CACHE, BoundedLRUCache, build_page_cache, get_content_generation, bump_content_generation
+from core import content
+from core.content import get_page_data, get_render_cache_stats, RENDERED_PAGE_CACHE
+
+
+class TestBoundedLRUCache(unittest.TestCase):
+    """Testuje samotnou LRU cache (kapacita, vytlačování, počítadla)."""
+
+    def test_eviction_order_and_counters(self):
+        cache = BoundedLRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'a' je nyní nejčerstvější
+        cache.put('c', 3)                    # vytlačí 'b'
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_byte_bound_eviction(self):
+        cache = BoundedLRUCache(None, max_bytes=10, weigher=len)
+        cache.put('a', b'12345')
+        cache.put('b', b'12345')
+        cache.put('c', b'123')              # překročí 10 bajtů, vytlačí 'a'
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.total_bytes, 8)
+        cache.put('d', b'12345678901')      # větší než celý limit, neuloží se
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.stats()['bytes'], 8)
+
+
+class TestRenderedPageCache(unittest.TestCase):
+    """Testuje cache vyrenderovaného HTML v get_page_data nad reálnými daty z user/pages."""
+
+    def setUp(self):
+        if 'PAGES_DIR' in os.environ:
+            del os.environ['PAGES_DIR']
+        build_page_cache()
+        self.slug = next(slug for slug, page in PAGE_CACHE.items() if page.get('markdown_content'))
+
+    def test_second_view_is_a_hit(self):
+        before = get_render_cache_stats()
+        first = get_page_data(self.slug)
+        second = get_page_data(self.slug)
+        after = get_render_cache_stats()
+
+        self.assertEqual(first['content'], second['content'])
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_returned_page_meta_is_a_copy(self):
+        data = get_page_data(self.slug)
+        data['page']['breadcrumbs'] = ['x']
+        self.assertNotIn('breadcrumbs', get_page_data(self.slug)['page'])
+        self.assertNotIn('breadcrumbs', PAGE_CACHE[self.slug]['page'])
+
+    def test_rebuild_drops_cache_and_bumps_generation(self):
+        get_page_data(self.slug)
+        generation = get_content_generation()
+        self.assertGreater(len(RENDERED_PAGE_CACHE), 0)
+
+        build_page_cache()
+
+        self.assertEqual(get_content_generation(), generation + 1)
+        self.assertEqual(len(RENDERED_PAGE_CACHE), 0)
+
+    def test_concurrent_misses_share_one_render(self):
+        bump_content_generation()  # studený start: stránka v cache není
+        original_render = content._render_page
+        calls = []
+
+        def slow_render(page_key, cached_data):
+            calls.append(page_key)
+            time.sleep(0.2)  # ostatní vlákna mezitím narazí na běžící vykreslování
+            return original_render(page_key, cached_data)
+
+        before = get_render_cache_stats()
+        results = [None] * 6
+        def worker(index):
+            results[index] = get_page_data(self.slug)
+
+        with mock.patch.object(content, '_render_page', side_effect=slow_render):
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(results))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        after = get_render_cache_stats()
+
+        self.assertEqual(calls, [self.slug])
+        self.assertTrue(all(result['content'] == results[0]['content'] for result in results))
+        self.assertEqual(after['renders'] - before['renders'], 1)
+        self.assertEqual(after['deduplicated_renders'] - before['deduplicated_renders'], len(results) - 1)
+        self.assertEqual(after['in_flight'], 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
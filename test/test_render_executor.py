@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+from pathlib import Path
+from starlette.requests import Request
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from core.cache import PAGE_CACHE, _build_page_entry, bump_content_generation
+from core.content import RENDER_EXECUTOR
+
+LARGE_SLUG = 'test-render-executor/velka-stranka'
+
+
+def make_request(path: str) -> Request:
+    """Sestaví minimální požadavek se sessionou (bez přihlášeného uživatele)."""
+    return Request({
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "scheme": "http", "server": ("localhost", 80), "client": ("127.0.0.1", 1),
+        "root_path": "", "http_version": "1.1", "app": main.app, "session": {},
+    })
+
+
+@unittest.skipIf(RENDER_EXECUTOR is None, "Render executor je v konfiguraci vypnutý.")
+class TestRenderExecutor(unittest.TestCase):
+    """Ověřuje, že vykreslení velké stránky neblokuje souběžné malé požadavky."""
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.pop('PAGES_DIR', None)
+        main.reload_all_content()
+        cls.small_slug = next(slug for slug, page in PAGE_CACHE.items()
+                              if page.get('markdown_content') and not page['access_rules'] and not page['page'].get('blog'))
+        paragraphs = "\n\n".join(f"## Nadpis {i}\n\nOdstavec *{i}* s [odkazem](/stranka-{i}) a `kódem`." for i in range(6000))
+        PAGE_CACHE[LARGE_SLUG] = _build_page_entry(Path('velka-stranka.md'), Path('test-render-executor'), LARGE_SLUG, {'title': 'Velká'}, paragraphs)
+
+    @classmethod
+    def tearDownClass(cls):
+        PAGE_CACHE.pop(LARGE_SLUG, None)
+        bump_content_generation()
+
+    def test_small_request_is_not_stalled_by_large_render(self):
+        async def scenario():
+            # Malá stránka je předem vykreslená, její požadavek tak obnáší jen šablonu.
+            await main.read_page(make_request(f'/{self.small_slug}'), self.small_slug)
+
+            started = time.perf_counter()
+            large = asyncio.create_task(main.read_page(make_request(f'/{LARGE_SLUG}'), LARGE_SLUG))
+            await asyncio.sleep(0.05) # velké vykreslování už běží ve vlákně
+            small_started = time.perf_counter()
+            small_response = await main.read_page(make_request(f'/{self.small_slug}'), self.small_slug)
+            small_latency = time.perf_counter() - small_started
+            small_finished_before_large = not large.done()
+            large_response = await large
+            return small_response, large_response, small_latency, time.perf_counter() - started, small_finished_before_large
+
+        small_response, large_response, small_latency, large_duration, small_first = asyncio.run(scenario())
+        self.assertEqual(small_response.status_code, 200)
+        self.assertEqual(large_response.status_code, 200)
+        self.assertIn(b'Nadpis 5999', large_response.body)
+        self.assertTrue(small_first, f"Malý požadavek ({small_latency:.3f} s) čekal na velký ({large_duration:.3f} s).")
+        self.assertLess(small_latency, large_duration / 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
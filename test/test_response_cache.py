@@ -0,0 +1,46 @@
+import sys
+import os
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import response_cache
+from core.cache import PAGE_CACHE, build_page_cache, bump_content_generation
+
+
+class TestResponseCache(unittest.TestCase):
+    """Testuje cache celých odpovědí pro anonymní návštěvníky."""
+
+    def setUp(self):
+        os.environ.pop('PAGES_DIR', None)
+        build_page_cache()
+        self.slug = next(iter(PAGE_CACHE))
+        response_cache.RESPONSE_CACHE_ENABLED = True
+
+    def tearDown(self):
+        response_cache.RESPONSE_CACHE_ENABLED = False
+        PAGE_CACHE[self.slug]['page'].pop('response_cache', None)
+
+    def test_entries_are_bound_to_generation(self):
+        key = response_cache.get_response_cache_key('http://test/', self.slug)
+        response_cache.store_response(key, b'<html></html>', {'ETag': '"x"'})
+        self.assertEqual(response_cache.get_cached_response(key)['body'], b'<html></html>')
+
+        bump_content_generation()
+        self.assertNotEqual(response_cache.get_response_cache_key('http://test/', self.slug), key)
+
+    def test_frontmatter_opt_out(self):
+        self.assertTrue(response_cache.is_response_cacheable(self.slug))
+        PAGE_CACHE[self.slug]['page']['response_cache'] = False
+        self.assertFalse(response_cache.is_response_cacheable(self.slug))
+
+    def test_rebuild_drops_entries(self):
+        key = response_cache.get_response_cache_key('http://test/', self.slug)
+        response_cache.store_response(key, b'abc', {})
+        build_page_cache()
+        self.assertEqual(len(response_cache.RESPONSE_CACHE), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
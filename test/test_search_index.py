@@ -0,0 +1,102 @@
+import sys
+import os
+import re
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from user.plugin.search.search_index import SearchIndex, count_phrase_matches
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Testuje invertovaný index vyhledávání nad malou syntetickou cache."""
+
+    def setUp(self):
+        page_cache = {
+            "linux": {"page": {"title": "Linux"}, "markdown_content": "Instalace Linuxu. Linux kernel a <b>Linux</b> distribuce."},
+            "windows": {"page": {"title": "Windows"}, "markdown_content": "Windows kernel je jiný kernel."},
+            "prazdna": {"page": {"title": "Prázdná"}, "markdown_content": ""},
+        }
+        self.index = SearchIndex.build(page_cache)
+
+    def test_prefix_match_is_case_insensitive(self):
+        results = self.index.search("LINU")
+        self.assertEqual(set(results), {"linux"})
+        self.assertEqual(len(results["linux"]), 3)
+        text = self.index.documents["linux"]["text"]
+        self.assertEqual([text[s:e] for s, e in results["linux"]], ["Linu", "Linu", "Linu"])
+
+    def test_word_query_matches_inside_words(self):
+        text = self.index.documents["linux"]["text"]
+        results = self.index.search("nux")
+        self.assertEqual([text[s:e] for s, e in results["linux"]], ["nux", "nux", "nux"])
+        self.assertEqual(set(self.index.search("erne")), {"linux", "windows"})
+        # V frázi smí být první slovo koncem delšího slova, stejně jako u doslovného hledání.
+        spans = self.index.search("nux kern")["linux"]
+        self.assertEqual([text[s:e] for s, e in spans], ["nux kern"])
+        self.assertEqual(set(self.index.search("nux kern")), set(self.index.search_literal("nux kern")))
+        self.assertEqual(self.index.search("linu kernel"), {})
+        self.assertEqual(count_phrase_matches("nux", "Linux a Linuxu"), 2)
+
+    def test_html_is_stripped_from_text(self):
+        self.assertNotIn("<b>", self.index.documents["linux"]["text"])
+
+    def test_phrase_requires_consecutive_words(self):
+        self.assertEqual(set(self.index.search("linux kernel")), {"linux"})
+        self.assertEqual(self.index.search("kernel linux"), {})
+        text = self.index.documents["windows"]["text"]
+        spans = self.index.search("jiný ker")["windows"]
+        self.assertEqual([text[s:e] for s, e in spans], ["jiný ker"])
+
+    def test_pattern_fallback(self):
+        results = self.index.search_pattern(re.compile(r"ker.el\.", re.IGNORECASE))
+        self.assertEqual(set(results), {"windows"})
+
+    def test_literal_query_is_case_insensitive_substring(self):
+        results = self.index.search_literal("LINUX KERNEL A <")
+        self.assertEqual(results, {})
+        results = self.index.search_literal("NEL.")
+        text = self.index.documents["windows"]["text"]
+        self.assertEqual(set(results), {"windows"})
+        self.assertEqual([text[s:e] for s, e in results["windows"]], ["nel."])
+        text = self.index.documents["linux"]["text"]
+        results = self.index.search_literal("nuxu. linux k")
+        self.assertEqual([text[s:e] for s, e in results["linux"]], ["nuxu. Linux k"])
+
+    def test_literal_query_with_length_changing_casefold(self):
+        index = SearchIndex.build({"ulice": {"page": {"title": "Ulice"}, "markdown_content": "Große Straße, C# a STRASSE."}})
+        self.assertIsNone(index.folded_texts["ulice"])
+        text = index.documents["ulice"]["text"]
+        self.assertEqual([text[s:e] for s, e in index.search_literal("straße,")["ulice"]], ["Straße,"])
+        self.assertEqual([text[s:e] for s, e in index.search_literal("c#")["ulice"]], ["C#"])
+        self.assertIsNotNone(self.index.folded_texts["linux"])
+
+    def test_pattern_match_budget(self):
+        results = self.index.search_pattern(re.compile(r"kernel", re.IGNORECASE), max_matches=2)
+        self.assertEqual(sum(len(spans) for spans in results.values()), 2)
+        with self.assertRaises(TimeoutError):
+            self.index.search_pattern(re.compile(r"\w+"), deadline=0)
+
+    def test_field_statistics(self):
+        index = SearchIndex.build({
+            "a": {"page": {"title": "Kernel Guide"}, "markdown_content": "# Kernel\n\nSome text about it."},
+        })
+        text = index.documents["a"]["text"]
+        self.assertEqual([text[s:e] for s, e in index.heading_ranges["a"]], ["Kernel"])
+        self.assertEqual(index.field_lengths["a"], (2, 1, 4))
+
+    def test_rank_prefers_title_and_heading_matches(self):
+        index = SearchIndex.build({
+            "body": {"page": {"title": "Other"}, "markdown_content": "Notes on kernel and more kernel text."},
+            "heading": {"page": {"title": "Other"}, "markdown_content": "## Kernel\n\nNotes and more text here."},
+            "title": {"page": {"title": "Kernel"}, "markdown_content": "Notes on kernel and more text."},
+            "none": {"page": {"title": "Other"}, "markdown_content": "Nothing relevant."},
+        })
+        ranked = index.rank(index.search("kernel"), lambda title: count_phrase_matches("kernel", title), limit=2)
+        self.assertEqual([slug for slug, _ in ranked], ["title", "heading"])
+        self.assertEqual(index.rank({}, lambda title: 0, limit=2), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
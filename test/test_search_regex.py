@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+from unittest import mock
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from user.plugin.search.search_index import SearchIndex
+from user.plugin.search.search_config import SEARCH_REGEX_TIME_BUDGET
+
+# Pozn.: main se importuje až v setUpClass. Pracovní procesy regexů se spouštějí metodou 'spawn',
+# která tento modul v nich načte znovu, a import main by v nich zbytečně sestavoval celý web.
+
+
+class TestSearchRegexQueries(unittest.TestCase):
+    """Ověřuje, že katastrofální regulární výraz nezablokuje smyčku událostí a je zrušen po vypršení limitu."""
+
+    @classmethod
+    def setUpClass(cls):
+        import main
+        from starlette.requests import Request
+        cls.Request = Request
+        cls.app = main.app
+        cls.search_plugin = sys.modules['search']
+        cls.endpoint = staticmethod(next(route.endpoint for route in main.app.routes if getattr(route, 'path', None) == '/search'))
+        cls.index = SearchIndex.build({
+            "aaa": {"page": {"title": "Áčka"}, "markdown_content": "a" * 40 + "b"},
+            "kernel": {"page": {"title": "Kernel"}, "markdown_content": "Linux kernel a jiný kernel."},
+        })
+
+    def make_request(self):
+        return self.Request({
+            "type": "http", "method": "GET", "path": "/search", "raw_path": b"/search", "query_string": b"",
+            "headers": [], "scheme": "http", "server": ("localhost", 80), "client": ("127.0.0.1", 1),
+            "root_path": "", "http_version": "1.1", "app": self.app, "session": {},
+        })
+
+    def search(self, query: str):
+        with mock.patch.object(self.search_plugin, 'get_search_index', return_value=self.index):
+            return asyncio.run(self.endpoint(self.make_request(), q=query))
+
+    def test_regex_query_is_resolved_in_worker(self):
+        response = self.search(r"kern.l")
+        self.assertEqual([result["slug"] for result in response.context["search_results"]], ["kernel"])
+
+    def test_invalid_pattern_is_reported(self):
+        response = self.search(r"kern(")
+        self.assertEqual(response.context["query_message"], "The search pattern is invalid.")
+
+    def test_catastrophic_pattern_is_cancelled_and_loop_stays_responsive(self):
+        self.search(r"kern.l")  # pracovní proces už běží, jeho start se do měření nezapočítá
+
+        async def scenario():
+            gaps = []
+            done = False
+
+            async def ticker():
+                last = time.perf_counter()
+                while not done:
+                    await asyncio.sleep(0.01)
+                    now = time.perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+            ticker_task = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            with mock.patch.object(self.search_plugin, 'get_search_index', return_value=self.index):
+                response = await self.endpoint(self.make_request(), q=r"(a+)+$")
+            elapsed = time.perf_counter() - started
+            done = True
+            await ticker_task
+            return response, elapsed, max(gaps)
+
+        response, elapsed, max_gap = asyncio.run(scenario())
+        self.assertEqual(response.context["query_message"], "The search pattern is too complex, please simplify it.")
+        self.assertLess(elapsed, SEARCH_REGEX_TIME_BUDGET + 0.5)
+        self.assertLess(max_gap, 0.2, f"Smyčka událostí stála {max_gap:.3f} s.")
+
+        # Zabitý pracovní proces je nahrazen novým.
+        response = self.search(r"kern.l")
+        self.assertEqual([result["slug"] for result in response.context["search_results"]], ["kernel"])
+
+
+    def test_cold_worker_start_does_not_block_loop_or_budget(self):
+        from user.plugin.search.regex_worker import RegexWorkerPool
+        pool = RegexWorkerPool(1)
+        documents = {slug: (f"Stránka {i}", "text " * 20000 + "kernel") for i, slug in enumerate(f"s{i}" for i in range(50))}
+
+        async def scenario():
+            gaps = []
+            done = False
+
+            async def ticker():
+                last = time.perf_counter()
+                while not done:
+                    await asyncio.sleep(0.005)
+                    now = time.perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+            ticker_task = asyncio.create_task(ticker())
+            # Start pracovního procesu ani přenos 5 MB textů se do rozpočtu 0,2 s nepočítají.
+            page_spans, _ = await pool.search(self.index, lambda: documents, "kernel", 1000, 0.2)
+            done = True
+            await ticker_task
+            return page_spans, max(gaps)
+
+        page_spans, max_gap = asyncio.run(scenario())
+        self.assertEqual(len(page_spans), 50)
+        self.assertLess(max_gap, 0.1, f"Smyčka událostí stála {max_gap:.3f} s.")
+        for worker in pool._idle:
+            worker.kill()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
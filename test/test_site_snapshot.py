@@ -0,0 +1,89 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import PAGE_CACHE, build_page_cache
+from core.navigation import NavigationBuilder
+from core.security import get_page_access_by_spec_rules
+from core.site_snapshot import (
+    SNAPSHOT_COMPONENT_PROVIDERS, register_snapshot_component, take_snapshot_component,
+    save_site_snapshot, restore_site_snapshot, is_snapshot_current
+)
+from user.plugin.search.search_index import SearchIndex
+
+
+def write_page(path: Path, frontmatter: str, body: str):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'default.md').write_text(f"---\n{frontmatter}\n---\n{body}\n", encoding='utf-8')
+
+
+class TestSiteSnapshot(unittest.TestCase):
+    """Testuje uložení a obnovu zkompilovaného webu (PAGE_CACHE, navigace, komponenty)."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.pages_dir = self.temp_dir / 'pages'
+        self.snapshot_path = str(self.temp_dir / 'snapshot' / 'site.pickle')
+        write_page(self.pages_dir / '01.Docs', 'title: Docs', 'Dokumentace')
+        write_page(self.pages_dir / '01.Docs' / '01.Install', 'title: Install', 'Instalace systemu')
+        write_page(self.pages_dir / '02.About', 'title: About', 'O nas')
+        os.environ['PAGES_DIR'] = str(self.pages_dir)
+
+        build_page_cache()
+        nav_builder = NavigationBuilder(PAGE_CACHE, get_page_access_by_spec_rules)
+        self.index = SearchIndex.build(PAGE_CACHE)
+        register_snapshot_component('test_index', lambda: self.index)
+        self.assertTrue(save_site_snapshot(nav_builder, self.snapshot_path))
+        self.expected_cache = {slug: dict(page) for slug, page in PAGE_CACHE.items()}
+
+    def tearDown(self):
+        SNAPSHOT_COMPONENT_PROVIDERS.pop('test_index', None)
+        take_snapshot_component('test_index')
+        del os.environ['PAGES_DIR']
+        shutil.rmtree(self.temp_dir)
+
+    def test_unchanged_tree_is_restored_without_parsing(self):
+        PAGE_CACHE.clear()
+        nav_builder = restore_site_snapshot(get_page_access_by_spec_rules, self.snapshot_path)
+
+        self.assertIsNotNone(nav_builder)
+        self.assertTrue(is_snapshot_current())
+        self.assertEqual(PAGE_CACHE, self.expected_cache)
+        self.assertEqual(nav_builder.parent_to_children_map['docs'], ['docs/install'])
+
+        index, stale_slugs = take_snapshot_component('test_index')
+        self.assertEqual(stale_slugs, set())
+        self.assertIn('docs/install', index.search('systemu'))
+
+    def test_changed_file_is_reparsed_and_reported(self):
+        write_page(self.pages_dir / '02.About', 'title: About', 'O nas a o projektu')
+        restore_site_snapshot(get_page_access_by_spec_rules, self.snapshot_path)
+
+        self.assertFalse(is_snapshot_current())
+        self.assertEqual(PAGE_CACHE['about']['markdown_content'], 'O nas a o projektu')
+        self.assertEqual(PAGE_CACHE['docs/install'], self.expected_cache['docs/install'])
+        _, stale_slugs = take_snapshot_component('test_index')
+        self.assertEqual(stale_slugs, {'about'})
+
+    def test_structural_change_drops_components(self):
+        write_page(self.pages_dir / '03.New', 'title: New', 'Nova stranka')
+        nav_builder = restore_site_snapshot(get_page_access_by_spec_rules, self.snapshot_path)
+
+        self.assertIn('new', PAGE_CACHE)
+        self.assertIn('new', nav_builder.parent_to_children_map[nav_builder.site_identifier])
+        self.assertEqual(take_snapshot_component('test_index'), (None, None))
+
+    def test_missing_or_foreign_snapshot_is_ignored(self):
+        self.assertIsNone(restore_site_snapshot(get_page_access_by_spec_rules, str(self.temp_dir / 'missing.pickle')))
+        os.environ['PAGES_DIR'] = str(self.temp_dir)
+        self.assertIsNone(restore_site_snapshot(get_page_access_by_spec_rules, self.snapshot_path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import unittest
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import build_page_cache, get_content_generation, bump_content_generation
+from core.content import RENDERED_PAGE_CACHE
+from core import warmup
+
+
+class TestWarmup(unittest.TestCase):
+    """Testuje zahřívání cache vyrenderovaných stránek podle návštěvnosti."""
+
+    def setUp(self):
+        os.environ.pop('PAGES_DIR', None)
+        build_page_cache()
+        warmup.PAGE_VIEW_COUNTS.clear()
+        self.slugs = warmup.get_warmup_order()
+
+    def tearDown(self):
+        warmup.stop_warmup_service()
+        warmup.PAGE_VIEW_COUNTS.clear()
+
+    def test_most_viewed_pages_come_first(self):
+        popular, less_popular = self.slugs[-1], self.slugs[-2]
+        for _ in range(3):
+            warmup.record_page_view(popular)
+        warmup.record_page_view(less_popular)
+        warmup.record_page_view('neexistujici/stranka')  # neexistující cesty se nepočítají
+
+        order = warmup.get_warmup_order()
+        self.assertEqual(order[:2], [popular, less_popular])
+        self.assertNotIn('neexistujici/stranka', warmup.PAGE_VIEW_COUNTS)
+        self.assertEqual(warmup.get_warmup_order(limit=1), [popular])
+
+    def test_run_warmup_fills_render_cache(self):
+        generation = get_content_generation()
+        self.assertTrue(warmup.run_warmup(cpu_budget=1.0))
+        for slug in self.slugs:
+            self.assertIn((slug.lower(), generation), RENDERED_PAGE_CACHE)
+
+        status = warmup.get_warmup_status()
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['rendered'] + status['already_cached'], len(self.slugs))
+
+        # Druhý běh už nic nevykresluje
+        self.assertTrue(warmup.run_warmup(cpu_budget=1.0))
+        self.assertEqual(warmup.get_warmup_status()['already_cached'], len(self.slugs))
+
+    def test_generation_change_cancels_warmup(self):
+        self.assertFalse(warmup.run_warmup(generation=get_content_generation() - 1, cpu_budget=1.0))
+        self.assertEqual(warmup.get_warmup_status()['state'], 'cancelled')
+
+    def test_service_warms_up_after_rebuild(self):
+        warmup.start_warmup_service()
+        bump_content_generation()
+        build_page_cache()  # přestavba vzbudí vlákno
+        generation = get_content_generation()
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            status = warmup.get_warmup_status()
+            if status['state'] == 'done' and status['generation'] == generation:
+                break
+            time.sleep(0.05)
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['generation'], generation)
+        self.assertTrue(status['running'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
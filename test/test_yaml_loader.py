@@ -0,0 +1,88 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+# Přidání kořenového adresáře projektu do PYTHONPATH pro správné importy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import cache
+from core.cache import parse_frontmatter, load_page_body, _parse_page_file
+from core.page_record import body_is_empty
+from core.yaml_loader import safe_load, SafeLoader, YAML_LIBYAML_ENABLED
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SPECIAL_PAGES = {
+    'long_frontmatter.md': "---\n" + "".join(f"key{i}: value {i}\n" for i in range(300)) + "---\nTělo\n",
+    'blank_lines_before_body.md': "---\ntitle: Mezery\n---\n" + "\n" * 100 + "  Tělo po mezerách \n\n",
+    'empty_body.md': "---\ntitle: Prázdná\ncontainer: true\n---\n" + "\n" * 50,
+    'no_frontmatter.md': "# Nadpis\n\n" + "Text bez frontmatter. " * 50,
+    'invalid_yaml.md': "---\ntitle: [neuzavřený\n---\n" + "Text po rozbitém YAML. " * 50,
+    'horizontal_rules.md': "Úvod\n\n---\n\nprostřední: část\n\n---\n\nZávěr\n",
+    'dashes_at_end.md': "---\ntitle: Konec\n----------",
+}
+
+
+class TestYamlLoader(unittest.TestCase):
+    """Testuje sdílené načítání YAML a čtení pouze hlavičky stránek."""
+
+    def test_loader_matches_pure_python_loader(self):
+        if YAML_LIBYAML_ENABLED:
+            self.assertIs(SafeLoader, yaml.CSafeLoader)
+        sources = [path.read_text(encoding='utf-8') for path in (PROJECT_ROOT / 'user' / 'accounts').glob('*.yaml')]
+        for md_file in (PROJECT_ROOT / 'user' / 'pages').rglob('default.md'):
+            match = cache.YAML_FRONTMATTER_REGEX.search(md_file.read_text(encoding='utf-8'))
+            if match:
+                sources.append(match.group(1))
+        self.assertTrue(sources)
+        for source in sources:
+            self.assertEqual(safe_load(source), yaml.safe_load(source))
+
+    def test_frontmatter_block_parse_matches_full_parse(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        files = list((PROJECT_ROOT / 'user' / 'pages').rglob('default.md'))
+        for name, content in SPECIAL_PAGES.items():
+            (temp_dir / name).write_text(content, encoding='utf-8')
+            files.append(temp_dir / name)
+
+        # Malé bloky čtení prověří i hranice mezi nimi
+        for chunk_size in (8, 64, cache.FRONTMATTER_READ_CHUNK):
+            with mock.patch.object(cache, 'FRONTMATTER_READ_CHUNK', chunk_size):
+                for md_file in files:
+                    with self.subTest(file=md_file.name, chunk_size=chunk_size):
+                        expected_meta, expected_body = parse_frontmatter(md_file.read_text(encoding='utf-8'))
+                        _, page_meta, body_ref = _parse_page_file(md_file, lazy_bodies=True)
+                        self.assertEqual(page_meta, expected_meta)
+                        self.assertEqual(body_is_empty(body_ref), not expected_body.strip())
+                        self.assertEqual(load_page_body(str(md_file), body_ref, use_cache=False), expected_body)
+
+    def test_frontmatter_block_parse_stops_after_header(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        md_file = temp_dir / 'default.md'
+        md_file.write_text("---\ntitle: Velká\n---\n" + "Odstavec textu. " * 100000, encoding='utf-8')
+        reads = []
+        original_open = open
+
+        def counting_open(*args, **kwargs):
+            handle = original_open(*args, **kwargs)
+            original_read = handle.read
+            handle.read = lambda size=-1: reads.append(size) or original_read(size)
+            return handle
+
+        with mock.patch('builtins.open', counting_open):
+            _, page_meta, body_ref = _parse_page_file(md_file, lazy_bodies=True)
+        self.assertEqual(page_meta, {'title': 'Velká'})
+        self.assertIsNone(body_ref.length)
+        self.assertEqual(reads, [cache.FRONTMATTER_READ_CHUNK])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,6 +1,7 @@
 # user/plugin/memory_stats/memory_stats.py
 
 import os
+import gc
 import sys
 import json
 import logging
@@ -23,7 +24,11 @@ STATS_DIR = "/tmp/cms_memory_stats/"
 logger = logging.getLogger(__name__)
 
 def get_size(obj, seen=None):
-    """Rekurzivně zjišťuje velikost objektu v bajtech."""
+    """
+    Rekurzivně zjišťuje velikost objektu v bajtech.
+    Objekty se __slots__ (např. PageRecord položky PAGE_CACHE) se měří podle hodnot svých slotů,
+    ne podle toho, co vrací jejich iterace (u PageRecord jsou to i líně dopočítané klíče '_page.*').
+    """
     if seen is None:
         seen = set()
     obj_id = id(obj)
@@ -34,18 +39,61 @@ def get_size(obj, seen=None):
     if isinstance(obj, dict):
         size += sum(get_size(v, seen) for v in obj.values())
         size += sum(get_size(k, seen) for k in obj.keys())
-    elif hasattr(obj, '__dict__'):
+        return size
+    slot_names = _get_slot_names(type(obj))
+    if slot_names:
+        size += sum(get_size(getattr(obj, name), seen) for name in slot_names if hasattr(obj, name))
+    if hasattr(obj, '__dict__'):
         size += get_size(obj.__dict__, seen)
-    elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, bytearray)):
+    elif not slot_names and hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, bytearray)):
         size += sum(get_size(i, seen) for i in obj)
     return size
 
+def _get_slot_names(cls) -> tuple:
+    """Vrací názvy všech slotů třídy včetně zděděných (bez __dict__ a __weakref__)."""
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(name for name in slots if name not in ('__dict__', '__weakref__'))
+    return tuple(names)
+
+def _get_process_memory() -> Dict[str, Any]:
+    """
+    Zjistí paměť aktuálního procesu v MB.
+    - rss: celková rezidentní paměť,
+    - uss: privátní paměť (uvolní se při ukončení procesu),
+    - pss: paměť se sdílenými stránkami rozpočítanými mezi procesy, které je sdílí,
+    - shared: rezidentní paměť sdílená s jinými procesy (rss - uss), např. cache předem
+      načtená v master procesu (serve.py) a zděděná workery přes fork.
+    """
+    process = psutil.Process()
+    try:
+        info = process.memory_full_info()
+        uss = info.uss
+        pss = getattr(info, 'pss', None)
+    except (psutil.AccessDenied, AttributeError):
+        info = process.memory_info()
+        uss = None
+        pss = None
+
+    to_mb = lambda value: round(value / (1024 * 1024), 2) if value is not None else None
+    return {
+        "rss_mb": to_mb(info.rss),
+        "uss_mb": to_mb(uss),
+        "pss_mb": to_mb(pss),
+        "shared_mb": to_mb(info.rss - uss) if uss is not None else None,
+        "frozen_objects": gc.get_freeze_count(),
+    }
+
 def _update_my_stats():
     """Vypočítá a zapíše statistiky pro aktuální worker do jeho souboru."""
     global _last_update_time
     os.makedirs(STATS_DIR, exist_ok=True)
     pid = os.getpid()
-    page_cache = _page_cache_getter() if _page_cache_getter else {}
+    # PAGE_CACHE je pohled na aktuální snímek obsahu; měříme obyčejný slovník se stejnými položkami.
+    page_cache = dict(_page_cache_getter().items()) if _page_cache_getter else {}
     
     cache_size_bytes = get_size(page_cache)
     cache_size_mb = round(cache_size_bytes / (1024 * 1024), 2)
@@ -57,6 +105,7 @@ def _update_my_stats():
         "item_count": item_count,
         "last_updated": time.time()
     }
+    worker_stats.update(_get_process_memory())
     
     my_stats_file = os.path.join(STATS_DIR, f"cms_stats_{pid}.json")
     try:
@@ -125,17 +174,29 @@ def register_routes(app, get_full_page_cache):
         if not all_stats:
             html += "<p>Zatím nebyly nasbírány žádné statistiky. Obnovte stránku za chvíli.</p>"
         else:
-            html += "<table><tr><th>Worker PID</th><th>Počet položek v cache</th><th>Velikost cache (MB)</th><th>Poslední aktualizace</th></tr>"
+            html += "<table><tr><th>Worker PID</th><th>Počet položek v cache</th><th>Velikost cache (MB)</th>"
+            html += "<th>RSS (MB)</th><th>Sdílená (MB)</th><th>Privátní USS (MB)</th><th>PSS (MB)</th><th>Zmrazené objekty</th><th>Poslední aktualizace</th></tr>"
             total_size = 0
+            total_private = 0
+            total_pss = 0
             sorted_pids = sorted(all_stats.keys(), key=lambda x: int(x))
             
             for pid in sorted_pids:
                 stats = all_stats[pid]
                 last_updated_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.get('last_updated', 0)))
-                html += f"<tr><td>{stats['pid']}</td><td>{stats['item_count']}</td><td>{stats['cache_size_mb']}</td><td>{last_updated_str}</td></tr>"
+                memory_cells = "".join(
+                    f"<td>{stats.get(key) if stats.get(key) is not None else '-'}</td>"
+                    for key in ("rss_mb", "shared_mb", "uss_mb", "pss_mb", "frozen_objects")
+                )
+                html += f"<tr><td>{stats['pid']}</td><td>{stats['item_count']}</td><td>{stats['cache_size_mb']}</td>{memory_cells}<td>{last_updated_str}</td></tr>"
                 total_size += stats['cache_size_mb']
+                total_private += stats.get('uss_mb') or 0
+                total_pss += stats.get('pss_mb') or 0
             html += "</table>"
             html += f"<h3>Celková velikost všech cachí: {round(total_size, 2)} MB</h3>"
+            html += f"<p>Privátní paměť všech workerů (USS): {round(total_private, 2)} MB, "
+            html += f"skutečně obsazená paměť (součet PSS): {round(total_pss, 2)} MB. "
+            html += "Sdílená paměť pochází z cache načtené jednou v master procesu (spuštění přes serve.py).</p>"
             html += f"<p>Počet aktivních workerů: {len(all_stats)}</p>"
         
         html += f"<p><small>Zobrazeno workerem s PID: {os.getpid()}.</small></p>"
@@ -0,0 +1,187 @@
+# user/plugin/search/regex_worker.py
+"""
+Out-of-process execution of regular expression search queries.
+
+CPython's re module holds the GIL for the whole of a single match, so a pathological pattern
+(e.g. "(a+)+$") stalls every thread of the process, the event loop included, and cannot be
+interrupted. Regex queries therefore run in separate worker processes, each holding a copy of
+the titles and texts of the search index it last received. A query that exceeds its time budget
+gets its worker killed; a fresh one is started for the next query.
+
+Workers are spawned on first use, so a preloading master that never searches starts none, and
+this module imports nothing heavier than the standard library and the search configuration
+(spawned workers import it anew). Starting a worker and sending it the documents happen in an
+executor thread, off the event loop, and do not count against the query's time budget.
+"""
+import re
+import time
+import asyncio
+import weakref
+import functools
+import multiprocessing
+from user.plugin.search.search_config import SEARCH_PATTERN_CACHE_SIZE
+
+# Seconds a freshly spawned worker may take to start; its first query's budget starts afterwards.
+WORKER_START_GRACE = 5.0
+
+
+def count_pattern_matches(pattern, text: str) -> int:
+    """Counts the non-empty matches of a compiled pattern in text."""
+    return sum(1 for match in pattern.finditer(text) if match.end() > match.start())
+
+
+def scan_pattern(texts, pattern, max_matches: int = None, deadline: float = None) -> dict:
+    """
+    Scans (slug, text) pairs with a compiled pattern. Returns {slug: [(start, end), ...]}.
+    The scan stops after max_matches matches in total. Past deadline (a time.monotonic() value,
+    checked between matches) it raises TimeoutError.
+    """
+    results = {}
+    remaining = max_matches
+    for slug, text in texts:
+        spans = []
+        for match in pattern.finditer(text):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Pattern scan exceeded its time budget at page '{slug}'.")
+            if match.end() > match.start():
+                spans.append(match.span())
+                if remaining is not None and len(spans) >= remaining:
+                    break
+        if spans:
+            results[slug] = spans
+            if remaining is not None:
+                remaining -= len(spans)
+                if remaining <= 0:
+                    break
+    return results
+
+
+@functools.lru_cache(maxsize=SEARCH_PATTERN_CACHE_SIZE)
+def _compile(query: str):
+    return re.compile(query, re.IGNORECASE)
+
+
+def _worker_main(connection):
+    """
+    Worker process loop. Announces ("ready",) once started, then handles the messages:
+      ("documents", {slug: (title, text)})             -> replaces the documents, replies ("loaded",)
+      ("search", query, max_matches, time_budget)      -> ("ok", page_spans, {title: count}) or ("error", message)
+    """
+    documents = {}
+    connection.send(("ready",))
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message[0] == "documents":
+            documents = message[1]
+            connection.send(("loaded",))
+            continue
+        _, query, max_matches, time_budget = message
+        try:
+            pattern = _compile(query)
+            deadline = time.monotonic() + time_budget
+            page_spans = scan_pattern(((slug, text) for slug, (_, text) in documents.items()), pattern, max_matches, deadline)
+            title_matches = {}
+            for slug in page_spans:
+                title = documents[slug][0]
+                if title not in title_matches:
+                    title_matches[title] = count_pattern_matches(pattern, title)
+            reply = ("ok", page_spans, title_matches)
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        connection.send(reply)
+
+
+class RegexWorker:
+    """One worker process and the parent's end of its pipe. Used by one query at a time."""
+    def __init__(self):
+        context = multiprocessing.get_context('spawn')
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True, name="search-regex")
+        self.process.start()
+        child_connection.close()
+        self.documents_owner = None  # weak reference to the object whose documents the worker holds
+        self.ready = False
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def _expect(self, reply: str, timeout: float):
+        if not self.connection.poll(timeout) or self.connection.recv()[0] != reply:
+            raise RuntimeError(f"Regex worker did not answer '{reply}' in time.")
+
+    def prepare(self, owner, load_documents):
+        """
+        Waits for the worker to start and sends it the documents of owner if it does not hold them yet.
+        Blocks; call it off the event loop. Not part of a query's time budget.
+        """
+        if not self.ready:
+            self._expect("ready", WORKER_START_GRACE)
+            self.ready = True
+        if self.documents_owner is None or self.documents_owner() is not owner:
+            self.documents_owner = None
+            self.connection.send(("documents", load_documents()))
+            self._expect("loaded", WORKER_START_GRACE)
+            self.documents_owner = weakref.ref(owner)
+
+    def run(self, query: str, max_matches: int, time_budget: float):
+        """
+        Sends the query to a prepared worker and waits for the reply at most time_budget seconds.
+        Blocks; call it off the event loop. Returns (page_spans, title_matches); raises TimeoutError or RuntimeError.
+        """
+        self.connection.send(("search", query, max_matches, time_budget))
+        # Waiting on the pipe releases the GIL; the scan itself runs in the other process.
+        if not self.connection.poll(time_budget):
+            raise TimeoutError(f"Search pattern '{query}' exceeded its time budget.")
+        status, *payload = self.connection.recv()
+        if status != "ok":
+            if payload[0].startswith("TimeoutError"):
+                raise TimeoutError(payload[0])
+            raise RuntimeError(payload[0])
+        return tuple(payload)
+
+
+class RegexWorkerPool:
+    """
+    Up to size worker processes shared by the regex queries of this process. A query waits for an
+    idle worker as part of its time budget; a worker whose query timed out or failed is killed.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = []
+        self._available = None  # asyncio.Semaphore, created in the running loop
+
+    async def search(self, owner, load_documents, query: str, max_matches: int, time_budget: float):
+        """
+        Runs a regex query in a worker process over the documents of owner (e.g. a search index);
+        load_documents() returns them as {slug: (title, text)} when the worker does not hold them yet.
+        Returns (page_spans, title_matches). Raises TimeoutError when the query (including waiting for
+        a busy worker, but not starting one or sending it the documents) exceeds time_budget.
+        """
+        if self._available is None:
+            self._available = asyncio.Semaphore(self.size)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._available.acquire(), timeout=time_budget)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No regex worker became available for '{query}'.") from None
+        remaining = max(time_budget - (time.monotonic() - started), 0.0)
+        loop = asyncio.get_running_loop()
+        worker = self._idle.pop() if self._idle else None
+        try:
+            if worker is None:
+                # Spawning an interpreter blocks, so it happens in an executor thread too.
+                worker = await loop.run_in_executor(None, RegexWorker)
+            await loop.run_in_executor(None, worker.prepare, owner, load_documents)
+            result = await loop.run_in_executor(None, worker.run, query, max_matches, remaining)
+            self._idle.append(worker)
+            worker = None
+            return result
+        finally:
+            if worker is not None:
+                worker.kill()
+            self._available.release()
@@ -1,9 +1,19 @@
 import re
 import logging
+import functools
 from fastapi import Request
 from fastapi.templating import Jinja2Templates
-from markupsafe import Markup
-from bs4 import BeautifulSoup  # Import BeautifulSoup
+from markupsafe import Markup, escape
+from core.state import get_snapshot, get_current_snapshot, register_snapshot_index
+from core.site_snapshot import register_snapshot_component, take_snapshot_component
+from user.plugin.search.search_index import (
+    SearchIndex,
+    PLAIN_QUERY_REGEX,
+    REGEX_SYNTAX_REGEX,
+    count_phrase_matches,
+    count_literal_matches
+)
+from user.plugin.search.regex_worker import RegexWorkerPool
 from user.plugin.search.search_config import (
     SEARCH_RESULTS_COUNT, 
     SEARCH_RELEVANT_RESULTS, 
@@ -12,15 +22,66 @@ from user.plugin.search.search_config import (
     PAGE_TREE_TITLE,
     PAGE_TREE_ALL_VISIBLE,
     SNIPPET_PRE_LENGTH,
-    SNIPPET_POST_LENGTH
+    SNIPPET_POST_LENGTH,
+    SEARCH_PATTERN_CACHE_SIZE,
+    SEARCH_REGEX_TIME_BUDGET,
+    SEARCH_REGEX_MAX_MATCHES,
+    SEARCH_REGEX_WORKERS
 )
 
 logger = logging.getLogger(__name__)
 
 
-def _get_word_aware_snippet(text: str, start: int, end: int, query: str) -> str:
+# The index lives in the content snapshot (core.state) under this name: it is rebuilt (not mutated)
+# for every new set of pages and published together with them.
+SEARCH_INDEX_NAME = 'search'
+
+
+def _build_search_index(page_cache, previous_index=None, changed_slugs=None):
+    """Builds the index, or re-indexes only changed_slugs of the previous one after an incremental cache update."""
+    if changed_slugs is None or previous_index is None:
+        return SearchIndex.build(page_cache)
+    if changed_slugs:
+        return previous_index.with_updated_documents(page_cache, changed_slugs)
+    return previous_index
+
+def get_search_index():
+    """Returns the search index of the content snapshot pinned by the running request."""
+    return get_snapshot().indexes.get(SEARCH_INDEX_NAME)
+
+
+# --- Regular Expression Queries ---
+# CPython's re holds the GIL for the whole of a single match, so regex queries are not run in this
+# process: a pathological pattern would freeze the event loop. They run in up to SEARCH_REGEX_WORKERS
+# worker processes (regex_worker) holding a copy of the index texts; a query still running after
+# SEARCH_REGEX_TIME_BUDGET seconds gets its worker killed. Patterns are compiled here first, only to
+# reject invalid ones before a worker is involved.
+SEARCH_REGEX_WORKER_POOL = RegexWorkerPool(SEARCH_REGEX_WORKERS)
+
+
+@functools.lru_cache(maxsize=SEARCH_PATTERN_CACHE_SIZE)
+def _compile_query_pattern(query: str):
+    """Compiles a regex query (case-insensitive); raises re.error for invalid patterns."""
+    return re.compile(query, re.IGNORECASE)
+
+
+async def _search_with_pattern(search_index, query: str) -> list:
+    """
+    Resolves a regex query in a worker process and returns its ranked results.
+    Raises re.error for invalid patterns and TimeoutError when the query exceeds its time budget.
+    """
+    _compile_query_pattern(query)
+    page_spans, title_matches = await SEARCH_REGEX_WORKER_POOL.search(
+        search_index, search_index.pattern_documents, query, SEARCH_REGEX_MAX_MATCHES, SEARCH_REGEX_TIME_BUDGET
+    )
+    return search_index.rank(page_spans, lambda title: title_matches.get(title, 0), SEARCH_RELEVANT_RESULTS)
+
+
+def _get_word_aware_snippet(text: str, start: int, end: int, spans: list) -> tuple:
     """
     Generates a word-aware snippet around the matched term.
+    All match spans falling inside the snippet are highlighted.
+    Returns (snippet_html, snippet_start, snippet_end).
     """
     text_length = len(text)
     
@@ -36,22 +97,30 @@ def _get_word_aware_snippet(text: str, start: int, end: int, query: str) -> str:
     while snippet_end < text_length and text[snippet_end].isalnum():
         snippet_end += 1
 
-    snippet = text[snippet_start:snippet_end]
-    
-    # Highlight the query within the snippet
-    # Using re.sub with a lambda to handle potential multiple matches and case-insensitivity
-    highlighted_snippet = re.sub(
-        re.escape(query),
-        lambda match: f"<mark>{match.group(0)}</mark>",
-        snippet,
-        flags=re.IGNORECASE
-    )
-    
-    return highlighted_snippet
+    # Highlight the matches using their stored offsets
+    parts = []
+    cursor = snippet_start
+    for match_start, match_end in spans:
+        if match_start < cursor or match_end > snippet_end:
+            continue
+        parts.append(escape(text[cursor:match_start]))
+        parts.append(f"<mark>{escape(text[match_start:match_end])}</mark>")
+        cursor = match_end
+    parts.append(escape(text[cursor:snippet_end]))
+
+    return "".join(parts), snippet_start, snippet_end
 
 
 def register_routes(app, templates, theme_config, cms_theme, get_nav_builder, get_active_plugins, get_full_page_cache):
 
+    # Take the index over from the site snapshot if there is one (refreshing pages changed since),
+    # otherwise build it for the already loaded pages. Every later content snapshot gets its own.
+    snapshot_index, stale_slugs = take_snapshot_component('search_index')
+    if snapshot_index is not None and stale_slugs:
+        snapshot_index = _build_search_index(get_full_page_cache(), snapshot_index, stale_slugs)
+    register_snapshot_index(SEARCH_INDEX_NAME, _build_search_index, snapshot_index)
+    register_snapshot_component('search_index', lambda: get_current_snapshot().indexes.get(SEARCH_INDEX_NAME))
+
     @app.get("/search/config")
     async def search_config():
         """
@@ -102,77 +171,48 @@ def register_routes(app, templates, theme_config, cms_theme, get_nav_builder, ge
 
         # --- Branch 2: Perform Standard Search ---
         try:
-            page_cache = get_full_page_cache()
-            all_page_matches = []
-            search_pattern = re.compile(q, re.IGNORECASE)
-            
-            for slug, page_data in page_cache.items():
-                html_content = page_data.get("markdown_content", "")
-                if not html_content: continue
-
-                # Use BeautifulSoup to get clean, searchable text from the HTML content.
-                soup = BeautifulSoup(html_content, "html.parser")
-                clean_text = soup.get_text()
-
-                page_title = page_data['page'].get("title", slug.capitalize())
-                # Perform the search on the clean text, not the raw HTML.
-                matches = list(search_pattern.finditer(clean_text))
-                
-                if matches:
-                    all_page_matches.append({
-                        "slug": slug, "title": page_title,
-                        "matches": matches,
-                        "clean_content": clean_text  # Pass the clean text for snippet generation
-                    })
-
-            all_page_matches.sort(key=lambda x: len(x["matches"]), reverse=True)
-            all_page_matches = all_page_matches[:SEARCH_RELEVANT_RESULTS]
+            search_index = get_search_index()
+            try:
+                if PLAIN_QUERY_REGEX.match(q):
+                    all_page_matches = search_index.rank(
+                        search_index.search(q), functools.partial(count_phrase_matches, q), SEARCH_RELEVANT_RESULTS
+                    )
+                elif not REGEX_SYNTAX_REGEX.search(q):
+                    all_page_matches = search_index.rank(
+                        search_index.search_literal(q), functools.partial(count_literal_matches, q), SEARCH_RELEVANT_RESULTS
+                    )
+                else:
+                    all_page_matches = await _search_with_pattern(search_index, q)
+            except (re.error, TimeoutError) as e:
+                logger.warning(f"Search query '{q}' rejected: {e}")
+                return templates.TemplateResponse("partials/search-results.html.twig", {
+                    "request": request, "search_query": q, "search_results": [],
+                    "query_message": "The search pattern is invalid." if isinstance(e, re.error)
+                                     else "The search pattern is too complex, please simplify it.",
+                    "active_plugin_names": get_active_plugins()
+                })
 
             search_results = []
-            for page_match_data in all_page_matches:
+            for slug, spans in all_page_matches:
+                document = search_index.documents[slug]
                 snippets = []
-                processed_snippet_areas = []
-                for match in page_match_data["matches"]:
+                covered_until = -1
+                for start, end in spans:
                     if len(snippets) >= SEARCH_RESULTS_COUNT:
                         break
-
-                    start, end = match.span()
-
-                    is_overlapping = False
-                    # Check for overlapping snippets based on match area to avoid redundant snippets
-                    # We are only checking if the *match itself* overlaps with a *previously processed snippet area*.
-                    # This is not checking if the *new snippet area* overlaps with *previous snippet areas*.
-                    # The purpose is to ensure that each match contributes to a snippet only once,
-                    # and that we don't generate snippets for matches that fall entirely within
-                    # an already covered snippet.
-                    for proc_start, proc_end in processed_snippet_areas:
-                        # Check if the current match's span (start, end) overlaps with
-                        # any of the previously processed snippet areas.
-                        if max(start, proc_start) < min(end, proc_end):
-                            is_overlapping = True
-                            break
-                    
-                    if is_overlapping:
+                    # Skip matches already shown inside a previous snippet.
+                    if start < covered_until:
                         continue
 
-                    # Generate the word-aware snippet
-                    highlighted_snippet = _get_word_aware_snippet(
-                        page_match_data["clean_content"], start, end, q
+                    highlighted_snippet, _, snippet_end = _get_word_aware_snippet(
+                        document["text"], start, end, spans
                     )
                     snippets.append(Markup(highlighted_snippet))
-                    
-                    # Store the *actual* start and end of the generated snippet for overlap checking
-                    # This ensures that subsequent matches don't generate snippets that significantly overlap
-                    # with the current one, even if the match itself is not fully contained.
-                    cleaned_snippet = re.sub(r'<[^>]+>', '', highlighted_snippet)
-                    snippet_start_actual = page_match_data["clean_content"].find(cleaned_snippet)
-                    if snippet_start_actual != -1:
-                        snippet_end_actual = snippet_start_actual + len(cleaned_snippet)
-                        processed_snippet_areas.append((snippet_start_actual, snippet_end_actual))
+                    covered_until = snippet_end
                 
                 if snippets:
                     search_results.append({
-                        "slug": page_match_data["slug"], "title": page_match_data["title"],
+                        "slug": slug, "title": document["title"],
                         "snippets": snippets
                     })
 
@@ -9,3 +9,14 @@ PAGE_TREE_TITLE = "Sitemap" # The title of the page tree view
 # Snippet Generation Configuration
 SNIPPET_PRE_LENGTH = 150
 SNIPPET_POST_LENGTH = 150
+
+# Regular Expression Queries
+SEARCH_PATTERN_CACHE_SIZE = 128  # Compiled query patterns kept for repeated (e.g. live-typed) queries
+SEARCH_REGEX_TIME_BUDGET = 0.5   # Seconds a regex query may run before it is cancelled
+SEARCH_REGEX_MAX_MATCHES = 5000  # Matches collected per regex query before the scan stops
+SEARCH_REGEX_WORKERS = 2         # Worker processes running regex queries (at most this many at the same time)
+
+# Relevance Ranking (BM25)
+SEARCH_BM25_K1 = 1.2  # Term frequency saturation
+SEARCH_BM25_B = 0.75  # Strength of the page length normalization (0 = none, 1 = full)
+SEARCH_FIELD_BOOSTS = {"title": 3.0, "headings": 2.0, "body": 1.0}  # Weight of a match in each field
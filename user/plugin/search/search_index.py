@@ -0,0 +1,355 @@
+# user/plugin/search/search_index.py
+"""
+Token-level inverted index for the search plugin.
+
+The index is built once per page cache build. For every page it stores the clean,
+searchable text (what BeautifulSoup used to extract on every query) together with the
+character offsets of each token, and for every term a positional posting list
+(slug -> token positions). Queries are resolved against the postings, and snippets are
+cut from the stored text using the stored offsets, so a query only touches the pages
+that actually contain its terms.
+Every page also keeps its field statistics (token counts of the title, headings and body, and the
+heading ranges of its text), from which search results are ranked with BM25.
+The index never needs the page bodies afterwards: in the metadata-only page cache mode the bodies
+are streamed from disk while indexing, without filling the page body cache.
+"""
+import re
+import math
+import heapq
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from bs4 import BeautifulSoup
+from core.cache import get_page_body
+from core.page_record import page_has_body
+from user.plugin.search.regex_worker import scan_pattern
+from user.plugin.search.search_config import SEARCH_BM25_K1, SEARCH_BM25_B, SEARCH_FIELD_BOOSTS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REGEX = re.compile(r'\w+')
+# Queries consisting only of word characters and whitespace are resolved through the index.
+PLAIN_QUERY_REGEX = re.compile(r'^[\w\s]+$')
+# Other queries without regex syntax (e.g. "e-mail", "C#") are matched as literal substrings;
+# the rest are regular expressions.
+REGEX_SYNTAX_REGEX = re.compile(r'[.^$*+?{}\[\]\\|()]')
+# Markdown ATX headings ("## Title") in the searchable text; group 1 is the heading text.
+HEADING_REGEX = re.compile(r'^ {0,3}#{1,6}[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+FIELDS = ("title", "headings", "body")
+
+
+def normalize_term(token: str) -> str:
+    """Normalizes a token into an index term (case-insensitive)."""
+    return token.casefold()
+
+
+def extract_search_text(markdown_content: str) -> str:
+    """Returns the clean, searchable text of a page's content."""
+    return BeautifulSoup(markdown_content, "html.parser").get_text()
+
+
+def count_phrase_matches(query: str, text: str) -> int:
+    """Counts the occurrences of a plain word query in text, with the semantics of SearchIndex.search()."""
+    query_terms = [normalize_term(t) for t in TOKEN_REGEX.findall(query)]
+    terms = [normalize_term(t) for t in TOKEN_REGEX.findall(text)]
+    if not query_terms:
+        return 0
+    if len(query_terms) == 1:
+        return sum(1 for term in terms if query_terms[0] in term)
+    first_term, *inner_terms, last_prefix = query_terms
+    count = 0
+    for p in range(len(terms) - len(inner_terms) - 1):
+        if (terms[p].endswith(first_term) and terms[p + 1:p + 1 + len(inner_terms)] == inner_terms
+                and terms[p + 1 + len(inner_terms)].startswith(last_prefix)):
+            count += 1
+    return count
+
+
+def count_literal_matches(query: str, text: str) -> int:
+    """Counts the case-insensitive occurrences of a literal query in text."""
+    return text.casefold().count(query.casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index with positional postings over all cached pages.
+    Treat instances as read-only once built; a reload builds a new instance.
+    """
+    def __init__(self):
+        self.documents = {}       # slug -> {"title": str, "text": str}
+        self.token_starts = {}    # slug -> array of token start offsets (indexed by position)
+        self.token_ends = {}      # slug -> array of token end offsets
+        self.folded_texts = {}    # slug -> casefolded text for literal queries (None if casefolding changes offsets)
+        self.postings = {}        # term -> {slug: [positions]}
+        self.vocabulary = []      # sorted list of all terms, for prefix lookups
+        self.heading_ranges = {}  # slug -> sorted list of (start, end) character ranges of headings
+        self.field_lengths = {}   # slug -> (title, headings, body) token counts
+        self.average_field_lengths = (1.0, 1.0, 1.0)
+
+    @classmethod
+    def build(cls, page_cache: dict) -> "SearchIndex":
+        """Builds a new index from the given page cache."""
+        index = cls()
+        for slug, page_data in page_cache.items():
+            if not page_has_body(page_data):
+                continue
+            page_title = page_data.get('page', {}).get("title", slug.capitalize())
+            index.add_document(slug, page_title, extract_search_text(get_page_body(page_data, use_cache=False)))
+        index._update_statistics()
+        logger.info(f"Search index built: {len(index.documents)} pages, {len(index.vocabulary)} terms.")
+        return index
+
+    def with_updated_documents(self, page_cache: dict, slugs) -> "SearchIndex":
+        """
+        Returns a new index in which the given pages are re-indexed from page_cache.
+        Unchanged pages share their structures with this index, which stays untouched
+        and can keep serving queries while the new one is prepared.
+        """
+        index = SearchIndex()
+        index.documents = dict(self.documents)
+        index.token_starts = dict(self.token_starts)
+        index.token_ends = dict(self.token_ends)
+        index.folded_texts = dict(self.folded_texts)
+        index.postings = dict(self.postings)
+        index.heading_ranges = dict(self.heading_ranges)
+        index.field_lengths = dict(self.field_lengths)
+
+        for slug in slugs:
+            old_document = self.documents.get(slug)
+            if old_document:
+                # Copy-on-write the posting lists that reference the old version of the page.
+                for term in {normalize_term(t) for t in TOKEN_REGEX.findall(old_document["text"])}:
+                    postings = dict(index.postings[term])
+                    postings.pop(slug, None)
+                    if postings:
+                        index.postings[term] = postings
+                    else:
+                        del index.postings[term]
+                del index.documents[slug], index.token_starts[slug], index.token_ends[slug]
+                del index.heading_ranges[slug], index.field_lengths[slug], index.folded_texts[slug]
+
+            page_data = page_cache.get(slug)
+            if page_data and page_has_body(page_data):
+                page_title = page_data.get('page', {}).get("title", slug.capitalize())
+                index.add_document(slug, page_title, extract_search_text(get_page_body(page_data, use_cache=False)), copy_postings=True)
+
+        index._update_statistics()
+        logger.info(f"Search index updated for {len(slugs)} page(s).")
+        return index
+
+    def add_document(self, slug: str, title: str, text: str, copy_postings: bool = False):
+        starts = array('L')
+        ends = array('L')
+        for position, match in enumerate(TOKEN_REGEX.finditer(text)):
+            starts.append(match.start())
+            ends.append(match.end())
+            term = normalize_term(match.group(0))
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+            elif copy_postings and slug not in postings:
+                # The posting dict may be shared with a previous index generation.
+                postings = self.postings[term] = dict(postings)
+            postings.setdefault(slug, []).append(position)
+        self.documents[slug] = {"title": title, "text": text}
+        self.token_starts[slug] = starts
+        self.token_ends[slug] = ends
+        folded = text.casefold()
+        self.folded_texts[slug] = folded if len(folded) == len(text) else None
+
+        headings = [match.span(1) for match in HEADING_REGEX.finditer(text)]
+        heading_length = sum(bisect_left(starts, end) - bisect_left(starts, start) for start, end in headings)
+        self.heading_ranges[slug] = headings
+        self.field_lengths[slug] = (len(TOKEN_REGEX.findall(title)), heading_length, len(starts) - heading_length)
+
+    def _update_statistics(self):
+        """Refreshes the vocabulary and the average field lengths after documents were added or removed."""
+        self.vocabulary = sorted(self.postings)
+        if self.field_lengths:
+            totals = [sum(lengths) for lengths in zip(*self.field_lengths.values())]
+            self.average_field_lengths = tuple(max(total / len(self.field_lengths), 1.0) for total in totals)
+
+    def _terms_with_prefix(self, prefix: str) -> list:
+        """Returns all indexed terms starting with the given prefix."""
+        terms = []
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            terms.append(self.vocabulary[i])
+            i += 1
+        return terms
+
+    def _prefix_postings(self, prefix: str) -> dict:
+        """Merges the postings of all terms starting with prefix into {slug: set(positions)}."""
+        merged = {}
+        for term in self._terms_with_prefix(prefix):
+            for slug, positions in self.postings[term].items():
+                merged.setdefault(slug, set()).update(positions)
+        return merged
+
+    def _fragment_postings(self, fragment: str, single_word: bool) -> dict:
+        """
+        Merges the postings of all terms containing fragment (single_word) or ending with it (the first
+        word of a phrase) into {slug: {position: offset of fragment in the term}}. This keeps the substring
+        semantics of plain queries: "ample" finds "example". Scans the vocabulary, not the texts.
+        """
+        merged = {}
+        for term in self.vocabulary:
+            offset = term.find(fragment) if single_word else (len(term) - len(fragment) if term.endswith(fragment) else -1)
+            if offset == -1:
+                continue
+            for slug, positions in self.postings[term].items():
+                slug_offsets = merged.setdefault(slug, {})
+                for position in positions:
+                    slug_offsets[position] = offset
+        return merged
+
+    def search(self, query: str) -> dict:
+        """
+        Resolves a plain word query against the index, with the substring semantics of a literal search.
+        A single word may occur anywhere inside a word of the page. Several words must occur
+        consecutively (a phrase): the first one may be the end of a longer word, the inner ones are whole
+        words and the last one is matched as a prefix, so results update while the user is still typing.
+        Returns {slug: [(start, end), ...]} with character spans into the stored text.
+        """
+        query_terms = [normalize_term(t) for t in TOKEN_REGEX.findall(query)]
+        if not query_terms:
+            return {}
+
+        first_term, *inner_terms = query_terms
+        first_postings = self._fragment_postings(first_term, single_word=not inner_terms)
+        candidates = set(first_postings)
+        if not inner_terms:
+            last_prefix = first_term
+            last_postings = None
+        else:
+            *inner_terms, last_prefix = inner_terms
+            inner_postings = []
+            for term in inner_terms:
+                postings = self.postings.get(term, {})
+                inner_postings.append(postings)
+                candidates &= postings.keys()
+                if not candidates:
+                    return {}
+            last_postings = self._prefix_postings(last_prefix)
+            candidates &= last_postings.keys()
+
+        results = {}
+        for slug in candidates:
+            starts = self.token_starts[slug]
+            ends = self.token_ends[slug]
+            offsets = first_postings[slug]
+            if last_postings is None:
+                phrase_starts = sorted(offsets)
+            else:
+                following = [set(postings[slug]) for postings in inner_postings]
+                phrase_starts = [
+                    p for p in offsets
+                    if all(p + i + 1 in positions for i, positions in enumerate(following))
+                    and p + len(following) + 1 in last_postings[slug]
+                ]
+
+            spans = []
+            for p in phrase_starts:
+                if last_postings is None:
+                    # The word inside a longer token (offsets are into the casefolded term; clamped to the token).
+                    start = min(starts[p] + offsets[p], ends[p])
+                    end = min(start + len(first_term), ends[p])
+                else:
+                    # The first word ends its token; highlight only the typed part of the prefix-matched last word.
+                    last_position = p + len(inner_terms) + 1
+                    start = max(starts[p], ends[p] - len(first_term))
+                    end = min(ends[last_position], starts[last_position] + len(last_prefix))
+                spans.append((start, end))
+            if spans:
+                results[slug] = sorted(spans)
+        return results
+
+    def _literal_candidates(self, needle: str):
+        """
+        Narrows a literal query down to pages through the index, or returns None if it cannot.
+        A word of the query that does not start it must start a word of the page: the last one as a
+        prefix, the inner ones as whole terms. The first word may be the tail of a longer one.
+        """
+        candidates = None
+        for match in TOKEN_REGEX.finditer(needle):
+            if match.start() == 0:
+                continue
+            term = normalize_term(match.group(0))
+            slugs = self._prefix_postings(term).keys() if match.end() == len(needle) else self.postings.get(term, {}).keys()
+            candidates = set(slugs) if candidates is None else candidates & slugs
+        return candidates
+
+    def search_literal(self, query: str) -> dict:
+        """
+        Case-insensitive substring search for queries without regex syntax, over the casefolded texts
+        (stored at index time) of the candidate pages only. Returns {slug: [(start, end), ...]} like search().
+        """
+        needle = query.casefold()
+        if not needle.strip():
+            return {}
+        candidates = self._literal_candidates(needle)
+        results = {}
+        for slug in (self.documents if candidates is None else candidates):
+            folded = self.folded_texts[slug]
+            if folded is None:
+                # Casefolding changed the length (e.g. "ß" -> "ss"), so offsets would not map back.
+                spans = [match.span() for match in re.finditer(re.escape(query), self.documents[slug]["text"], re.IGNORECASE)]
+            else:
+                spans = []
+                start = folded.find(needle)
+                while start != -1:
+                    spans.append((start, start + len(needle)))
+                    start = folded.find(needle, start + len(needle))
+            if spans:
+                results[slug] = spans
+        return results
+
+    def search_pattern(self, pattern, max_matches: int = None, deadline: float = None) -> dict:
+        """
+        Scans the stored texts with a compiled pattern (regular expression queries), in this process.
+        The scan stops after max_matches matches in total. Past deadline (a time.monotonic() value,
+        checked between matches) it raises TimeoutError. The search endpoint runs regex queries in a
+        worker process instead (regex_worker), as a single match cannot be interrupted.
+        """
+        return scan_pattern(((slug, document["text"]) for slug, document in self.documents.items()), pattern, max_matches, deadline)
+
+    def pattern_documents(self) -> dict:
+        """Returns {slug: (title, text)}, the documents a regex worker process scans."""
+        return {slug: (document["title"], document["text"]) for slug, document in self.documents.items()}
+
+    def _heading_frequency(self, slug: str, spans) -> int:
+        """Counts the spans starting inside a heading of the page."""
+        headings = self.heading_ranges[slug]
+        if not headings:
+            return 0
+        count = 0
+        for start, _ in spans:
+            i = bisect_right(headings, (start, math.inf)) - 1
+            if i >= 0 and headings[i][0] <= start < headings[i][1]:
+                count += 1
+        return count
+
+    def rank(self, page_spans: dict, count_title_matches, limit: int) -> list:
+        """
+        Returns the limit best (slug, spans) pairs of page_spans, ranked with BM25F: the query is scored
+        as one term whose occurrences are the matched spans (split into heading and body matches) and
+        count_title_matches(title). Field frequencies are boosted and normalized by the field lengths
+        before term frequency saturation. The top results are selected with a heap of size limit.
+        """
+        if not page_spans:
+            return []
+        matching = len(page_spans)
+        idf = math.log(1 + (len(self.documents) - matching + 0.5) / (matching + 0.5))
+        boosts = [SEARCH_FIELD_BOOSTS.get(field, 1.0) for field in FIELDS]
+
+        def score(item):
+            slug, spans = item
+            heading_matches = self._heading_frequency(slug, spans)
+            frequencies = (count_title_matches(self.documents[slug]["title"]), heading_matches, len(spans) - heading_matches)
+            weighted = 0.0
+            for boost, frequency, length, average in zip(boosts, frequencies, self.field_lengths[slug], self.average_field_lengths):
+                if frequency:
+                    weighted += boost * frequency / (1 - SEARCH_BM25_B + SEARCH_BM25_B * length / average)
+            return idf * weighted * (SEARCH_BM25_K1 + 1) / (SEARCH_BM25_K1 + weighted)
+
+        return heapq.nlargest(limit, page_spans.items(), key=score)
@@ -1,5 +1,6 @@
 import json
 import logging
+from collections.abc import Mapping
 from pathlib import Path
 from fastapi import Request
 
@@ -16,10 +17,13 @@ def register_routes(app, get_full_page_cache):
             # Convert Path objects to strings for JSON serialization
             serializable_cache = {}
             for key, value in page_cache.items():
-                if isinstance(value, dict):
-                    serializable_value = value.copy()
+                if isinstance(value, Mapping): # PageRecord entries (or plain dicts added by plugins)
+                    serializable_value = dict(value.items())
                     if "file_path" in serializable_value:
                         serializable_value["file_path"] = str(Path(serializable_value["file_path"])) # Ensure Path is str
+                    if "access_rules" in serializable_value:
+                        access_rules = serializable_value["access_rules"] # Compiled rules hold frozensets
+                        serializable_value["access_rules"] = {"denied": sorted(access_rules.denied), "required": sorted(access_rules.required)}
                 else:
                     serializable_value = value
                 serializable_cache[key] = serializable_value
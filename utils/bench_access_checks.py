@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# utils/bench_access_checks.py
+"""
+Micro-benchmark of the page access check: the former checker, which walked the page's 'access'
+block and the user's nested 'access' map on every call, against the compiled rules evaluated
+with set operations (core.access).
+
+Run it from the project root:
+    python utils/bench_access_checks.py [--repeat 5] [--number 20000]
+
+Both checkers are first run over every pair of (real and synthetic) page and user, and the
+benchmark aborts if they disagree on any decision.
+"""
+import sys
+import timeit
+import logging
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.cache import PAGE_CACHE, USER_ACCOUNTS_CACHE, build_page_cache, build_user_accounts_cache
+from core.access import compile_access_rules, collect_granted_permissions
+from core.security import get_page_access_by_spec_rules
+
+logger = logging.getLogger("bench_access_checks")
+
+SYNTHETIC_ACCESS_BLOCKS = [
+    None,
+    {},
+    {"site.login": True},
+    {"admin.login": True},
+    {"site.login": True, "admin.login": True},
+    {"site.login": False},
+    {"admin.login": False, "site.login": True},
+    {"site.editor.publish": True},
+    {"site": True},
+]
+SYNTHETIC_USERS = [
+    None,
+    {"username": "reader", "access": {"site": {"login": True}}},
+    {"username": "admin", "access": {"admin": {"login": True}, "site": {"login": True}}},
+    {"username": "editor", "access": {"site": {"login": True, "editor": {"publish": True}}}},
+    {"username": "flat", "access": {"site": True}},
+    {"username": "nobody", "access": {}},
+    {"username": "disabled", "access": {"site": {"login": False}}},
+]
+
+
+# --- Former checker (kept verbatim for comparison) ---
+def legacy_get_page_meta(slug: str, key_path: str, default=None):
+    logger.debug(f"get_page_meta: Retrieving meta for slug='{slug}', key_path='{key_path}'")
+    try:
+        if slug not in PAGE_CACHE:
+            logger.debug(f"get_page_meta: Slug '{slug}' not found in PAGE_CACHE. Returning default.")
+            return default
+        page_data = PAGE_CACHE[slug].get('page', {})
+
+        keys = key_path.split('.')
+        current_level = page_data
+        for key in keys:
+            current_level = current_level.get(key) if isinstance(current_level, dict) else default
+            if current_level is None:
+                logger.debug(f"get_page_meta: Key path part '{key}' not found for slug='{slug}'. Returning default.")
+                return default
+        logger.debug(f"get_page_meta: Successfully retrieved '{key_path}' for slug='{slug}'. Value: {current_level}")
+        return current_level
+    except Exception as e:
+        logger.error(f"Error retrieving page meta for slug='{slug}', key_path='{key_path}': {e}", exc_info=True)
+        return default
+
+def legacy_get_page_access_by_spec_rules(page_identifier, current_user: dict = None) -> bool:
+    if isinstance(page_identifier, str):
+        slug_for_logging = page_identifier
+        page_access_rules = legacy_get_page_meta(page_identifier, 'access', {})
+    elif isinstance(page_identifier, dict):
+        slug_for_logging = "ACCESS_RULES_DICT"
+        page_access_rules = page_identifier
+    else:
+        slug_for_logging = "INVALID_IDENTIFIER"
+        page_access_rules = {}
+
+    logger.debug(f"get_page_access_by_spec_rules: Checking access for identifier='{slug_for_logging}', user='{current_user.get('username') if current_user else 'anonymous'}'")
+
+    if not page_access_rules:
+        logger.debug(f"get_page_access_by_spec_rules: No specific access rules for page '{slug_for_logging}'. Access granted by default.")
+        return True
+
+    user_permissions = current_user.get('access', {}) if current_user else {}
+    if not user_permissions and current_user:
+        logger.warning(f"get_page_access_by_spec_rules: User '{current_user.get('username')}' has no defined permissions but is authenticated.")
+
+    for perm_key, required_value in page_access_rules.items():
+        if required_value is False:
+            perm_parts = perm_key.split('.')
+            current_level = user_permissions
+            for part in perm_parts:
+                current_level = current_level.get(part) if isinstance(current_level, dict) else None
+                if current_level is None: break
+
+            if current_level is True:
+                logger.debug(f"get_page_access_by_spec_rules: Access DENIED for page '{slug_for_logging}' due to negative rule '{perm_key}'.")
+                return False
+
+    required_true_rules = {k: v for k, v in page_access_rules.items() if v is True}
+
+    if not required_true_rules:
+        logger.debug(f"get_page_access_by_spec_rules: No positive access rules for page '{slug_for_logging}'. Access granted by default.")
+        return True
+
+    access_granted = False
+    if current_user:
+        for perm_key, required_value in required_true_rules.items():
+            perm_parts = perm_key.split('.')
+            current_level = user_permissions
+            for part in perm_parts:
+                current_level = current_level.get(part) if isinstance(current_level, dict) else None
+                if current_level is None: break
+
+            if current_level is True:
+                access_granted = True
+                logger.debug(f"get_page_access_by_spec_rules: Access GRANTED for page '{slug_for_logging}' by rule '{perm_key}'.")
+                break
+
+    if not access_granted:
+        logger.debug(f"get_page_access_by_spec_rules: Access DENIED for page '{slug_for_logging}' - no matching positive rule found for user.")
+
+    logger.debug(f"get_page_access_by_spec_rules: Final access decision for page '{slug_for_logging}': {access_granted}.")
+    return access_granted
+
+
+# --- Benchmark ---
+def load_cases():
+    """Returns (pages, users): pages as (slug, raw access block, compiled rules), users with granted permissions."""
+    build_page_cache()
+    build_user_accounts_cache()
+    for index, access_block in enumerate(SYNTHETIC_ACCESS_BLOCKS):
+        slug = f"_bench/page-{index}"
+        PAGE_CACHE[slug] = {"page": {"access": access_block} if access_block is not None else {},
+                            "access_rules": compile_access_rules(access_block)}
+
+    pages = [(slug, entry.get('page', {}).get('access'), entry['access_rules']) for slug, entry in PAGE_CACHE.items()]
+    users = list(SYNTHETIC_USERS) + list(USER_ACCOUNTS_CACHE.values())
+    users = [dict(user, granted_permissions=collect_granted_permissions(user.get('access'))) if user else None for user in users]
+    return pages, users
+
+def verify(pages, users) -> int:
+    """Checks that both checkers decide every (page, user) pair identically. Returns the number of pairs."""
+    pairs = 0
+    for slug, access_block, compiled_rules in pages:
+        for user in users:
+            expected = legacy_get_page_access_by_spec_rules(slug, user)
+            decisions = [get_page_access_by_spec_rules(slug, user), get_page_access_by_spec_rules(compiled_rules, user)]
+            if access_block:
+                decisions.append(get_page_access_by_spec_rules(access_block, user))
+            if any(decision != expected for decision in decisions):
+                username = user.get('username') if user else 'anonymous'
+                raise SystemExit(f"Decision mismatch for page '{slug}' and user '{username}': legacy {expected}, compiled {decisions}")
+            pairs += 1
+    return pairs
+
+def bench(label: str, func, args_list, repeat: int, number: int):
+    def run():
+        for args in args_list:
+            func(*args)
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    per_check_ns = best / (number * len(args_list)) * 1e9
+    print(f"{label:<34} {per_check_ns:10.1f} ns/check")
+    return per_check_ns
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the former and the compiled page access checkers.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000, help="Passes over all (page, user) pairs per repeat.")
+    args = parser.parse_args()
+    # Production log level: debug messages are dropped (their f-strings are still built by the legacy checker)
+    # and the legacy warning about users without permissions does not flood the output.
+    logging.disable(logging.WARNING)
+
+    pages, users = load_cases()
+    pairs = verify(pages, users)
+    print(f"Verified identical decisions for {pairs} (page, user) pairs ({len(pages)} pages, {len(users)} users).")
+
+    by_slug = [(slug, user) for slug, _, _ in pages for user in users]
+    by_rules = [(access_block, user) for _, access_block, _ in pages if access_block for user in users]
+    by_compiled = [(compiled_rules, user) for _, access_block, compiled_rules in pages if access_block for user in users]
+
+    legacy_slug = bench("legacy, by slug", legacy_get_page_access_by_spec_rules, by_slug, args.repeat, args.number)
+    compiled_slug = bench("compiled, by slug", get_page_access_by_spec_rules, by_slug, args.repeat, args.number)
+    legacy_rules = bench("legacy, rules dict (navigation)", legacy_get_page_access_by_spec_rules, by_rules, args.repeat, args.number)
+    compiled_rules = bench("compiled rules (navigation)", get_page_access_by_spec_rules, by_compiled, args.repeat, args.number)
+    print(f"Speed-up: {legacy_slug / compiled_slug:.1f}x by slug, {legacy_rules / compiled_rules:.1f}x for navigation checks.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# utils/bench_page_records.py
+"""
+Memory benchmark of the PAGE_CACHE entries: the former entry dicts (the frontmatter plus a second,
+flattened copy of it under '_page.*' keys) against PageRecord (core.page_record).
+
+Run it from the project root:
+    python utils/bench_page_records.py [--pages 50000]
+
+Both page caches are built from the same synthetic pages and measured with get_size of the
+memory_stats plugin (the figure its /memory_stats page shows as the cache size) and with
+tracemalloc. Before measuring, the benchmark checks that every record exposes exactly the keys
+and values of the former dict.
+"""
+import sys
+import gc
+import argparse
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import SITE_IDENTIFIKATOR
+from core.access import compile_access_rules
+from core.cache import _build_page_entry
+from user.plugin.memory_stats.memory_stats import get_size
+
+
+# --- Former Entry Layout (before PageRecord) ---
+def _flatten_dict_with_prefix(data, prefix="", separator="."):
+    flattened = {}
+    for key, value in data.items():
+        new_key = f"{prefix}{separator}{key}" if prefix else key
+        if isinstance(value, dict):
+            flattened.update(_flatten_dict_with_prefix(value, new_key, separator))
+        else:
+            flattened[new_key] = value
+    return flattened
+
+def legacy_build_page_entry(md_file: Path, relative_dir_path: Path, final_cache_key_slug: str, page_meta: dict, md_content: str, mtime_ns: int = 0):
+    page_entry = {
+        "page": page_meta,
+        "markdown_content": md_content,
+        "sort_key": relative_dir_path.parts[0],
+        "file_path": str(md_file),
+        "file_mtime": mtime_ns / 1e9,
+        "slug": final_cache_key_slug,
+        "slug_path": f"{SITE_IDENTIFIKATOR}/{final_cache_key_slug.lstrip('/')}".lower(),
+        "title": page_meta.get('title', final_cache_key_slug.split('/')[-1].replace('-', ' ').capitalize()),
+        "path_parts": list(relative_dir_path.parts),
+        "access_rules": compile_access_rules(page_meta.get('access')),
+    }
+    page_entry.update(_flatten_dict_with_prefix(page_meta, prefix="_page"))
+    return page_entry
+
+
+# --- Synthetic Pages ---
+def synthetic_pages(count: int) -> list:
+    """Returns (md_file, relative_dir_path, slug, page_meta, md_content) of count pages in sections of 50."""
+    pages = []
+    for index in range(count):
+        section, page = divmod(index, 50)
+        relative_dir_path = Path(f"{section:03d}.Section-{section}") / f"{page:02d}.Page-{index}"
+        # Built from parts, so no two pages share string objects by accident (as when parsed from YAML).
+        slug = "/".join([f"section-{section}", f"page-{index}"])
+        page_meta = {
+            "title": f"Page {index}",
+            "date": "2024-10-28",
+            "visible": True,
+            "taxonomy": {"author": "Jan Novak", "category": ["docs", f"section-{section}"], "tag": ["cms", "flat-file"]},
+            "metadata": {"description": f"Synthetic page number {index}", "keywords": "cms, benchmark"},
+        }
+        if index % 10 == 0:
+            page_meta["access"] = {"site.login": True}
+        md_content = f"# Page {index}\n\n" + "Lorem ipsum dolor sit amet. " * 20
+        md_file = PROJECT_ROOT / "user" / "pages" / relative_dir_path / "default.md"
+        pages.append((md_file, relative_dir_path, slug, page_meta, md_content))
+    return pages
+
+def build_cache(build_entry, pages: list) -> dict:
+    cache = {}
+    for md_file, relative_dir_path, slug, page_meta, md_content in pages:
+        entry = build_entry(md_file, relative_dir_path, slug, page_meta, md_content, 1_700_000_000_000_000_000)
+        cache[entry["slug"]] = entry
+    return cache
+
+def verify(legacy_cache: dict, record_cache: dict) -> int:
+    """Checks that every record exposes the keys and values of the former dict. Returns the number of pages."""
+    for slug, legacy_entry in legacy_cache.items():
+        record = dict(record_cache[slug].items())
+        record["path_parts"] = list(record["path_parts"])
+        legacy_entry = dict(legacy_entry, file_path=record["file_path"]) # The former entry resolved the path
+        if list(record) != list(legacy_entry) or record != legacy_entry:
+            raise SystemExit(f"Page '{slug}' differs:\n  legacy: {legacy_entry}\n  record: {record}")
+    return len(legacy_cache)
+
+def measure(label: str, build_entry, pages: list) -> tuple:
+    """Builds a cache, returns (cache, get_size bytes, tracemalloc bytes) and prints the figures."""
+    gc.collect()
+    tracemalloc.start()
+    cache = build_cache(build_entry, pages)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Only the entries themselves: the frontmatter dicts and bodies are shared by both layouts.
+    shared = set()
+    for _, _, _, page_meta, md_content in pages:
+        get_size(page_meta, shared)
+        shared.add(id(md_content))
+    entries_size = get_size(cache, shared)
+    print(f"{label:<24} {entries_size / 2**20:9.2f} MB (get_size, without frontmatter and bodies) {traced / 2**20:9.2f} MB (tracemalloc)")
+    return cache, entries_size, traced
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of the former page entry dicts and PageRecord.")
+    parser.add_argument("--pages", type=int, default=50000)
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.pages)
+    legacy_cache, legacy_size, legacy_traced = measure("former entry dicts", legacy_build_page_entry, pages)
+    record_cache, record_size, record_traced = measure("PageRecord", _build_page_entry, pages)
+    print(f"Verified identical keys and values for {verify(legacy_cache, record_cache)} pages.")
+    print(f"Saved {(legacy_size - record_size) / 2**20:.2f} MB ({1 - record_size / legacy_size:.0%}) by get_size, "
+          f"{(legacy_traced - record_traced) / 2**20:.2f} MB ({1 - record_traced / legacy_traced:.0%}) by tracemalloc "
+          f"for {args.pages} pages.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# utils/bench_yaml_parsing.py
+"""
+Parse-throughput benchmark of page files on a synthetic tree: the former parse (pure-Python
+yaml.safe_load over the whole file) against the shared loader (core.yaml_loader, CSafeLoader when
+LibYAML is available), both over whole files and in the metadata-only mode, which reads a file
+only as far as its frontmatter.
+
+Run it from the project root:
+    python utils/bench_yaml_parsing.py [--pages 10000] [--body-kb 8] [--repeat 3]
+
+The tree is written to a temporary directory and removed afterwards. Files are parsed serially in
+this process, so the figures are per-core throughput. Before timing, the benchmark checks that all
+parsers produce identical frontmatter for every page.
+"""
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.cache import YAML_FRONTMATTER_REGEX, _read_and_parse_files
+from core.yaml_loader import YAML_LIBYAML_ENABLED
+
+
+# --- Former Parser (before core.yaml_loader) ---
+def legacy_parse_frontmatter(content):
+    match = YAML_FRONTMATTER_REGEX.search(content)
+    if match:
+        try:
+            return yaml.safe_load(match.group(1)) or {}, content[match.end():].strip()
+        except yaml.YAMLError:
+            return {}, content
+    return {}, content
+
+def legacy_read_and_parse_files(file_paths: list) -> list:
+    results = []
+    for file_path in file_paths:
+        page_meta, md_content = legacy_parse_frontmatter(Path(file_path).read_text(encoding='utf-8'))
+        results.append((file_path, None, page_meta, md_content, None))
+    return results
+
+
+# --- Synthetic Tree ---
+def write_synthetic_tree(base_dir: Path, pages: int, body_kb: int) -> list:
+    """Writes pages default.md files in sections of 100 pages. Returns their paths as strings."""
+    paragraph = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. " * 4 + "\n\n"
+    body = paragraph * max(1, body_kb * 1024 // len(paragraph))
+    file_paths = []
+    for index in range(pages):
+        section, page = divmod(index, 100)
+        page_dir = base_dir / f"{section:03d}.Section-{section}" / f"{page:02d}.Page-{index}"
+        page_dir.mkdir(parents=True, exist_ok=True)
+        frontmatter = (
+            f"title: 'Page {index}'\n"
+            f"date: 2024-10-{index % 28 + 1:02d}\n"
+            "visible: true\n"
+            "taxonomy:\n"
+            f"    category: [docs, section-{section}]\n"
+            "    tag: [cms, flat-file, benchmark]\n"
+            "    author: Jan Novák\n"
+            "metadata:\n"
+            f"    description: 'Synthetic page number {index} of the parse benchmark'\n"
+            "    keywords: 'cms, yaml, benchmark'\n"
+        )
+        if index % 10 == 0:
+            frontmatter += "access:\n    site.login: true\n"
+        md_file = page_dir / "default.md"
+        md_file.write_text(f"---\n{frontmatter}---\n\n# Page {index}\n\n{body}", encoding='utf-8')
+        file_paths.append(str(md_file))
+    return file_paths
+
+
+# --- Benchmark ---
+def verify(file_paths: list) -> int:
+    legacy = legacy_read_and_parse_files(file_paths)
+    for lazy_bodies in (False, True):
+        for (file_path, _, expected_meta, _, _), (_, _, page_meta, _, error) in zip(legacy, _read_and_parse_files(file_paths, lazy_bodies)):
+            if error or page_meta != expected_meta:
+                raise SystemExit(f"Frontmatter of {file_path} differs (lazy_bodies={lazy_bodies}): {expected_meta!r} != {page_meta!r} {error or ''}")
+    return len(legacy)
+
+def bench(label: str, parse, file_paths: list, repeat: int) -> float:
+    best = min(_timed(parse, file_paths) for _ in range(repeat))
+    print(f"{label:<44} {best:7.3f} s {len(file_paths) / best:10.0f} pages/s")
+    return best
+
+def _timed(parse, file_paths: list) -> float:
+    started = time.perf_counter()
+    parse(file_paths)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page file parse throughput of the former and the shared YAML loader.")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--body-kb", type=int, default=8, help="Approximate Markdown body size of each page.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base_dir = Path(tempfile.mkdtemp(prefix="bench_yaml_"))
+    try:
+        file_paths = write_synthetic_tree(base_dir, args.pages, args.body_kb)
+        print(f"Synthetic tree: {len(file_paths)} pages, ~{args.body_kb} KB bodies. LibYAML: {'yes' if YAML_LIBYAML_ENABLED else 'no (pure-Python fallback)'}.")
+        print(f"Verified identical frontmatter for {verify(file_paths)} pages.")
+        legacy = bench("former: yaml.safe_load, whole files", legacy_read_and_parse_files, file_paths, args.repeat)
+        full = bench("shared loader, whole files", lambda paths: _read_and_parse_files(paths), file_paths, args.repeat)
+        header = bench("shared loader, frontmatter only (lazy)", lambda paths: _read_and_parse_files(paths, lazy_bodies=True), file_paths, args.repeat)
+        print(f"Speed-up: {legacy / full:.1f}x for whole files, {legacy / header:.1f}x in the metadata-only mode.")
+    finally:
+        shutil.rmtree(base_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# utils/export_static.py
+"""
+Exports the public part of the site as static files that a web server (nginx) can serve directly.
+
+The export builds the caches exactly like the application (it imports main.py) and renders with
+the same building blocks as read_page: get_page_data, NavigationBuilder and the Jinja templates.
+Written are:
+- every page an anonymous visitor may access, as <slug>/index.html (the site root as index.html),
+- the index pages of directories without their own default.md,
+- the page tree fragment of the search plugin (search/index.html) and its config (search/config),
+- all page, theme and plugin assets (everything except sources such as .md, .py and templates).
+
+Pages are rendered in parallel by forked worker processes, which inherit the already built caches.
+The export is incremental: a manifest in the output directory stores a fingerprint of everything a
+page depends on (its source, the titles of its ancestors, its children, the menu, the theme
+configuration and the templates), so only pages whose fingerprint changed are rendered again.
+Only full-text search queries need the application; everything else can be served statically.
+
+Usage (from the project root):
+    python utils/export_static.py --output /var/www/DOMAIN/static --base-url https://example.com/
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+import multiprocessing
+from pathlib import Path
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from starlette.requests import Request
+from config import THEME_SKIN
+from core.plugins import ACTIVE_PLUGIN_NAMES
+from core.templating import THEME_CONFIG
+from core.utils import collect_source_file_stats
+
+logger = logging.getLogger("export_static")
+
+MANIFEST_NAME = ".export-manifest.json"
+# Directories whose files are served under the same URL path by the application (see the mounts in main.py).
+ASSET_DIRECTORIES = ["user/pages", "user/theme", "user/plugin"]
+# Sources the application reads itself; they are never published.
+SOURCE_SUFFIXES = {".md", ".py", ".pyc", ".twig", ".yaml", ".yml", ".scss", ".sh"}
+
+# The imported main module; set before the render workers are forked, so they inherit it.
+_cms = None
+
+
+# --- Rendering ---
+def _make_anonymous_request(url_path: str, base_url: str) -> Request:
+    """Creates a request for an anonymous visitor, as needed by the template context."""
+    parsed = urlparse(base_url)
+    https = parsed.scheme == "https"
+    host = parsed.hostname or "localhost"
+    port = parsed.port or (443 if https else 80)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "scheme": parsed.scheme or "http",
+        "server": (host, port),
+        "root_path": "",
+        "path": url_path,
+        "query_string": b"",
+        "headers": [(b"host", parsed.netloc.encode() or host.encode())],
+        "session": {},
+    }
+    return Request(scope)
+
+def _output_file(output_dir: Path, page_path: str) -> Path:
+    return output_dir / page_path / "index.html" if page_path else output_dir / "index.html"
+
+def render_page(page_path: str, output_dir: str, base_url: str) -> tuple:
+    """Renders one page path into output_dir. Runs in a render worker. Returns (page_path, error or None)."""
+    try:
+        data = _cms.build_page_view_data(page_path, None)
+        if not data:
+            return page_path, "not found"
+        context = _cms.get_base_template_context(_make_anonymous_request(f"/{page_path}", base_url), _cms.get_nav_builder())
+        context.update(data)
+        template_name = data.get("page", {}).get("template", "base.html.twig") or "base.html.twig"
+        html = _cms.templates.get_template(template_name).render(context)
+
+        target = _output_file(Path(output_dir), page_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(html, encoding="utf-8")
+        return page_path, None
+    except Exception as e:
+        return page_path, str(e)
+
+def _render_all(page_paths: list, output_dir: Path, base_url: str, workers: int) -> list:
+    """Renders page_paths, in forked processes if possible. Returns the list of (page_path, error) failures."""
+    if workers > 1 and len(page_paths) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            results = list(pool.map(render_page, page_paths, [str(output_dir)] * len(page_paths), [base_url] * len(page_paths), chunksize=8))
+    else:
+        results = [render_page(page_path, str(output_dir), base_url) for page_path in page_paths]
+    return [(page_path, error) for page_path, error in results if error]
+
+def _render_search_fragment(output_dir: Path, base_url: str):
+    """Writes what the search plugin serves for an empty query (the page tree) and its frontend config."""
+    from markupsafe import Markup
+    from user.plugin.search.search_config import MIN_SEARCH_LENGTH, PAGE_TREE_ENABLED, PAGE_TREE_TITLE, PAGE_TREE_ALL_VISIBLE
+
+    search_dir = output_dir / "search"
+    search_dir.mkdir(parents=True, exist_ok=True)
+    (search_dir / "config").write_text(json.dumps({"min_length": MIN_SEARCH_LENGTH}), encoding="utf-8")
+    context = {
+        "request": _make_anonymous_request("/search", base_url),
+        "is_tree_view": PAGE_TREE_ENABLED,
+        "tree_title": PAGE_TREE_TITLE,
+        "page_tree_html": Markup(_cms.get_nav_builder().get_search_tree_html(current_user=None, show_all=PAGE_TREE_ALL_VISIBLE)) if PAGE_TREE_ENABLED else "",
+        "search_results": [],
+        "query_message": "" if PAGE_TREE_ENABLED else f"Enter at least {MIN_SEARCH_LENGTH} characters to start searching.",
+        "active_plugin_names": ACTIVE_PLUGIN_NAMES,
+    }
+    html = _cms.templates.get_template("partials/search-results.html.twig").render(context)
+    (search_dir / "index.html").write_text(html, encoding="utf-8")
+
+# --- Page Selection and Fingerprints ---
+def collect_page_paths() -> list:
+    """Returns all page paths to export: anonymous-accessible pages, directory index pages and the site root."""
+    page_cache = _cms.PAGE_CACHE
+    nav_builder = _cms.get_nav_builder()
+    page_paths = [""]
+    for slug in page_cache:
+        if _cms.get_page_access_by_spec_rules(slug, None):
+            page_paths.append(slug)
+    # Directories without their own default.md are served as generated indexes of their subpages.
+    for parent_slug in nav_builder.parent_to_children_map:
+        if parent_slug != nav_builder.site_identifier and parent_slug not in page_cache:
+            page_paths.append(parent_slug)
+    return page_paths
+
+def _hash(value) -> str:
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+def get_site_fingerprint() -> str:
+    """Fingerprint of everything that appears on or shapes every page: menu, theme config, plugins and templates."""
+    template_stats = collect_source_file_stats([f"{THEME_SKIN}/templates", "user/plugin"], {".twig", ".py", ".html"})
+    return _hash((
+        _cms.get_nav_builder().get_menu_data(current_user=None),
+        sorted(THEME_CONFIG.items(), key=lambda item: item[0]),
+        ACTIVE_PLUGIN_NAMES,
+        template_stats,
+    ))
+
+def get_page_fingerprint(page_path: str, site_fingerprint: str) -> str:
+    """Fingerprint of a page's own source and its navigation dependencies (ancestor titles and children)."""
+    slug = _cms.resolve_page_path(page_path)
+    page_data = _cms.PAGE_CACHE.get(slug, {})
+    parts = slug.split("/")
+    ancestor_titles = [
+        _cms.PAGE_CACHE.get("/".join(parts[:i]), {}).get("page", {}).get("title")
+        for i in range(1, len(parts))
+    ]
+    return _hash((
+        site_fingerprint,
+        page_path,
+        page_data.get("markdown_content"),
+        repr(page_data.get("page")),
+        ancestor_titles,
+        _cms.get_nav_builder().get_children_details(slug, None, show_all_children=True),
+    ))
+
+# --- Assets ---
+def copy_assets(output_dir: Path) -> int:
+    """Copies new or changed asset files into the output directory. Returns the number of copied files."""
+    copied = 0
+    for directory in ASSET_DIRECTORIES:
+        for source in Path(directory).rglob("*"):
+            if not source.is_file() or source.suffix in SOURCE_SUFFIXES:
+                continue
+            if any(part.startswith((".", "_DISABLED")) or part in ("__pycache__", "templates") for part in source.parts):
+                continue
+            target = output_dir / source
+            source_stat = source.stat()
+            if target.exists():
+                target_stat = target.stat()
+                if target_stat.st_size == source_stat.st_size and target_stat.st_mtime_ns == source_stat.st_mtime_ns:
+                    continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+    favicon = Path("favicon.svg")
+    if favicon.exists():
+        shutil.copy2(favicon, output_dir / favicon.name)
+    return copied
+
+# --- Export ---
+def _load_manifest(output_dir: Path) -> dict:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def export_site(output_dir: Path, base_url: str, workers: int, full: bool = False) -> dict:
+    """Exports the site into output_dir. Returns a summary with the counts of rendered, skipped and removed pages."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous_manifest = {} if full else _load_manifest(output_dir)
+
+    site_fingerprint = get_site_fingerprint()
+    manifest = {page_path: get_page_fingerprint(page_path, site_fingerprint) for page_path in collect_page_paths()}
+    to_render = [
+        page_path for page_path, fingerprint in manifest.items()
+        if previous_manifest.get(page_path) != fingerprint or not _output_file(output_dir, page_path).exists()
+    ]
+
+    logger.info(f"Rendering {len(to_render)} of {len(manifest)} pages with {workers} worker(s)...")
+    failures = _render_all(to_render, output_dir, base_url, workers)
+    for page_path, error in failures:
+        logger.error(f"Export of page '/{page_path}' failed: {error}")
+        manifest.pop(page_path, None)
+
+    # Pages that are gone (or no longer public) must not stay published.
+    removed = 0
+    for page_path in set(previous_manifest) - set(manifest):
+        stale_file = _output_file(output_dir, page_path)
+        if stale_file.exists():
+            stale_file.unlink()
+            removed += 1
+
+    if "search" in ACTIVE_PLUGIN_NAMES:
+        _render_search_fragment(output_dir, base_url)
+    copied_assets = copy_assets(output_dir)
+
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    summary = {
+        "rendered": len(to_render) - len(failures),
+        "unchanged": len(manifest) - (len(to_render) - len(failures)),
+        "failed": len(failures),
+        "removed": removed,
+        "assets_copied": copied_assets,
+    }
+    logger.info(f"Static export to {output_dir} finished: {summary}")
+    return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the public pages of the site as static HTML files.")
+    parser.add_argument("--output", required=True, help="Output directory.")
+    parser.add_argument("--base-url", default="http://localhost/", help="Public URL of the site (used for absolute links).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of render processes.")
+    parser.add_argument("--full", action="store_true", help="Render all pages, ignoring the manifest of the previous export.")
+    return parser.parse_args()
+
+def main():
+    global _cms
+    args = parse_args()
+    output_dir = Path(args.output).resolve()
+    os.chdir(PROJECT_ROOT)  # main.py and the templates use paths relative to the project root
+    import main as cms  # Builds all caches and loads the plugins, exactly like the application.
+    _cms = cms
+    summary = export_site(output_dir, args.base_url, args.workers, full=args.full)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
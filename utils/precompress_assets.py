@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# utils/precompress_assets.py
+"""
+Produces precompressed sidecar files ('style.css.gz', 'style.css.br') for the theme and plugin
+assets, so the application (core.compression.PrecompressedStaticFiles) or nginx (gzip_static,
+brotli_static) can serve them without compressing on every request.
+
+Run it from the project root after changing assets (e.g. after compiling the theme's SCSS):
+    python utils/precompress_assets.py [--clean]
+
+Only sidecars that are missing or older than their original are written. Brotli sidecars are
+produced only if the optional 'brotli' package is installed. '--clean' removes all sidecars.
+"""
+import os
+import sys
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.compression import SUPPORTED_ENCODINGS, SIDECAR_SUFFIXES, MIN_COMPRESS_SIZE, compress
+
+ASSET_DIRECTORIES = ["user/theme", "user/plugin"]
+# Text-based formats that compress well; images, fonts like woff2 and archives are already compressed.
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".html", ".txt", ".xml", ".ttf", ".otf", ".eot"}
+BUILD_BROTLI_QUALITY = 11 # Build time: spend the CPU once for the smallest files
+
+
+def iter_assets():
+    for directory in ASSET_DIRECTORIES:
+        for path in sorted((PROJECT_ROOT / directory).rglob("*")):
+            if path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+                yield path
+
+def precompress(path: Path) -> int:
+    """Writes the missing or outdated sidecars of one file. Returns the number of written sidecars."""
+    source_stat = path.stat()
+    if source_stat.st_size < MIN_COMPRESS_SIZE:
+        return 0
+    body = None
+    written = 0
+    for encoding in SUPPORTED_ENCODINGS:
+        sidecar = path.with_name(path.name + SIDECAR_SUFFIXES[encoding])
+        if sidecar.exists() and sidecar.stat().st_mtime >= source_stat.st_mtime:
+            continue
+        if body is None:
+            body = path.read_bytes()
+        compressed = compress(body, encoding, brotli_quality=BUILD_BROTLI_QUALITY)
+        if len(compressed) >= len(body):
+            continue
+        temp_file = sidecar.with_name(sidecar.name + ".tmp")
+        temp_file.write_bytes(compressed)
+        os.replace(temp_file, sidecar)
+        written += 1
+    return written
+
+def remove_sidecars() -> int:
+    removed = 0
+    for directory in ASSET_DIRECTORIES:
+        for suffix in SIDECAR_SUFFIXES.values():
+            for sidecar in (PROJECT_ROOT / directory).rglob(f"*{suffix}"):
+                if sidecar.with_suffix("").suffix.lower() in COMPRESSIBLE_SUFFIXES:
+                    sidecar.unlink()
+                    removed += 1
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Create .gz/.br sidecar files for theme and plugin assets.")
+    parser.add_argument("--clean", action="store_true", help="Remove all sidecar files instead of creating them.")
+    args = parser.parse_args()
+
+    if args.clean:
+        print(f"Removed {remove_sidecars()} sidecar files.")
+        return 0
+
+    files = 0
+    written = 0
+    for path in iter_assets():
+        files += 1
+        written += precompress(path)
+    print(f"Checked {files} assets, wrote {written} sidecar files ({', '.join(SUPPORTED_ENCODINGS)}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())